@@ -23,7 +23,13 @@ from .core.display import SCREEN_WIDTH, SCREEN_HEIGHT
 from .core.keys import Keys, KeyState
 from .core.platform import PlatformTypes, Platform
 from .core.interpreter import InterpreterTypes
-from .core.exceptions import ExitInterpreterException, UnknownOpCodeException
+from .core.display_types import DisplayTypes
+from .core.rewind import Rewind
+from .core.block_cache import BlockCache
+from .core.analysis import analyze_rom, ControlFlowGraph, BasicBlock
+from .core.batch import BatchEmulator
+from .core.movie import Movie
+from .core.exceptions import ExitInterpreterException, UnknownOpCodeException, InvalidSaveStateException, InvalidMovieException
 from .core.audio import generate_audio_frame
 
 from importlib import metadata
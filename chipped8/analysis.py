@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+
+# Copyright 2025 John Schember <john@nachtimwald.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import json
+import os
+import sys
+
+import chipped8
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+            prog = os.path.basename(sys.argv[0]),
+            description = 'Chip8 ROM analysis')
+    parser.add_argument('in_files', help='Input ROM file(s)', nargs='+')
+    parser.add_argument('-p', '--platform', type=chipped8.PlatformTypes, choices=chipped8.PlatformTypes, default=chipped8.PlatformTypes.originalChip8, help='Set the Chip-8 instruction set to use')
+    parser.add_argument('-b', '--blocks', action='store_true', help='List the blocks and where each goes after it')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON, one object per ROM')
+    parser.add_argument('--version', action='version', version='%(prog)s {v}'.format(v=chipped8.__version__))
+    return parser.parse_args()
+
+def to_dict(fname, cfg):
+    return {
+        'rom': fname,
+        'size': len(cfg.rom),
+        'entry': cfg.entry,
+        'blocks': [ {
+                'start': block.start,
+                'end': block.end,
+                'opcodes': [ [ pc, '{:04X}'.format(opcode) ] for (pc, opcode, _) in block.instrs ],
+                'successors': block.successors,
+                'calls': block.calls,
+                'indirect': block.indirect,
+            } for block in cfg.blocks.values() ],
+        'functions': { str(entry): blocks for entry, blocks in cfg.functions.items() },
+        'call_graph': { str(entry): calls for entry, calls in cfg.call_graph.items() },
+        'code': cfg.code_ranges(),
+        'data': cfg.data_ranges(),
+        'data_refs': cfg.data_refs,
+        'self_modifying': [ { 'pc': pc, 'address': addr } for (pc, addr) in cfg.self_modifying ],
+        'invalid': cfg.invalid,
+        'external': cfg.external,
+        'indirect': cfg.indirect,
+    }
+
+def print_summary(fname, cfg, blocks):
+    code = sum(end - start for (start, end) in cfg.code_ranges())
+    print('{rom}: blocks={blocks} subroutines={subs} code={code} data={data} self-modifying={sm} invalid={invalid} external={external} indirect={indirect}'.format(
+        rom=fname, blocks=len(cfg.blocks), subs=len(cfg.functions) - 1, code=code, data=len(cfg.rom) - code,
+        sm=len(cfg.self_modifying), invalid=len(cfg.invalid), external=len(cfg.external), indirect=len(cfg.indirect)))
+
+    if not blocks:
+        return
+
+    for block in cfg.blocks.values():
+        targets = ' '.join('{:03X}'.format(pc) for pc in block.successors)
+        calls = ''.join(' call {:03X}'.format(pc) for pc in block.calls)
+        print('  {:03X}-{:03X} -> {}{}{}'.format(block.start, block.end, targets or '-', calls, ' indirect' if block.indirect else ''))
+
+def main():
+    args = parse_args()
+    quirks = chipped8.Platform(args.platform).quirks()
+
+    for fname in args.in_files:
+        try:
+            with open(fname, 'rb') as f:
+                cfg = chipped8.analyze_rom(f.read(), quirks)
+        except Exception as e:
+            print('Error: {0}: {1}'.format(fname, e), file=sys.stderr)
+            return 1
+
+        if args.json:
+            print(json.dumps(to_dict(fname, cfg)))
+        else:
+            print_summary(fname, cfg, args.blocks)
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+
+# Copyright 2025 John Schember <john@nachtimwald.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import json
+import os
+import sys
+
+from ..core.interpreter import InterpreterTypes
+from ..core.display_types import DisplayTypes
+from . import WORKLOADS, run_benchmark, run_batch_benchmark
+
+def parse_args():
+    names = [ w.name for w in WORKLOADS ]
+
+    parser = argparse.ArgumentParser(
+            prog = 'python -m chipped8.benchmark',
+            description = 'Benchmark the interpreters using synthetic ROMs')
+    parser.add_argument('-w', '--workload', action='append', choices=names, help='Workload to run. Can be repeated. Default is all')
+    parser.add_argument('-i', '--interpreter', action='append', type=InterpreterTypes, choices=InterpreterTypes, help='Interpreter to run. Can be repeated. Default is all')
+    parser.add_argument('-d', '--display', action='append', type=DisplayTypes, choices=DisplayTypes, help='Display engine to run. Can be repeated. Default is packed')
+    parser.add_argument('-n', '--frames', type=int, default=120, help='Frames to run per workload')
+    parser.add_argument('-t', '--tickrate', type=int, default=-1, help='Override the instructions per frame of every workload')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Runs per workload and interpreter. The fastest is reported')
+    parser.add_argument('-b', '--batch', type=int, default=0, help='Compare the batch engine running this many instances against looping over pure interpreters')
+    parser.add_argument('-o', '--output', help='Write the JSON results to this file instead of stdout')
+    parser.add_argument('--table', action='store_true', help='Print a text table in addition to the JSON')
+    return parser.parse_args()
+
+def print_table(report, out):
+    print('{:<16} {:<12} {:<8} {:>12} {:>10} {:>8} {:>8} {:>8}'.format('workload', 'interpreter', 'display', 'ips', 'fps', 'built', 'invalid', 'clears'), file=out)
+    for r in report['results']:
+        print('{workload:<16} {interpreter:<12} {display:<8} {ips:>12.0f} {fps:>10.1f} {blocks_built:>8} {blocks_invalidated:>8} {cache_clears:>8}'.format(**r), file=out)
+
+def print_batch_table(report, out):
+    print('{:<16} {:>10} {:>12} {:>12} {:>8}'.format('workload', 'instances', 'batch ips', 'loop ips', 'speedup'), file=out)
+    for r in report['results']:
+        print('{workload:<16} {instances:>10} {batch_ips:>12.0f} {loop_ips:>12.0f} {speedup:>8.1f}'.format(**r), file=out)
+
+def main():
+    args = parse_args()
+
+    workloads = WORKLOADS
+    if args.workload:
+        workloads = [ w for w in WORKLOADS if w.name in args.workload ]
+
+    if args.batch > 0:
+        report = run_batch_benchmark(workloads, args.batch, args.frames, args.tickrate, args.repeat)
+        if args.table:
+            print_batch_table(report, sys.stderr)
+    else:
+        report = run_benchmark(workloads, args.interpreter, args.frames, args.tickrate, args.repeat, args.display)
+        if args.table:
+            print_table(report, sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,134 @@
+# Copyright 2025 John Schember <john@nachtimwald.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from dataclasses import dataclass
+
+from ..core.platform import PlatformTypes
+
+@dataclass
+class Workload:
+    name: str
+    description: str
+    platform: PlatformTypes
+    rom: bytes
+    tickrate: int = 1000
+
+def assemble(words) -> bytes:
+    '''
+    Build a ROM from a list of 16 bit words. Programs start at 0x200 so the
+    address of word N is 0x200 + N*2.
+    '''
+    return b''.join(w.to_bytes(2, 'big') for w in words)
+
+# Arithmetic, logic and skips. No memory writes or drawing.
+_ALU = assemble([
+    0x6001,         # 200: V0 = 1
+    0x6103,         # 202: V1 = 3
+    0x6200,         # 204: V2 = 0
+    0x8014,         # 206: V0 += V1
+    0x8105,         # 208: V1 -= V0
+    0x8216,         # 20A: V2 >>= 1
+    0x821E,         # 20C: V2 <<= 1
+    0x8301,         # 20E: V3 |= V0
+    0x8312,         # 210: V3 &= V1
+    0x8323,         # 212: V3 ^= V2
+    0x7301,         # 214: V3 += 1
+    0xA300,         # 216: I = 0x300
+    0xF01E,         # 218: I += V0
+    0x3355,         # 21A: skip if V3 == 0x55
+    0x1206,         # 21C: jump 206
+    0x1206,         # 21E: jump 206
+])
+
+# Font sprites drawn in low resolution so each pixel is doubled.
+_DRAW = assemble([
+    0x6000,         # 200: V0 = 0 (x)
+    0x6100,         # 202: V1 = 0 (y)
+    0x6200,         # 204: V2 = 0 (digit)
+    0xF229,         # 206: I = font[V2]
+    0xD015,         # 208: draw 8x5 at V0, V1
+    0x7007,         # 20A: V0 += 7
+    0x7103,         # 20C: V1 += 3
+    0x7201,         # 20E: V2 += 1
+    0x420F,         # 210: skip if V2 != 15
+    0x6200,         # 212: V2 = 0
+    0x1206,         # 214: jump 206
+])
+
+# 16x16 sprites in high resolution.
+_DRAW_HIRES = assemble([
+    0x00FF,         # 200: high resolution
+    0x6000,         # 202: V0 = 0 (x)
+    0x6100,         # 204: V1 = 0 (y)
+    0xA000,         # 206: I = 0
+    0xD010,         # 208: draw 16x16 at V0, V1
+    0x700B,         # 20A: V0 += 11
+    0x7105,         # 20C: V1 += 5
+    0x1208,         # 20E: jump 208
+])
+
+# Rewrites the operand of the instruction at 0x20A on every pass of the loop.
+_SELF_MODIFYING = assemble([
+    0x6000,         # 200: V0 = 0
+    0x7001,         # 202: V0 += 1
+    0xA20B,         # 204: I = 0x20B
+    0xF055,         # 206: [I] = V0
+    0x6100,         # 208: padding so the target is not the next instruction
+    0x6100,         # 20A: V1 = NN, NN is rewritten
+    0x8114,         # 20C: V1 += V1
+    0x1202,         # 20E: jump 202
+])
+
+# XO-Chip four byte F000 NNNN loads and skipping over them.
+_DOUBLE_WIDE = assemble([
+    0x6000,         # 200: V0 = 0
+    0xF000, 0x1234, # 202: I = 0x1234
+    0x3000,         # 206: skip if V0 == 0
+    0xF000, 0x5678, # 208: I = 0x5678
+    0x7001,         # 20C: V0 += 1
+    0x4001,         # 20E: skip if V0 != 1
+    0xF000, 0x9ABC, # 210: I = 0x9ABC
+    0x1202,         # 214: jump 202
+])
+
+# Scrolls in every direction with a redraw so there is something to move.
+_SCROLL = assemble([
+    0x00FF,         # 200: high resolution
+    0xF301,         # 202: draw to both planes
+    0x6000,         # 204: V0 = 0
+    0x6100,         # 206: V1 = 0
+    0xA000,         # 208: I = 0
+    0xD015,         # 20A: draw 8x5 at V0, V1
+    0x00C2,         # 20C: scroll down 2
+    0x00FB,         # 20E: scroll right
+    0x00D1,         # 210: scroll up 1
+    0x00FC,         # 212: scroll left
+    0x7005,         # 214: V0 += 5
+    0x120A,         # 216: jump 20A
+])
+
+WORKLOADS = [
+    Workload('alu', 'Register arithmetic and skips', PlatformTypes.superchip, _ALU),
+    Workload('draw', 'Low resolution 8xN sprites', PlatformTypes.superchip, _DRAW),
+    Workload('draw-hires', 'High resolution 16x16 sprites', PlatformTypes.superchip, _DRAW_HIRES),
+    Workload('self-modifying', 'Loop that rewrites its own code', PlatformTypes.superchip, _SELF_MODIFYING),
+    Workload('double-wide', 'XO-Chip F000 NNNN loads and skips', PlatformTypes.xochip, _DOUBLE_WIDE),
+    Workload('scroll', 'Scrolling on both XO-Chip planes', PlatformTypes.xochip, _SCROLL),
+]
@@ -0,0 +1,138 @@
+# Copyright 2025 John Schember <john@nachtimwald.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import platform
+import time
+
+from .. import __version__
+from ..core.emulator import Emulator
+from ..core.batch import BatchEmulator
+from ..core.interpreter import InterpreterTypes
+from ..core.display_types import DisplayTypes
+
+def run_workload(workload, interpreter_type, frames=120, tickrate=-1, display_type=DisplayTypes.packed):
+    if tickrate <= 0:
+        tickrate = workload.tickrate
+
+    emulator = Emulator(platform=workload.platform, interpreter_type=interpreter_type, tickrate=tickrate, display_type=display_type)
+    emulator.load_rom(workload.rom)
+
+    ops = 0
+    start = time.perf_counter()
+    for _ in range(frames):
+        ops += emulator.process_frame()
+    seconds = time.perf_counter() - start
+
+    result = {
+        'workload': workload.name,
+        'interpreter': str(interpreter_type),
+        'display': str(display_type),
+        'platform': str(workload.platform),
+        'tickrate': tickrate,
+        'frames': frames,
+        'ops': ops,
+        'seconds': seconds,
+        'fps': frames / seconds,
+        'ips': ops / seconds,
+    }
+    result.update(emulator.cache_stats())
+    return result
+
+def run_batch_workload(workload, instances, frames=120, tickrate=-1):
+    '''
+    Compare running many instances of a workload with the batch engine against
+    looping over the same number of pure interpreter emulators.
+    '''
+    if tickrate <= 0:
+        tickrate = workload.tickrate
+
+    batch = BatchEmulator(instances, platform=workload.platform, tickrate=tickrate)
+    batch.load_rom(workload.rom)
+
+    ops = 0
+    start = time.perf_counter()
+    for _ in range(frames):
+        ops += batch.process_frame()
+    batch_seconds = time.perf_counter() - start
+
+    emulators = []
+    for _ in range(instances):
+        emulator = Emulator(platform=workload.platform, tickrate=tickrate)
+        emulator.load_rom(workload.rom)
+        emulators.append(emulator)
+
+    loop_ops = 0
+    start = time.perf_counter()
+    for _ in range(frames):
+        for emulator in emulators:
+            loop_ops += emulator.process_frame()
+    loop_seconds = time.perf_counter() - start
+
+    return {
+        'workload': workload.name,
+        'platform': str(workload.platform),
+        'instances': instances,
+        'tickrate': tickrate,
+        'frames': frames,
+        'ops': ops,
+        'batch_seconds': batch_seconds,
+        'batch_ips': ops / batch_seconds,
+        'loop_seconds': loop_seconds,
+        'loop_ips': loop_ops / loop_seconds,
+        'speedup': loop_seconds / batch_seconds,
+    }
+
+def _report(frames, repeat, results):
+    return {
+        'version': __version__,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'system': platform.system(),
+        'frames': frames,
+        'repeat': repeat,
+        'results': results,
+    }
+
+def run_batch_benchmark(workloads, instances, frames=120, tickrate=-1, repeat=3):
+    results = []
+    for workload in workloads:
+        runs = [ run_batch_workload(workload, instances, frames, tickrate) for _ in range(max(repeat, 1)) ]
+        results.append(min(runs, key=lambda r: r['batch_seconds']))
+    return _report(frames, repeat, results)
+
+def run_benchmark(workloads, interpreter_types=None, frames=120, tickrate=-1, repeat=3, display_types=None):
+    '''
+    Run every workload against every interpreter and display. Each combination is
+    run `repeat` times and the fastest run is kept to reduce noise from the machine.
+    '''
+    if not interpreter_types:
+        interpreter_types = list(InterpreterTypes)
+    if not display_types:
+        display_types = [ DisplayTypes.packed ]
+
+    results = []
+    for workload in workloads:
+        for interpreter_type in interpreter_types:
+            for display_type in display_types:
+                runs = [ run_workload(workload, interpreter_type, frames, tickrate, display_type) for _ in range(max(repeat, 1)) ]
+                results.append(min(runs, key=lambda r: r['seconds']))
+
+    return _report(frames, repeat, results)
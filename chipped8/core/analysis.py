@@ -0,0 +1,334 @@
+# Copyright 2025 John Schember <john@nachtimwald.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from .memory import ROM_START, MEMORY_SIZE
+from .exceptions import UnknownOpCodeException
+from .cpu.cached.lamb.factory import get_op_instr
+from .cpu.cached.instr_kind import InstrKind, kind_name
+
+# Instructions that end a block. The same ones the cached interpreters end
+# their blocks on so a block here is a block they would build.
+_BLOCK_ENDS = (InstrKind.JUMP, InstrKind.COND_ADVANCE, InstrKind.EXIT, InstrKind.DOUBLE_WIDE)
+
+class BasicBlock():
+    '''
+    Instructions that always run in order from start. Only the last one can
+    change where execution goes next.
+    '''
+
+    def __init__(self, start):
+        self.start = start
+        # [(pc, opcode, kind)]
+        self.instrs = []
+        # Where execution can go after the block in the same subroutine. A
+        # call continues after the call once the subroutine returns.
+        self.successors = []
+        # Subroutines the block calls.
+        self.calls = []
+        # Ends with BNNN which jumps to an address only known when running.
+        self.indirect = False
+
+    @property
+    def end(self):
+        (pc, _, kind) = self.instrs[-1]
+        return pc + (4 if kind == InstrKind.DOUBLE_WIDE else 2)
+
+class ControlFlowGraph():
+    '''
+    What analyze_rom found by following the code reachable from the start of
+    the ROM.
+    '''
+
+    def __init__(self, rom):
+        self.rom = rom
+        self.entry = ROM_START
+        # Keyed by start PC.
+        self.blocks = {}
+        # Subroutine entry -> block starts in the subroutine. The ROM's
+        # entry is treated as a subroutine.
+        self.functions = {}
+        # Subroutine entry -> subroutines it calls.
+        self.call_graph = {}
+        # Addresses loaded into I by ANNN and F000 NNNN.
+        self.data_refs = []
+        # (pc, address) of memory writes that might change code. address is
+        # None when where I points isn't known.
+        self.self_modifying = []
+        # PCs holding an opcode that can't be decoded.
+        self.invalid = []
+        # Jump and call targets outside of the ROM.
+        self.external = []
+        # PCs of BNNN jumps.
+        self.indirect = []
+        self._code = set()
+
+    def _byte(self, addr):
+        if ROM_START <= addr < ROM_START + len(self.rom):
+            return self.rom[addr - ROM_START]
+        # Memory after the ROM is cleared when it's loaded.
+        return 0
+
+    def is_code(self, addr):
+        return addr in self._code
+
+    def code_ranges(self):
+        '''
+        [(start, end)] of the ROM decoded as instructions.
+        '''
+        return self._ranges(True)
+
+    def data_ranges(self):
+        '''
+        [(start, end)] of the ROM that's never reached as code.
+        '''
+        return self._ranges(False)
+
+    def _ranges(self, code):
+        ranges = []
+        start = None
+        for addr in range(ROM_START, ROM_START + len(self.rom) + 1):
+            inside = addr < ROM_START + len(self.rom) and (addr in self._code) == code
+            if inside and start is None:
+                start = addr
+            elif not inside and start is not None:
+                ranges.append((start, addr))
+                start = None
+        return ranges
+
+    def block_layout(self):
+        '''
+        Every block in the form Emulator.preload_blocks takes.
+        (pc, data, [(pc, kind name)])
+        '''
+        layout = []
+        for block in self.blocks.values():
+            data = bytes(self._byte(addr) for addr in range(block.start, min(block.end, MEMORY_SIZE)))
+            layout.append((block.start, data, [ (pc, kind_name(kind)) for (pc, _, kind) in block.instrs ]))
+        return layout
+
+def _opcode(cfg, pc):
+    return (cfg._byte(pc) << 8) | cfg._byte(pc + 1)
+
+def _flow(cfg, pc, opcode, kind):
+    '''
+    (next, targets, calls) for an instruction. next is where it falls through
+    to, None if it doesn't. targets are other places it can go.
+    '''
+    if kind == InstrKind.JUMP:
+        code = opcode & 0xF000
+        if code == 0x1000:
+            return (None, [ opcode & 0x0FFF ], [])
+        if code == 0x2000:
+            return (pc + 2, [], [ opcode & 0x0FFF ])
+        # 00EE and BNNN.
+        return (None, [], [])
+    if kind == InstrKind.COND_ADVANCE:
+        # Skipping F000 NNNN skips all four bytes.
+        skip = 6 if _opcode(cfg, pc + 2) == 0xF000 else 4
+        return (pc + 2, [ pc + skip ], [])
+    if kind == InstrKind.EXIT:
+        return (None, [], [])
+    if kind == InstrKind.DOUBLE_WIDE:
+        return (pc + 4, [], [])
+    return (pc + 2, [], [])
+
+def _decode(cfg, quirks):
+    '''
+    Decode every instruction reachable from the entry. Returns the decoded
+    instructions by PC and the PCs that start a block.
+    '''
+    decoded = {}
+    leaders = { cfg.entry }
+    calls = set()
+    external = set()
+    invalid = set()
+
+    pending = [ cfg.entry ]
+    while pending:
+        pc = pending.pop()
+        if pc in decoded or pc in invalid or pc in external:
+            continue
+        if pc < ROM_START or pc >= ROM_START + len(cfg.rom):
+            external.add(pc)
+            continue
+
+        opcode = _opcode(cfg, pc)
+        try:
+            (kind, _) = get_op_instr(opcode, quirks)
+        except UnknownOpCodeException:
+            invalid.add(pc)
+            continue
+        decoded[pc] = (opcode, kind)
+
+        (nxt, targets, called) = _flow(cfg, pc, opcode, kind)
+        if kind in _BLOCK_ENDS:
+            leaders.update(targets)
+            leaders.update(called)
+            if nxt is not None:
+                leaders.add(nxt)
+        calls.update(called)
+        pending.extend(targets)
+        pending.extend(called)
+        if nxt is not None:
+            pending.append(nxt)
+
+    cfg.external = sorted(external)
+    cfg.invalid = sorted(invalid)
+    return (decoded, leaders, calls)
+
+def _build_blocks(cfg, decoded, leaders):
+    for start in sorted(leaders):
+        if start not in decoded:
+            continue
+
+        block = BasicBlock(start)
+        pc = start
+        while True:
+            (opcode, kind) = decoded[pc]
+            block.instrs.append((pc, opcode, kind))
+            size = 4 if kind == InstrKind.DOUBLE_WIDE else 2
+            for addr in range(pc, pc + size):
+                if addr < ROM_START + len(cfg.rom):
+                    cfg._code.add(addr)
+
+            (nxt, targets, called) = _flow(cfg, pc, opcode, kind)
+            if kind in _BLOCK_ENDS or nxt in leaders or nxt not in decoded:
+                block.successors = ([ nxt ] if nxt is not None else []) + targets
+                block.calls = called
+                block.indirect = kind == InstrKind.JUMP and opcode & 0xF000 == 0xB000
+                break
+            pc = nxt
+
+        cfg.blocks[start] = block
+        if block.indirect:
+            cfg.indirect.append(block.instrs[-1][0])
+
+def _build_functions(cfg, calls):
+    for entry in [ cfg.entry ] + sorted(calls - { cfg.entry }):
+        if entry not in cfg.blocks:
+            continue
+        seen = set()
+        pending = [ entry ]
+        while pending:
+            pc = pending.pop()
+            if pc in seen or pc not in cfg.blocks:
+                continue
+            seen.add(pc)
+            pending.extend(cfg.blocks[pc].successors)
+        cfg.functions[entry] = sorted(seen)
+        cfg.call_graph[entry] = sorted({ c for pc in seen for c in cfg.blocks[pc].calls })
+
+def _memory_step(x, quirks):
+    if quirks.memoryLeaveIUnchanged:
+        return 0
+    if quirks.memoryIncrementByX:
+        return x
+    return x + 1
+
+def _track_writes(cfg, quirks, block, I, writes):
+    '''
+    Run the block with I as a constant, None when unknown. Memory writes are
+    added to writes. Returns I at the end of the block.
+    '''
+    for (pc, opcode, kind) in block.instrs:
+        x = (opcode & 0x0F00) >> 8
+        y = (opcode & 0x00F0) >> 4
+        code = opcode & 0xF000
+        low = opcode & 0x00FF
+
+        if code == 0xA000:
+            I = opcode & 0x0FFF
+        elif kind == InstrKind.DOUBLE_WIDE:
+            I = _opcode(cfg, pc + 2)
+        elif code == 0x5000 and opcode & 0x000F == 0x2:
+            writes.append((pc, I, abs(x - y) + 1))
+        elif code == 0xF000 and low == 0x33:
+            writes.append((pc, I, 3))
+        elif code == 0xF000 and low == 0x55:
+            writes.append((pc, I, x + 1))
+            if I is not None:
+                I = (I + _memory_step(x, quirks)) & 0xFFFF
+        elif code == 0xF000 and low == 0x65:
+            if I is not None:
+                I = (I + _memory_step(x, quirks)) & 0xFFFF
+        elif code == 0xF000 and low in (0x1E, 0x29, 0x30):
+            I = None
+    return I
+
+def _find_self_modifying(cfg, quirks):
+    # What I holds at the start of each block. Missing means the block hasn't
+    # been reached yet. Following a call I isn't known because the
+    # subroutine can change it.
+    unseen = object()
+    start_I = { cfg.entry: None }
+    pending = [ cfg.entry ]
+    while pending:
+        pc = pending.pop()
+        block = cfg.blocks.get(pc)
+        if block is None:
+            continue
+        I = _track_writes(cfg, quirks, block, start_I[pc], [])
+
+        after = None if block.calls else I
+        flows = [ (s, after) for s in block.successors ] + [ (c, I) for c in block.calls ]
+        for (succ, value) in flows:
+            current = start_I.get(succ, unseen)
+            if current is unseen:
+                start_I[succ] = value
+            elif current != value and current is not None:
+                start_I[succ] = None
+            else:
+                continue
+            pending.append(succ)
+
+    writes = []
+    for (pc, block) in cfg.blocks.items():
+        _track_writes(cfg, quirks, block, start_I.get(pc), writes)
+
+    for (pc, addr, length) in writes:
+        if addr is None:
+            cfg.self_modifying.append((pc, None))
+        elif any(cfg.is_code(a) for a in range(addr, addr + length)):
+            cfg.self_modifying.append((pc, addr))
+
+def _find_data_refs(cfg):
+    refs = set()
+    for block in cfg.blocks.values():
+        for (pc, opcode, kind) in block.instrs:
+            if opcode & 0xF000 == 0xA000:
+                refs.add(opcode & 0x0FFF)
+            elif kind == InstrKind.DOUBLE_WIDE:
+                refs.add(_opcode(cfg, pc + 2))
+    cfg.data_refs = sorted(refs)
+
+def analyze_rom(rom, quirks):
+    '''
+    Build the control flow graph of a ROM without running it. Code is found
+    by following jumps, calls and skips from the start of the ROM. Anything
+    that's never reached is data. BNNN jumps can't be followed so code only
+    reached through them is seen as data.
+    '''
+    cfg = ControlFlowGraph(bytes(rom))
+    (decoded, leaders, calls) = _decode(cfg, quirks)
+    _build_blocks(cfg, decoded, leaders)
+    _build_functions(cfg, calls)
+    _find_data_refs(cfg)
+    _find_self_modifying(cfg, quirks)
+    return cfg
@@ -24,10 +24,11 @@ import math
 
 import numpy as np
 
-from copy import deepcopy
-
 class Audio():
 
+    # Pattern and pitch
+    STATE_SIZE = 16 + 1
+
     def __init__(self):
         self._pattern = bytearray.fromhex('00 00 FF FF 00 00 FF FF 00 00 FF FF 00 00 FF FF')
         self.pitch: int = 64 # Default 4000Hz
@@ -37,12 +38,19 @@ class Audio():
             return memo[id(self)]
 
         d = object.__new__(self.__class__)
-        d._pattern = deepcopy(self._pattern, memo)
+        d._pattern = bytearray(self._pattern)
         d.pitch = self.pitch
 
         memo[id(self)] = d
         return d
 
+    def get_state(self) -> bytes:
+        return bytes(self._pattern) + bytes((self.pitch,))
+
+    def set_state(self, data: bytes) -> None:
+        self._pattern[:] = data[0:16]
+        self.pitch = data[16]
+
     @property
     def pattern(self) -> bytearray:
         return self._pattern
@@ -0,0 +1,622 @@
+#!/usr/bin/env python
+
+# Copyright 2025 John Schember <john@nachtimwald.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import random
+
+import numpy as np
+
+from .registers import Registers
+from .stack import Stack
+from .timers import Timers
+from .audio import Audio
+from .memory import Memory, MEMORY_SIZE
+from .keys import KeyState
+from .display import Displaly, SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_PIXEL_COUNT
+from .platform import PlatformTypes, Platform
+
+_RANGE32 = np.arange(32)
+_RANGE16 = np.arange(16)
+
+class BatchEmulator():
+    '''
+    Runs many instances of a ROM in lockstep using NumPy.
+
+    Every instance executes one instruction per step. State is stored as arrays
+    with the instance as the first axis. Instances are grouped by the high
+    nibble of their current opcode and each group is run with array operations
+    so the cost of a step barely depends on how many instances there are.
+
+    Planes are stored with one byte per pixel instead of packed bits. Sprites
+    land at a different bit offset in every instance and a gather, XOR and
+    scatter over bytes is far simpler than shifting packed rows per instance.
+
+    Results match the pure interpreter with one exception. An instance that
+    would raise an exception, such as an unknown opcode, a stack overflow or
+    00FD, is halted instead and stops executing.
+
+    Instance state uses the same layout as Emulator.get_state so instances
+    can be moved between the two.
+    '''
+
+    def __init__(self, instances: int, platform=PlatformTypes.originalChip8, tickrate=-1, quirks=None, seed=None):
+        platform = Platform(platform)
+        if not quirks:
+            self._quirks = platform.quirks()
+        else:
+            self._quirks = quirks
+
+        if tickrate <= 0:
+            self._tickrate = platform.tickrate()
+        else:
+            self._tickrate = tickrate
+
+        n = instances
+        self._n = n
+        self._V = np.zeros((n, 16), dtype=np.uint8)
+        self._I = np.zeros(n, dtype=np.int64)
+        self._PC = np.zeros(n, dtype=np.int64)
+        self._RPL = np.zeros((n, 16), dtype=np.uint8)
+        self._random = np.zeros(n, dtype=np.uint32)
+        self._stack = np.zeros((n, 16), dtype=np.int64)
+        self._sp = np.zeros(n, dtype=np.int64)
+        self._sound = np.zeros(n, dtype=np.int64)
+        self._delay = np.zeros(n, dtype=np.int64)
+        self._pattern = np.zeros((n, 16), dtype=np.uint8)
+        self._pitch = np.zeros(n, dtype=np.int64)
+        self._hires = np.zeros(n, dtype=bool)
+        self._target = np.zeros(n, dtype=np.int64)
+        self._planes = np.zeros((n, 2, SCREEN_HEIGHT, SCREEN_WIDTH), dtype=np.uint8)
+        self._memory = np.zeros((n, MEMORY_SIZE), dtype=np.uint8)
+        self._ram_start = np.zeros(n, dtype=np.int64)
+        self._keys = np.zeros((n, 16), dtype=bool)
+        self._halted = np.zeros(n, dtype=bool)
+
+        self._font_large_offset = Memory().font_large_offset()
+
+        # Start from the same state as a new emulator.
+        self.set_state(b''.join(c.get_state() for c in (Registers(), Stack(), Timers(), Audio(), Displaly(), Memory())))
+
+        # Every instance starts with the generator an emulator made with the
+        # same seed has. set_state gives an instance its own.
+        if seed is None:
+            seed = random.getrandbits(32)
+        registers = Registers()
+        registers.seed_random(seed & 0xFFFFFFFF)
+        self._random[:] = registers._random
+
+        self._handlers = [
+            self._execute_0, self._execute_1NNN, self._execute_2NNN, self._execute_3XNN,
+            self._execute_4XNN, self._execute_5, self._execute_6XNN, self._execute_7XNN,
+            self._execute_8, self._execute_9XY0, self._execute_ANNN, self._execute_BNNN,
+            self._execute_CXNN, self._execute_DXYN, self._execute_E, self._execute_F,
+        ]
+
+    def __len__(self):
+        return self._n
+
+    def state_size(self):
+        return Registers.STATE_SIZE + Stack.STATE_SIZE + Timers.STATE_SIZE + Audio.STATE_SIZE + Displaly.STATE_SIZE + Memory.STATE_SIZE
+
+    def get_state(self, instance: int) -> bytes:
+        '''
+        State of one instance in the same layout as Emulator.get_state.
+        '''
+        i = instance
+        stack = bytearray(Stack.STATE_SIZE)
+        stack[0] = self._sp[i]
+        for j in range(self._sp[i]):
+            stack[1 + (j*2) : 3 + (j*2)] = int(self._stack[i, j]).to_bytes(2, 'big')
+
+        return b''.join((
+            self._V[i].tobytes(), int(self._I[i]).to_bytes(2, 'big'), int(self._PC[i]).to_bytes(2, 'big'), self._RPL[i].tobytes(), int(self._random[i]).to_bytes(4, 'big'),
+            bytes(stack),
+            int(self._sound[i]).to_bytes(2, 'big'), int(self._delay[i]).to_bytes(2, 'big'),
+            self._pattern[i].tobytes(), bytes((self._pitch[i],)),
+            bytes((1 if self._hires[i] else 0, self._target[i])), np.packbits(self._planes[i]).tobytes(),
+            int(self._ram_start[i]).to_bytes(4, 'big'), self._memory[i].tobytes(),
+        ))
+
+    def set_state(self, data: bytes, instance: int | None = None) -> None:
+        '''
+        Set the state of one instance, or all of them when instance is None,
+        from bytes in the Emulator.get_state layout.
+        '''
+        if len(data) != self.state_size():
+            raise ValueError(f'State wrong length: need {self.state_size()} have {len(data)}')
+
+        i = slice(None) if instance is None else instance
+        data = np.frombuffer(data, dtype=np.uint8)
+        be16 = lambda o: (int(data[o]) << 8) | int(data[o+1])
+
+        self._V[i] = data[0:16]
+        self._I[i] = be16(16)
+        self._PC[i] = be16(18)
+        self._RPL[i] = data[20:36]
+        self._random[i] = ((int(data[36]) << 24) | (int(data[37]) << 16) | be16(38)) or 1
+        o = Registers.STATE_SIZE
+
+        self._sp[i] = data[o]
+        self._stack[i] = (data[o+1 : o+33:2].astype(np.int64) << 8) | data[o+2 : o+33:2]
+        o += Stack.STATE_SIZE
+
+        self._sound[i] = be16(o)
+        self._delay[i] = be16(o+2)
+        o += Timers.STATE_SIZE
+
+        self._pattern[i] = data[o : o+16]
+        self._pitch[i] = data[o+16]
+        o += Audio.STATE_SIZE
+
+        self._hires[i] = data[o] == 1
+        self._target[i] = data[o+1]
+        self._planes[i] = np.unpackbits(data[o+2 : o+Displaly.STATE_SIZE]).reshape((2, SCREEN_HEIGHT, SCREEN_WIDTH))
+        o += Displaly.STATE_SIZE
+
+        self._ram_start[i] = (int(data[o]) << 24) | (int(data[o+1]) << 16) | be16(o+2)
+        self._memory[i] = data[o+4:]
+
+        if instance is None:
+            self._halted[:] = False
+        else:
+            self._halted[instance] = False
+
+    def load_rom(self, data) -> None:
+        if len(data) > MEMORY_SIZE - 512:
+            raise Exception('Rom data exceeds available memory')
+
+        self._memory[:, 512 : 512+len(data)] = np.frombuffer(bytes(data), dtype=np.uint8)
+        self._ram_start[:] = len(data)+512+1
+
+    def set_key_state(self, instance: int, key, state) -> None:
+        self._keys[instance, key] = state == KeyState.down
+
+    def clear_keys(self) -> None:
+        self._keys[:] = False
+
+    def halted(self):
+        return self._halted.copy()
+
+    def screen_buffer(self, instance: int):
+        planes = self._planes[instance]
+        return (planes[1] << 1) | planes[0]
+
+    def process_frame(self) -> int:
+        '''
+        Run a frame on every instance that isn't halted. Returns the total
+        number of instructions run across all instances.
+        '''
+        active = ~self._halted
+        ops = 0
+        for _ in range(self._tickrate):
+            i = np.flatnonzero(active)
+            if len(i) == 0:
+                break
+            ops += len(i)
+
+            drew = self._step(i)
+            active &= ~self._halted
+            if self._quirks.vblank:
+                active[drew] = False
+
+        self._delay[self._delay > 0] -= 1
+        self._sound[self._sound != 0] -= 1
+        return ops
+
+    def step(self) -> None:
+        '''
+        Run one instruction on every instance that isn't halted.
+        '''
+        self._step(np.flatnonzero(~self._halted))
+
+    def _step(self, i):
+        pc = self._PC[i]
+        opcodes = self._read_opcodes(i, pc)
+
+        # Group the instances by the high nibble of their opcode.
+        nibbles = opcodes >> 12
+        order = np.argsort(nibbles, kind='stable')
+        counts = np.bincount(nibbles, minlength=16)
+
+        drew = []
+        start = 0
+        for nibble, count in enumerate(counts.tolist()):
+            if count == 0:
+                continue
+            sel = order[start : start+count]
+            start += count
+            r = self._handlers[nibble](i[sel], opcodes[sel])
+            if r is not None:
+                drew.append(r)
+
+        if drew:
+            return np.concatenate(drew)
+        return np.zeros(0, dtype=np.int64)
+
+    def _read_opcodes(self, i, pc):
+        memory = self._memory
+        return (memory[i, pc & 0xFFFF].astype(np.int64) << 8) | memory[i, (pc + 1) & 0xFFFF]
+
+    def _halt(self, i):
+        self._halted[i] = True
+
+    def _set_PC(self, i, pc):
+        # Same as Registers.set_PC
+        pc = pc & 0xFFFF
+        self._PC[i] = np.where(pc < 512, 512, pc)
+
+    def _advance(self, i):
+        self._set_PC(i, self._PC[i] + 2)
+
+    def _skip(self, i, cond):
+        # Skips also skip the address of an XO-Chip F000 NNNN.
+        s = i[cond]
+        self._advance(s)
+        s = s[self._read_opcodes(s, self._PC[s]) == 0xF000]
+        self._advance(s)
+        self._advance(i)
+
+    def _vx(self, i, opcodes):
+        return self._V[i, (opcodes >> 8) & 0xF].astype(np.int64)
+
+    def _vy(self, i, opcodes):
+        return self._V[i, (opcodes >> 4) & 0xF].astype(np.int64)
+
+    def _execute_0(self, i, opcodes):
+        sub = opcodes & 0xFF
+        micro = opcodes & 0xF0
+        n = opcodes & 0xF
+        scale = np.where(self._hires[i], 1, 2)
+        handled = np.zeros(len(i), dtype=bool)
+
+        # 00CN and 00DN: Scroll down and up N pixels
+        m = micro == 0xC0
+        if m.any():
+            self._scroll(i[m], (n * scale)[m], 0)
+        handled |= m
+        m = micro == 0xD0
+        if m.any():
+            self._scroll(i[m], -(n * scale)[m], 0)
+        handled |= m
+
+        # 00E0: Clear the screen
+        m = sub == 0xE0
+        self._planes[i[m]] = 0
+        handled |= m
+
+        # 00EE: Return from subroutine
+        m = sub == 0xEE
+        if m.any():
+            r = i[m]
+            self._halt(r[self._sp[r] == 0])
+            r = r[self._sp[r] > 0]
+            self._sp[r] -= 1
+            self._set_PC(r, self._stack[r, self._sp[r]])
+        handled |= m
+
+        # 00FB and 00FC: Scroll right and left by 4 pixels
+        m = sub == 0xFB
+        if m.any():
+            self._scroll(i[m], 0, (4 * scale)[m])
+        handled |= m
+        m = sub == 0xFC
+        if m.any():
+            self._scroll(i[m], 0, -(4 * scale)[m])
+        handled |= m
+
+        # 00FE and 00FF: Low and high resolution mode. Changing modes clears the screen.
+        m = (sub == 0xFE) | (sub == 0xFF)
+        r = i[m]
+        self._hires[r] = sub[m] == 0xFF
+        self._planes[r] = 0
+        handled |= m
+
+        # 00FD: Exit interpreter and anything unknown.
+        self._halt(i[~handled])
+        self._advance(i[~self._halted[i]])
+
+    def _scroll(self, i, down, right):
+        down = np.broadcast_to(down, i.shape)
+        right = np.broadcast_to(right, i.shape)
+
+        for p in range(2):
+            on = (self._target[i] & (1 << p)) != 0
+            for d, r in set(zip(down[on].tolist(), right[on].tolist())):
+                s = i[on & (down == d) & (right == r)]
+                # Instances usually run the same code so they often all scroll
+                # together. A slice avoids copying the planes out and back.
+                if len(s) == self._n:
+                    s = slice(None)
+                self._planes[s, p] = self._shift(self._planes[s, p], d, r)
+
+    def _shift(self, planes, down, right):
+        shifted = np.zeros_like(planes)
+        src_rows = slice(max(-down, 0), SCREEN_HEIGHT - max(down, 0))
+        dst_rows = slice(max(down, 0), SCREEN_HEIGHT - max(-down, 0))
+        src_cols = slice(max(-right, 0), SCREEN_WIDTH - max(right, 0))
+        dst_cols = slice(max(right, 0), SCREEN_WIDTH - max(-right, 0))
+        shifted[:, dst_rows, dst_cols] = planes[:, src_rows, src_cols]
+        return shifted
+
+    def _execute_1NNN(self, i, opcodes):
+        self._set_PC(i, opcodes & 0xFFF)
+
+    def _execute_2NNN(self, i, opcodes):
+        full = self._sp[i] >= 16
+        self._halt(i[full])
+        i = i[~full]
+        opcodes = opcodes[~full]
+
+        self._stack[i, self._sp[i]] = self._PC[i]
+        self._sp[i] += 1
+        self._set_PC(i, opcodes & 0xFFF)
+
+    def _execute_3XNN(self, i, opcodes):
+        self._skip(i, self._vx(i, opcodes) == (opcodes & 0xFF))
+
+    def _execute_4XNN(self, i, opcodes):
+        self._skip(i, self._vx(i, opcodes) != (opcodes & 0xFF))
+
+    def _execute_5(self, i, opcodes):
+        sub = opcodes & 0xF
+        x = (opcodes >> 8) & 0xF
+        y = (opcodes >> 4) & 0xF
+
+        unknown = (sub != 0) & (sub != 2) & (sub != 3)
+        self._halt(i[unknown])
+
+        # 5XY0: Skip if VX equals VY
+        m = sub == 0
+        if m.any():
+            self._skip(i[m], (self._vx(i, opcodes) == self._vy(i, opcodes))[m])
+
+        # 5XY2 and 5XY3: Save and load VX..VY in either order at I
+        for code in (2, 3):
+            m = sub == code
+            if not m.any():
+                continue
+            r = i[m]
+            step = np.where(x[m] <= y[m], 1, -1)
+            count = np.abs(y[m] - x[m])
+            for j in range(16):
+                c = count >= j
+                v = (x[m] + (j * step))[c]
+                addr = (self._I[r[c]] + j) & 0xFFFF
+                if code == 2:
+                    self._memory[r[c], addr] = self._V[r[c], v]
+                else:
+                    self._V[r[c], v] = self._memory[r[c], addr]
+            self._advance(r)
+
+    def _execute_6XNN(self, i, opcodes):
+        self._V[i, (opcodes >> 8) & 0xF] = opcodes & 0xFF
+        self._advance(i)
+
+    def _execute_7XNN(self, i, opcodes):
+        self._V[i, (opcodes >> 8) & 0xF] = (self._vx(i, opcodes) + (opcodes & 0xFF)) & 0xFF
+        self._advance(i)
+
+    def _execute_8(self, i, opcodes):
+        sub = opcodes & 0xF
+        x = (opcodes >> 8) & 0xF
+        vx = self._vx(i, opcodes)
+        vy = self._vy(i, opcodes)
+        shifted = vx if self._quirks.shift else vy
+
+        # Result and VF for every sub opcode. VF of -1 leaves VF alone.
+        no_flag = np.full(len(i), -1)
+        logic_flag = np.zeros(len(i)) if self._quirks.logic else no_flag
+        results = {
+            0x0: (vy, no_flag),
+            0x1: (vx | vy, logic_flag),
+            0x2: (vx & vy, logic_flag),
+            0x3: (vx ^ vy, logic_flag),
+            0x4: (vx + vy, (vx + vy) > 0xFF),
+            0x5: (vx - vy, vx >= vy),
+            0x6: (shifted >> 1, shifted & 1),
+            0x7: (vy - vx, vy >= vx),
+            0xE: (shifted << 1, shifted >> 7),
+        }
+
+        handled = np.zeros(len(i), dtype=bool)
+        for code, (result, flag) in results.items():
+            m = sub == code
+            if not m.any():
+                continue
+            r = i[m]
+            self._V[r, x[m]] = result[m] & 0xFF
+            f = np.asarray(flag, dtype=np.int64)[m]
+            self._V[r[f >= 0], 0xF] = f[f >= 0]
+            handled |= m
+
+        self._advance(i[handled])
+        self._halt(i[~handled])
+
+    def _execute_9XY0(self, i, opcodes):
+        self._skip(i, self._vx(i, opcodes) != self._vy(i, opcodes))
+
+    def _execute_ANNN(self, i, opcodes):
+        self._I[i] = opcodes & 0xFFF
+        self._advance(i)
+
+    def _execute_BNNN(self, i, opcodes):
+        x = (opcodes >> 8) & 0xF if self._quirks.jump else 0
+        self._set_PC(i, (opcodes & 0xFFF) + self._V[i, x])
+
+    def _execute_CXNN(self, i, opcodes):
+        # Same xorshift as Registers.random_byte. uint32 drops the high bits.
+        x = self._random[i]
+        x ^= x << 13
+        x ^= x >> 17
+        x ^= x << 5
+        self._random[i] = x
+        self._V[i, (opcodes >> 8) & 0xF] = (x >> 24) & opcodes & 0xFF
+        self._advance(i)
+
+    def _read_sprites(self, i, addr, n, hires):
+        '''
+        Sprites for each instance as a 32x32 block of pixels already scaled
+        for the resolution.
+        '''
+        k = len(i)
+        data = self._memory[i[:, None], (addr[:, None] + _RANGE32) & 0xFFFF]
+
+        # 8xN sprites become 16 wide rows with an empty right half so they
+        # can be handled the same as 16x16 sprites.
+        narrow = np.zeros((k, 16, 2), dtype=np.uint8)
+        narrow[:, :, 0] = data[:, :16] * (_RANGE16 < n[:, None])
+        rows = np.where((n == 0)[:, None, None], data.reshape((k, 16, 2)), narrow)
+        bits = np.unpackbits(rows, axis=2)
+
+        sprites = bits.repeat(2, axis=1).repeat(2, axis=2)
+        if hires.any():
+            sprites[hires] = 0
+            sprites[hires, :16, :16] = bits[hires]
+        return sprites
+
+    def _execute_DXYN(self, i, opcodes):
+        n = opcodes & 0xF
+        hires = self._hires[i]
+        scale = np.where(hires, 1, 2)
+        x = (self._vx(i, opcodes) * scale) % SCREEN_WIDTH
+        y = (self._vy(i, opcodes) * scale) % SCREEN_HEIGHT
+        self._V[i, 0xF] = 0
+
+        # 16x16 sprites always wrap.
+        wrap = (n == 0) | self._quirks.wrap
+        rows = y[:, None] + _RANGE32
+        cols = x[:, None] + _RANGE32
+        visible = ((rows < SCREEN_HEIGHT)[:, :, None] & (cols < SCREEN_WIDTH)[:, None, :]) | wrap[:, None, None]
+        rows = rows % SCREEN_HEIGHT
+        cols = cols % SCREEN_WIDTH
+
+        size = np.where(n == 0, 32, n)
+        target = self._target[i]
+        planes = self._planes.reshape(-1)
+        collision = np.zeros(len(i), dtype=bool)
+        for p in range(2):
+            on = (target & (1 << p)) != 0
+            if not on.any():
+                continue
+
+            # The second plane's sprite follows the first when drawing to both.
+            addr = self._I[i] + np.where((p == 1) & (target == 3), size, 0)
+            sprites = self._read_sprites(i[on], addr[on], n[on], hires[on]) * visible[on]
+
+            # Only the pixels the sprite sets can change. Each instance's
+            # window is unique positions on its own plane so they can be
+            # flipped with a single flat gather and scatter.
+            base = ((i[on] * 2) + p) * SCREEN_PIXEL_COUNT
+            (owners, sr, sc) = np.nonzero(sprites)
+            pixels = base[owners] + (rows[on][owners, sr] * SCREEN_WIDTH) + cols[on][owners, sc]
+            current = planes[pixels]
+            collision[on] |= np.bincount(owners, weights=current, minlength=len(base)) > 0
+            planes[pixels] = current ^ 1
+
+        self._V[i[collision], 0xF] = 1
+        self._advance(i)
+        return i
+
+    def _execute_E(self, i, opcodes):
+        sub = opcodes & 0xFF
+        key = self._vx(i, opcodes)
+
+        # Keys past F raise in the emulator.
+        bad = ((sub != 0x9E) & (sub != 0xA1)) | (key > 0xF)
+        self._halt(i[bad])
+        i = i[~bad]
+        sub = sub[~bad]
+        down = self._keys[i, key[~bad]]
+
+        self._skip(i, np.where(sub == 0x9E, down, ~down))
+
+    def _execute_F(self, i, opcodes):
+        sub = opcodes & 0xFF
+        x = (opcodes >> 8) & 0xF
+        vx = self._vx(i, opcodes)
+        handled = np.ones(len(i), dtype=bool)
+        advance = np.ones(len(i), dtype=bool)
+
+        for code in np.unique(sub).tolist():
+            m = sub == code
+            r = i[m]
+
+            if code == 0x00:
+                # F000 NNNN: Load I with the 16 bit address after the opcode
+                self._advance(r)
+                self._I[r] = self._read_opcodes(r, self._PC[r])
+            elif code == 0x01:
+                # FN01: Select drawing planes. No planes leaves the planes unchanged.
+                planes = x[m]
+                self._target[r[planes != 0]] = planes[planes != 0]
+            elif code == 0x02:
+                # F002: Load the audio pattern from I
+                self._pattern[r] = self._memory[r[:, None], (self._I[r][:, None] + _RANGE16) & 0xFFFF]
+            elif code == 0x07:
+                self._V[r, x[m]] = self._delay[r]
+            elif code == 0x0A:
+                # FX0A: Wait for a key press. The instruction repeats until a key is down.
+                pressed = self._keys[r].any(axis=1)
+                self._V[r[pressed], x[m][pressed]] = self._keys[r[pressed]].argmax(axis=1)
+                advance[m] = pressed
+            elif code == 0x15:
+                self._delay[r] = vx[m]
+            elif code == 0x18:
+                self._sound[r] = vx[m]
+            elif code == 0x1E:
+                self._I[r] = (self._I[r] + vx[m]) & 0xFFFF
+            elif code == 0x29:
+                self._I[r] = vx[m] * 5
+            elif code == 0x30:
+                self._I[r] = self._font_large_offset + (vx[m] * 10)
+            elif code == 0x33:
+                I = self._I[r]
+                v = vx[m]
+                self._memory[r, I & 0xFFFF] = v // 100
+                self._memory[r, (I + 1) & 0xFFFF] = (v // 10) % 10
+                self._memory[r, (I + 2) & 0xFFFF] = v % 10
+            elif code == 0x3A:
+                self._pitch[r] = vx[m]
+            elif code in (0x55, 0x65):
+                count = x[m]
+                for j in range(16):
+                    c = count >= j
+                    addr = (self._I[r[c]] + j) & 0xFFFF
+                    if code == 0x55:
+                        self._memory[r[c], addr] = self._V[r[c], j]
+                    else:
+                        self._V[r[c], j] = self._memory[r[c], addr]
+
+                if not self._quirks.memoryLeaveIUnchanged:
+                    inc = count if self._quirks.memoryIncrementByX else count + 1
+                    self._I[r] = (self._I[r] + inc) & 0xFFFF
+            elif code in (0x75, 0x85):
+                # RPL user flags
+                c = _RANGE16 <= x[m][:, None]
+                if code == 0x75:
+                    self._RPL[r] = np.where(c, self._V[r], self._RPL[r])
+                else:
+                    self._V[r] = np.where(c, self._RPL[r], self._V[r])
+            else:
+                handled[m] = False
+
+        self._halt(i[~handled])
+        self._advance(i[handled & advance])
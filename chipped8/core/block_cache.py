@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+
+# Copyright 2025 John Schember <john@nachtimwald.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import os
+
+from pathlib import Path
+
+BLOCK_CACHE_VERSION = 1
+BLOCK_CACHE_SUFFIX = '.c8blocks'
+# Total size of the files in the directory before old ones are removed.
+DEFAULT_MAX_SIZE = 32 * 1024 * 1024
+
+class BlockCache:
+    '''
+    Block layouts saved to a directory so the next time a ROM runs its blocks
+    are built up front instead of being found while it runs.
+
+    Files are named by Emulator.block_cache_key which covers the ROM's SHA-1,
+    the quirks and the interpreter. Only blocks built from the ROM that it
+    hasn't written over are saved. Each block has where it starts, the memory
+    it was built from, and the PC and kind of each instruction. A block is only
+    built when loading if memory holds the same bytes, so an old or damaged
+    file can't change what runs.
+
+    When the files in the directory total more than max_size the least
+    recently used are removed.
+    '''
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        self._dir = Path(directory)
+        self._max_size = max_size
+
+    def _path(self, emulator):
+        return self._dir / f'{emulator.block_cache_key()}{BLOCK_CACHE_SUFFIX}'
+
+    def _valid(self, pc, data, instrs):
+        # The instructions have to run straight through the data. Only double
+        # wide instructions are longer than 2 bytes.
+        if len(instrs) == 0:
+            return False
+        expected = pc
+        for (instr_pc, kind) in instrs:
+            if instr_pc != expected:
+                return False
+            expected += 4 if kind == 'DOUBLE_WIDE' else 2
+        return expected <= pc + len(data)
+
+    def load(self, emulator):
+        '''
+        Build the saved blocks for the emulator's ROM. Returns the number of
+        blocks built.
+        '''
+        path = self._path(emulator)
+        try:
+            with path.open('r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data['version'] != BLOCK_CACHE_VERSION:
+                return 0
+            layout = []
+            for block in data['blocks']:
+                pc = block['pc']
+                code = bytes.fromhex(block['data'])
+                instrs = [ (instr_pc, kind) for (instr_pc, kind) in block['instrs'] ]
+                if self._valid(pc, code, instrs):
+                    layout.append((pc, code, instrs))
+        except (OSError, ValueError, KeyError, TypeError):
+            return 0
+
+        # Mark it as used so it's kept over entries that haven't been.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return emulator.preload_blocks(layout)
+
+    def save(self, emulator):
+        '''
+        Save the blocks the emulator has built from its ROM. Returns the number
+        of blocks saved.
+        '''
+        layout = emulator.block_layout()
+        if not layout:
+            return 0
+
+        data = {
+            'version': BLOCK_CACHE_VERSION,
+            'blocks': [ { 'pc': pc, 'data': code.hex(), 'instrs': instrs } for (pc, code, instrs) in layout ]
+        }
+
+        self._dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(emulator)
+        # Written to the side and renamed so a reader never sees part of it.
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        with tmp_path.open('w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+        self._evict()
+        return len(layout)
+
+    def _evict(self):
+        entries = []
+        for path in self._dir.glob(f'*{BLOCK_CACHE_SUFFIX}'):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for (_, size, _) in entries)
+        for (_, size, path) in sorted(entries, key=lambda e: e[0]):
+            if total <= self._max_size:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        for path in self._dir.glob(f'*{BLOCK_CACHE_SUFFIX}'):
+            try:
+                path.unlink()
+            except OSError:
+                pass
@@ -0,0 +1,75 @@
+# Copyright 2025 John Schember <john@nachtimwald.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+class Block:
+    '''
+    A cached block of instructions.
+
+    Blocks keep direct links to the blocks that ran after them so the next
+    block can be found without looking it up by PC. Two links are kept. That
+    covers both sides of a conditional advance, and a jump or call to a fixed
+    address only ever needs one. Blocks dropped from the cache are marked
+    invalid and links to them are not followed.
+    '''
+
+    __slots__ = ('instrs', 'length', 'valid', '_link_pc', '_link', '_alt_pc', '_alt')
+
+    def __init__(self, instrs):
+        # (pc, instruction) pairs.
+        self.instrs = instrs
+        self.length = len(instrs)
+        self.valid = True
+
+        self._link_pc = -1
+        self._link = None
+        self._alt_pc = -1
+        self._alt = None
+
+    def __len__(self):
+        return self.length
+
+    def copy(self):
+        '''
+        Unlinked copy sharing the instructions. Forked emulators each need
+        their own blocks because links depend on what each one has cached.
+        '''
+        return Block(self.instrs)
+
+    def successor(self, pc):
+        if pc == self._link_pc:
+            block = self._link
+        elif pc == self._alt_pc:
+            block = self._alt
+        else:
+            return None
+
+        if block.valid:
+            return block
+        return None
+
+    def link(self, pc, block):
+        # The first link is kept while it's valid so returns to many callers
+        # only churn the second.
+        if self._link is None or not self._link.valid:
+            self._link_pc = pc
+            self._link = block
+        else:
+            self._alt_pc = pc
+            self._alt = block
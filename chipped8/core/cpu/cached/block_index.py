@@ -0,0 +1,101 @@
+# Copyright 2025 John Schember <john@nachtimwald.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from ...memory import MEMORY_SIZE, PAGE_SHIFT
+
+def block_end(last_pc):
+    '''
+    End of the memory a block was built from. Includes the opcode after the last
+    instruction because skips and double wide instructions read it.
+    '''
+    return min(last_pc + 4, MEMORY_SIZE)
+
+class BlockIndex:
+    '''
+    Cached blocks indexed by the memory pages they cover.
+
+    Pages with blocks are watched by memory so writes to them are reported.
+    Writes only invalidate the blocks they overlap. Writes to pages without
+    any blocks are never reported.
+    '''
+
+    def __init__(self):
+        # page -> { block pc: block end }
+        self._pages = {}
+
+    def fork(self):
+        d = object.__new__(self.__class__)
+        d._pages = { page: dict(blocks) for page, blocks in self._pages.items() }
+        return d
+
+    def _page_range(self, start, end):
+        return range(start >> PAGE_SHIFT, ((end - 1) >> PAGE_SHIFT) + 1)
+
+    def add(self, pc, end, memory):
+        for page in self._page_range(pc, end):
+            blocks = self._pages.get(page)
+            if blocks is None:
+                blocks = {}
+                self._pages[page] = blocks
+            blocks[pc] = end
+        memory.watch_code(pc, end - pc)
+
+    def remove(self, start, length, memory):
+        '''
+        Remove every block that overlaps the range. Returns the PCs of the
+        removed blocks.
+        '''
+        end = start + length
+        removed = []
+
+        for page in self._page_range(start, end):
+            blocks = self._pages.get(page)
+            if not blocks:
+                continue
+            for (pc, block_end) in list(blocks.items()):
+                if pc < end and block_end > start:
+                    removed.append(pc)
+                    self._remove_block(pc, block_end, memory)
+
+        return removed
+
+    def _remove_block(self, pc, end, memory):
+        for page in self._page_range(pc, end):
+            blocks = self._pages.get(page)
+            if blocks is None:
+                continue
+            blocks.pop(pc, None)
+            if not blocks:
+                del self._pages[page]
+                memory.unwatch_code_page(page)
+
+    def clear(self, memory):
+        self._pages = {}
+        memory.clear_code_watch()
+
+    def invalidate_writes(self, memory):
+        '''
+        Remove the blocks overwritten since memory's writes were last taken.
+        Returns the PCs of the removed blocks.
+        '''
+        removed = []
+        for (start, length) in memory.take_code_writes():
+            removed.extend(self.remove(start, length, memory))
+        return removed
@@ -0,0 +1,301 @@
+# Copyright 2025 John Schember <john@nachtimwald.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from ....keys import KeyState
+from ....display import ResolutionMode
+
+def _pc(val):
+    # Same as Registers.set_PC.
+    val = val & 0xFFFF
+    if val < 512:
+        return 512
+    return val
+
+def ends_block(opcode, instr_type, ending_types):
+    '''
+    Compiled blocks run as a whole so anything that needs to stop execution
+    part way through has to be the last instruction. On top of the flow
+    control that ends every block this is drawing, which needs to be seen
+    for the vblank quirk, waiting for a key, and writing memory, which can
+    modify the block that is running.
+    '''
+    if instr_type in ending_types:
+        return True
+
+    return (opcode & 0xF000) == 0xD000 or (opcode & 0xF00F) == 0x5002 or (opcode & 0xF0FF) in (0xF00A, 0xF033, 0xF055)
+
+class _BlockSource:
+    '''
+    Generates the source for one block.
+
+    Registers are accessed directly. V is the register bytearray so writes
+    go straight to the registers. I is kept in a local and written back
+    before anything that isn't inlined can see it.
+    '''
+
+    def __init__(self, instrs, quirks, font_large_offset):
+        self._instrs = instrs
+        self._quirks = quirks
+        self._font_large_offset = font_large_offset
+
+        self._lines = []
+        self._fallbacks = {}
+        self._uses_I = False
+        self._uses_mem = False
+        self._I_dirty = False
+        self._returned = False
+
+        # The PC after the last instruction. This is where the
+        # PC is during the block for instructions that read it.
+        (pc, _, _) = instrs[-1]
+        self._end = _pc(pc + 2)
+
+    def _emit(self, line):
+        self._lines.append(f'    {line}')
+
+    def _return(self, expr):
+        self._flush_I()
+        self._emit(f'return {expr}')
+        self._returned = True
+
+    def _read_I(self):
+        self._uses_I = True
+
+    def _write_I(self, expr):
+        self._uses_I = True
+        self._emit(f'I = {expr}')
+        self._I_dirty = True
+
+    def _flush_I(self):
+        if self._I_dirty:
+            self._emit('r._I = I')
+            self._I_dirty = False
+
+    def _fallback(self, idx, func):
+        # Instructions that aren't worth inlining call the lambda.
+        name = f'f{idx}'
+        self._fallbacks[name] = func
+        self._flush_I()
+        return f'{name}(cpu)'
+
+    def _skip(self, cond):
+        self._uses_mem = True
+        self._flush_I()
+        skip = _pc(self._end + 2)
+        self._emit(f'if {cond}:')
+        self._emit(f'    if mem[{self._end}] == 0xF0 and mem[{self._end + 1}] == 0x00:')
+        self._emit(f'        return {_pc(skip + 2)}')
+        self._emit(f'    return {skip}')
+        self._return(self._end)
+
+    def _store(self, writes):
+        self._read_I()
+        self._flush_I()
+        self._emit('m = cpu._memory')
+        self._emit(f'self_modified = m.holds_code(I, {len(writes)})')
+        for (offset, expr) in writes:
+            self._emit(f'm.set_byte(I + {offset}, {expr})')
+
+    def _finish_store(self):
+        self._emit('if self_modified:')
+        self._emit('    cpu._emitter.invalidate_writes(m)')
+        self._return(self._end)
+
+    def _reg_range(self, x, y):
+        step = 1 if x <= y else -1
+        return list(range(x, y + step, step))
+
+    def _instr(self, idx, pc, opcode, func):
+        q = self._quirks
+        code = opcode & 0xF000
+        x = (opcode & 0x0F00) >> 8
+        y = (opcode & 0x00F0) >> 4
+        n = opcode & 0x000F
+        nn = opcode & 0x00FF
+        nnn = opcode & 0x0FFF
+
+        if opcode == 0x00E0:
+            self._emit('cpu._display.clear_screen()')
+        elif opcode == 0x00EE:
+            self._emit('addr = cpu._stack.pop()')
+            self._return('_pc(_pc(addr) + 2)')
+        elif opcode == 0x00FE:
+            self._emit('cpu._display.resmode = ResolutionMode.lowres')
+        elif opcode == 0x00FF:
+            self._emit('cpu._display.resmode = ResolutionMode.hires')
+        elif code == 0x1000:
+            self._return(_pc(nnn))
+        elif code == 0x2000:
+            self._emit(f'cpu._stack.push({self._end - 2})')
+            self._return(_pc(nnn))
+        elif code == 0x3000:
+            self._skip(f'V[{x}] == {nn}')
+        elif code == 0x4000:
+            self._skip(f'V[{x}] != {nn}')
+        elif code == 0x5000 and n == 0x0:
+            self._skip(f'V[{x}] == V[{y}]')
+        elif code == 0x5000 and n == 0x2:
+            self._store([ (i, f'V[{v}]') for i, v in enumerate(self._reg_range(x, y)) ])
+            self._finish_store()
+        elif code == 0x5000 and n == 0x3:
+            self._read_I()
+            self._uses_mem = True
+            for i, v in enumerate(self._reg_range(x, y)):
+                self._emit(f'V[{v}] = mem[I + {i}]')
+        elif code == 0x6000:
+            self._emit(f'V[{x}] = {nn}')
+        elif code == 0x7000:
+            self._emit(f'V[{x}] = (V[{x}] + {nn}) & 0xFF')
+        elif code == 0x8000 and n == 0x0:
+            self._emit(f'V[{x}] = V[{y}]')
+        elif code == 0x8000 and n in (0x1, 0x2, 0x3):
+            op = { 0x1: '|', 0x2: '&', 0x3: '^' }[n]
+            self._emit(f'V[{x}] = V[{x}] {op} V[{y}]')
+            if q.logic:
+                self._emit('V[15] = 0')
+        elif code == 0x8000 and n == 0x4:
+            self._emit(f'n = V[{x}] + V[{y}]')
+            self._emit(f'V[{x}] = n & 0xFF')
+            self._emit('V[15] = n >> 8')
+        elif code == 0x8000 and n in (0x5, 0x7):
+            (a, b) = (x, y) if n == 0x5 else (y, x)
+            self._emit(f'a = V[{a}]')
+            self._emit(f'b = V[{b}]')
+            self._emit(f'V[{x}] = (a - b) & 0xFF')
+            self._emit('V[15] = 1 if a >= b else 0')
+        elif code == 0x8000 and n == 0x6:
+            self._emit(f'n = V[{x if q.shift else y}]')
+            self._emit(f'V[{x}] = n >> 1')
+            self._emit('V[15] = n & 0x1')
+        elif code == 0x8000 and n == 0xE:
+            self._emit(f'n = V[{x if q.shift else y}]')
+            self._emit(f'V[{x}] = (n << 1) & 0xFF')
+            self._emit('V[15] = n >> 7')
+        elif code == 0x9000:
+            self._skip(f'V[{x}] != V[{y}]')
+        elif code == 0xA000:
+            self._write_I(f'{nnn}')
+        elif code == 0xB000:
+            self._return(f'_pc({nnn} + V[{x if q.jump else 0}])')
+        elif code == 0xC000:
+            self._emit(f'V[{x}] = r.random_byte() & {nn}')
+        elif code == 0xD000:
+            self._read_I()
+            self._flush_I()
+            self._emit(f'cpu._display.draw(V[{x}], V[{y}], {n}, {q.wrap}, r, cpu._memory)')
+            self._emit('cpu._draw_occurred = True')
+            self._return(self._end)
+        elif opcode & 0xF0FF == 0xE09E:
+            self._skip(f'cpu._keys.get_key_state(V[{x}]) == KeyState.down')
+        elif opcode & 0xF0FF == 0xE0A1:
+            self._skip(f'cpu._keys.get_key_state(V[{x}]) == KeyState.up')
+        elif opcode & 0xF0FF == 0xF000:
+            self._uses_mem = True
+            self._write_I(f'(mem[{self._end}] << 8) | mem[{self._end + 1}]')
+            self._return(_pc(self._end + 2))
+        elif opcode & 0xF0FF == 0xF007:
+            self._emit(f'V[{x}] = cpu._timers.delay')
+        elif opcode & 0xF0FF == 0xF00A:
+            self._flush_I()
+            self._emit('for i, ks in enumerate(cpu._keys.get_keys()):')
+            self._emit('    if ks == KeyState.down:')
+            self._emit(f'        V[{x}] = i')
+            self._emit(f'        return {self._end}')
+            # Not advancing runs this instruction again.
+            self._return(pc)
+        elif opcode & 0xF0FF == 0xF015:
+            self._emit(f'cpu._timers.delay = V[{x}]')
+        elif opcode & 0xF0FF == 0xF018:
+            self._emit(f'cpu._timers.sound = V[{x}]')
+        elif opcode & 0xF0FF == 0xF01E:
+            self._read_I()
+            self._write_I(f'(I + V[{x}]) & 0xFFFF')
+        elif opcode & 0xF0FF == 0xF029:
+            self._write_I(f'V[{x}] * 5')
+        elif opcode & 0xF0FF == 0xF030:
+            self._write_I(f'{self._font_large_offset} + V[{x}] * 10')
+        elif opcode & 0xF0FF == 0xF033:
+            self._store([ (0, f'V[{x}] // 100'), (1, f'(V[{x}] // 10) % 10'), (2, f'V[{x}] % 10') ])
+            self._finish_store()
+        elif opcode & 0xF0FF == 0xF055:
+            self._store([ (i, f'V[{i}]') for i in range(x + 1) ])
+            self._step_I(x)
+            self._finish_store()
+        elif opcode & 0xF0FF == 0xF065:
+            self._read_I()
+            self._uses_mem = True
+            for i in range(x + 1):
+                self._emit(f'V[{i}] = mem[I + {i}]')
+            self._step_I(x)
+        elif opcode & 0xF0FF == 0xF075:
+            for i in range(x + 1):
+                self._emit(f'r._RPL[{i}] = V[{i}]')
+        elif opcode & 0xF0FF == 0xF085:
+            for i in range(x + 1):
+                self._emit(f'V[{i}] = r._RPL[{i}]')
+        else:
+            # Scrolling, planes, audio and exit.
+            self._emit(self._fallback(idx, func))
+
+    def _step_I(self, x):
+        q = self._quirks
+        if q.memoryLeaveIUnchanged:
+            return
+        step = x if q.memoryIncrementByX else x + 1
+        self._write_I(f'(I + {step}) & 0xFFFF')
+
+    def build(self):
+        for idx, (pc, opcode, func) in enumerate(self._instrs):
+            if idx == len(self._instrs) - 1:
+                # Instructions that read the PC expect it to be after the block.
+                self._flush_I()
+                self._emit(f'r._PC = {self._end}')
+            self._instr(idx, pc, opcode, func)
+
+        # Blocks that don't end with flow control fall through.
+        if not self._returned:
+            self._return(self._end)
+
+        prologue = [ '    r = cpu._registers', '    V = r._V' ]
+        if self._uses_I:
+            prologue.append('    I = r._I')
+        if self._uses_mem:
+            prologue.append('    mem = cpu._memory._memory')
+
+        return '\n'.join([ 'def block(cpu):' ] + prologue + self._lines) + '\n'
+
+def compile_block(instrs, quirks, font_large_offset):
+    '''
+    Compile a block of instructions into a single function.
+
+    instrs is a list of (pc, opcode, func) where func is the instruction from
+    the lambda factory. The generated function takes the CPU, runs every
+    instruction in the block and returns the PC to continue from.
+
+    Quirks are read now and built into the code.
+    '''
+    gen = _BlockSource(instrs, quirks, font_large_offset)
+    source = gen.build()
+
+    (pc, _, _) = instrs[0]
+    namespace = { '_pc': _pc, 'KeyState': KeyState, 'ResolutionMode': ResolutionMode }
+    namespace.update(gen._fallbacks)
+    exec(compile(source, f'<block {pc:04X}>', 'exec'), namespace)
+    return namespace['block']
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+
+# Copyright 2025 John Schember <john@nachtimwald.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from collections import deque
+
+from ...icpu import iCPU, StopReason
+from ....exceptions import NoInstructionsException
+
+from .emitter import CompiledEmitter
+from ..shared import get_shared_blocks
+
+class CachedCompiledCPU(iCPU):
+    '''
+    A caching interpreter that compiles blocks of instructions into Python
+    functions.
+
+    Blocks are built the same way as the Build-Then-Execute lambda interpreter
+    and start out running one lambda per instruction. Once a block has run a
+    few times the whole block is generated as Python source and compiled with
+    compile(). Registers are read and written directly instead of through the
+    Registers methods, quirks are decided when the block is compiled, and
+    instructions that aren't worth inlining call their lambda. The compiled
+    function returns the PC to continue from.
+
+    A compiled block always runs to completion. Anything that needs to stop
+    execution, such as drawing with the vblank quirk, or writing memory which
+    could modify the block, ends the block. When fewer instructions are left
+    to run than are in the block, or when single stepping, the block's lambdas
+    are run one at a time instead.
+
+    Blocks link to the blocks that followed them so moving from one compiled block
+    to the next doesn't need a lookup by PC.
+
+    Writing to memory a block was built from drops the block like the other cached
+    interpreters. Compiled code is kept by the opcodes in the block so rebuilt
+    blocks don't need to be compiled again.
+    '''
+
+    def __init__(self, registers, stack, memory, timers, keys, display, quirks, audio):
+        self._registers = registers
+        self._stack = stack
+        self._memory = memory
+        self._timers = timers
+        self._keys = keys
+        self._display = display
+        self._quirks = quirks
+        self._audio = audio
+
+        self._draw_occurred = False
+
+        self._instruction_queue = deque()
+        self._emitter = CompiledEmitter()
+        # Last block loaded. The next block is linked to it.
+        self._block = None
+
+    def copy_state(self, d):
+        self._instruction_queue = deque(d._instruction_queue)
+        self._emitter = d._emitter.fork()
+        self._block = None
+
+    def sync(self):
+        if len(self._instruction_queue) == 0:
+            return
+        (pc, _) = self._instruction_queue[0]
+        self._registers.set_PC(pc)
+        self._instruction_queue.clear()
+        self._block = None
+
+    def clear_cache(self):
+        self._emitter.clear_block_cache(self._memory)
+        self._instruction_queue.clear()
+        self._block = None
+
+    def share_blocks(self, rom):
+        self._emitter.share_blocks(get_shared_blocks(rom, self._quirks, 'compiled'))
+
+    def block_layout(self):
+        return self._emitter.layout(self._memory, self._quirks)
+
+    def preload_blocks(self, layout):
+        for (start, _, _) in layout:
+            self._emitter.get_block(start, self._memory, self._quirks)
+        return len(layout)
+
+    def _load_block(self, block):
+        self._block = block
+        self._instruction_queue.extend(block.instrs)
+
+        if len(self._instruction_queue) == 0:
+            raise NoInstructionsException('No instructions')
+
+        # Instructions that need to know the PC are always the last in the block.
+        (pc, _) = self._instruction_queue[-1]
+        self._registers.set_PC(pc)
+        self._registers.advance_PC()
+
+    def execute_next_op(self):
+        self._draw_occurred = False
+
+        if len(self._instruction_queue) == 0:
+            self._load_block(self._emitter.get_block(self._registers.get_PC(), self._memory, self._quirks, self._block))
+
+        (pc, func) = self._instruction_queue.popleft()
+        (advance, self_modified, is_jump) = func(self)
+
+        if not advance:
+            self._instruction_queue.appendleft((pc, func))
+        elif self_modified and self._emitter.invalidate_writes(self._memory):
+            self._instruction_queue.clear()
+            self._block = None
+
+            if not is_jump:
+                self._registers.set_PC(pc)
+                self._registers.advance_PC()
+
+    def run(self, max_ops, stop_on_draw):
+        registers = self._registers
+        memory = self._memory
+        emitter = self._emitter
+        queue = self._instruction_queue
+        self._draw_occurred = False
+
+        ops = 0
+        while ops < max_ops:
+            if len(queue) != 0:
+                # Finish the block single stepping stopped part way through.
+                instrs = list(queue)
+                queue.clear()
+            else:
+                block = emitter.get_block(registers._PC, memory, self._quirks, self._block)
+                self._block = block
+                if block.length == 0:
+                    raise NoInstructionsException('No instructions')
+
+                func = None
+                if block.length <= max_ops - ops:
+                    func = block.func or emitter.compile(block, self._quirks, memory)
+                if func:
+                    registers._PC = func(self)
+                    ops += block.length
+                    if stop_on_draw and self._draw_occurred:
+                        return (ops, StopReason.draw)
+                    continue
+
+                # Not compiled yet or only part of the block fits in the ops
+                # that are left. Run the lambdas.
+                instrs = block.instrs
+                (pc, _) = instrs[-1]
+                registers.set_PC(pc)
+                registers.advance_PC()
+
+            i = 0
+            n = len(instrs)
+            while i < n:
+                if ops == max_ops:
+                    queue.extend(instrs[i:])
+                    return (ops, StopReason.max_ops)
+
+                (pc, func) = instrs[i]
+                (advance, self_modified, is_jump) = func(self)
+                ops += 1
+
+                # Instructions that don't advance run again.
+                if advance:
+                    if self_modified and emitter.invalidate_writes(memory):
+                        self._block = None
+                        if not is_jump:
+                            registers.set_PC(pc)
+                            registers.advance_PC()
+                        break
+                    i += 1
+
+                if stop_on_draw and self._draw_occurred:
+                    queue.extend(instrs[i:])
+                    return (ops, StopReason.draw)
+
+        return (ops, StopReason.max_ops)
+
+    def draw_occurred(self):
+        return self._draw_occurred
+
+    def cache_stats(self):
+        return { 'blocks_built': self._emitter.blocks_built, 'blocks_invalidated': self._emitter.blocks_invalidated, 'cache_clears': self._emitter.cache_clears }
@@ -0,0 +1,208 @@
+# Copyright 2025 John Schember <john@nachtimwald.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from ....exceptions import UnknownOpCodeException
+from ..instr_kind import InstrKind, kind_name
+from ..block import Block
+from ..block_index import BlockIndex, block_end
+from ..lamb.factory import get_op_instr
+from .compiler import compile_block, ends_block
+
+# Flow control ends every block.
+_ENDING_TYPES = (InstrKind.JUMP, InstrKind.COND_ADVANCE, InstrKind.EXIT, InstrKind.DOUBLE_WIDE)
+
+# A block has to run this many times before it's compiled. Compiling is
+# expensive and code that only runs once never makes it back.
+COMPILE_THRESHOLD = 2
+
+# Compiled code and run counts are kept by the block's content so blocks
+# rebuilt after the cache is cleared, which happens constantly with self
+# modifying code, pick up where they left off. Both are cleared if they
+# grow past this many blocks.
+CODE_CACHE_SIZE = 4096
+
+class CompiledBlock(Block):
+
+    __slots__ = ('opcodes', 'func')
+
+    def __init__(self, instrs, opcodes):
+        # instrs are (pc, func) for running one instruction at a time.
+        super().__init__(instrs)
+        self.opcodes = opcodes
+        self.func = None
+
+    def copy(self):
+        d = CompiledBlock(self.instrs, self.opcodes)
+        d.func = self.func
+        return d
+
+class CompiledEmitter:
+
+    def __init__(self):
+        self._instr_cache = {}
+        self._block_cache = {}
+        self._index = BlockIndex()
+        self._code_cache = {}
+        self._runs = {}
+        # Blocks shared with other emulators running the same ROM.
+        self._shared = None
+
+        self.blocks_built = 0
+        self.blocks_compiled = 0
+        self.blocks_invalidated = 0
+        self.cache_clears = 0
+
+    def fork(self):
+        '''
+        Emitter for a forked emulator. Decoded instructions and compiled code
+        only depend on the opcodes and the quirks. Forks have the same quirks
+        so they're shared. Blocks are built from
+        memory which the fork can change independently so they're copied.
+        '''
+        d = object.__new__(self.__class__)
+        d._instr_cache = self._instr_cache
+        d._block_cache = { pc: block.copy() for pc, block in self._block_cache.items() }
+        d._index = self._index.fork()
+        d._code_cache = self._code_cache
+        d._runs = self._runs
+        d._shared = self._shared
+        d.blocks_built = self.blocks_built
+        d.blocks_compiled = self.blocks_compiled
+        d.blocks_invalidated = self.blocks_invalidated
+        d.cache_clears = self.cache_clears
+        return d
+
+    def share_blocks(self, shared):
+        '''
+        Use and add to the SharedBlocks for the ROM.
+        '''
+        self._shared = shared
+
+    def _get_instruction(self, opcode, quirks):
+        instr = self._instr_cache.get(opcode)
+        if not instr:
+            instr = get_op_instr(opcode, quirks, self._shared is not None)
+            self._instr_cache[opcode] = instr
+        return instr
+
+    def _build_block(self, pc, memory, quirks):
+        instrs = []
+        opcodes = []
+
+        while 1:
+            opcode = (memory.get_byte(pc) << 8) | memory.get_byte(pc + 1)
+            try:
+                (instr_type, func) = self._get_instruction(opcode, quirks)
+            except UnknownOpCodeException:
+                # Could be data or code that hasn't been written yet. See the lambda Emitter.
+                break
+            instrs.append((pc, func))
+            opcodes.append(opcode)
+
+            if ends_block(opcode, instr_type, _ENDING_TYPES):
+                break
+            pc += 2
+
+        return CompiledBlock(instrs, tuple(opcodes))
+
+    def clear_block_cache(self, memory):
+        for block in self._block_cache.values():
+            block.valid = False
+        self._block_cache = {}
+        self._index.clear(memory)
+        self.cache_clears += 1
+
+    def invalidate_writes(self, memory):
+        '''
+        Drop the blocks that were overwritten. Returns if any were.
+        '''
+        removed = self._index.invalidate_writes(memory)
+        for pc in removed:
+            block = self._block_cache.pop(pc, None)
+            if block is not None:
+                block.valid = False
+        self.blocks_invalidated += len(removed)
+        return len(removed) != 0
+
+    def layout(self, memory, quirks):
+        '''
+        (pc, end, [(pc, kind name)]) for every cached block.
+        '''
+        layout = []
+        for (pc, block) in self._block_cache.items():
+            if block.length == 0:
+                continue
+            instrs = [ (instr_pc, kind_name(self._get_instruction(opcode, quirks)[0])) for (instr_pc, _), opcode in zip(block.instrs, block.opcodes) ]
+            layout.append((pc, block_end(instrs[-1][0]), instrs))
+        return layout
+
+    def get_block(self, pc, memory, quirks, prev=None):
+        '''
+        Block starting at pc. prev is the block that ran before it and is
+        linked to the block so the next time it runs the lookup is skipped.
+        '''
+        if prev is not None:
+            block = prev.successor(pc)
+            if block is not None:
+                return block
+
+        block = self._block_cache.get(pc)
+        if not block:
+            block = self._shared.get(pc, memory) if self._shared is not None else None
+            if block is None:
+                block = self._build_block(pc, memory, quirks)
+                self.blocks_built += 1
+                if self._shared is not None:
+                    self._shared.add(pc, block, memory)
+            self._block_cache[pc] = block
+            if block.length != 0:
+                (last_pc, _) = block.instrs[-1]
+                self._index.add(pc, block_end(last_pc), memory)
+
+        if prev is not None and block:
+            prev.link(pc, block)
+
+        return block
+
+    def compile(self, block, quirks, memory):
+        '''
+        Compiled function for the block once it's hot. None until then.
+        '''
+        (pc, _) = block.instrs[0]
+        key = (pc, block.opcodes, quirks.get_state())
+        func = self._code_cache.get(key)
+        if not func:
+            runs = self._runs.get(key, 0) + 1
+            if runs < COMPILE_THRESHOLD:
+                if len(self._runs) >= CODE_CACHE_SIZE:
+                    self._runs.clear()
+                self._runs[key] = runs
+                return None
+
+            if len(self._code_cache) >= CODE_CACHE_SIZE:
+                self._code_cache.clear()
+            self._runs.pop(key, None)
+            instrs = [ (pc, opcode, func) for (pc, func), opcode in zip(block.instrs, block.opcodes) ]
+            func = compile_block(instrs, quirks, memory.font_large_offset())
+            self._code_cache[key] = func
+            self.blocks_compiled += 1
+
+        block.func = func
+        return func
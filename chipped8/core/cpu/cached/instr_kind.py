@@ -29,3 +29,12 @@ class InstrKind:
     BLOCKING = auto()
     DRAW = auto()
     EXIT = auto()
+
+def kind_name(kind):
+    '''
+    Name of an InstrKind value for writing it out.
+    '''
+    for (name, value) in vars(InstrKind).items():
+        if value is kind:
+            return name
+    return None
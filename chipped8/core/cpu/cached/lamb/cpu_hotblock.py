@@ -21,12 +21,15 @@
 # SOFTWARE.
 
 from collections import deque
-from copy import deepcopy
 
-from ...icpu import iCPU
+from ...icpu import iCPU, StopReason
+from ....exceptions import UnknownOpCodeException
 
 from .factory import get_op_instr
-from ..instr_kind import InstrKind
+from ..instr_kind import InstrKind, kind_name
+from ..block import Block
+from ..block_index import BlockIndex, block_end
+from ..shared import get_shared_blocks
 
 def _get_opcode(pc, memory):
     return (memory.get_byte(pc) << 8) | memory.get_byte(pc + 1)
@@ -51,7 +54,11 @@ class CachedLHotBlockCPU(iCPU):
     added to the current block. Once a control instruction that changes flow is
     encountered the block is closed and a new one is started. A block can also be closed
     if a block is open and a PC is encountered for an already cached block. Blocks
-    are no chained within each other.
+    are not merged with each other but each block links to the blocks that followed
+    it so moving between cached blocks doesn't need a lookup by PC.
+
+    Writing to memory a block was recorded from drops that block. The block being
+    recorded is dropped too if it was written to.
 
     The PC is set to the last PC + 2 in the current block of opcodes that are being run.
     This simulates the entire block having been run and the PC advancing past. Operations
@@ -73,48 +80,183 @@ class CachedLHotBlockCPU(iCPU):
         self._instruction_queue = deque()
         self._instr_cache = {}
         self._block_cache = {}
+        self._index = BlockIndex()
         self._block_pc = -1
         self._block = deque()
+        # Last block loaded or recorded. The next block is linked to it.
+        self._prev_block = None
+        # Blocks shared with other emulators running the same ROM.
+        self._shared = None
+
+        self._blocks_built = 0
+        self._blocks_invalidated = 0
+        self._cache_clears = 0
 
     def copy_state(self, d):
         self._instruction_queue = deque(d._instruction_queue)
         self._instr_cache = d._instr_cache
-        self._block_cache = deepcopy(d._block_cache)
+        # Instructions are never changed once recorded so they can be shared.
+        # Links depend on what's cached so the blocks themselves are copied.
+        self._block_cache = { pc: block.copy() for pc, block in d._block_cache.items() }
+        self._index = d._index.fork()
         self._block = deque(d._block)
         self._block_pc = d._block_pc
+        self._prev_block = None
+        self._shared = d._shared
+        self._blocks_built = d._blocks_built
+        self._blocks_invalidated = d._blocks_invalidated
+        self._cache_clears = d._cache_clears
+
+    def sync(self):
+        # Blocks being recorded aren't affected because they only
+        # record when executing by PC.
+        if len(self._instruction_queue) == 0:
+            return
+        (pc, _) = self._instruction_queue[0]
+        self._registers.set_PC(pc)
+        self._instruction_queue.clear()
+
+    def clear_cache(self):
+        self._clear_blocks()
+
+    def share_blocks(self, rom):
+        self._shared = get_shared_blocks(rom, self._quirks, 'hotblock')
+
+    def block_layout(self):
+        layout = []
+        for (pc, block) in self._block_cache.items():
+            instrs = [ (instr_pc, kind_name(self._get_instr(_get_opcode(instr_pc, self._memory))[0])) for (instr_pc, _) in block.instrs ]
+            layout.append((pc, block_end(instrs[-1][0]), instrs))
+        return layout
+
+    def _preload_block(self, pc, instrs):
+        # The recorded PCs and kinds are only trusted if decoding memory
+        # gives the same thing and the block could have been recorded that
+        # way. Anything that ends a block has to be last.
+        block = []
+        expected = pc
+        for (n, (instr_pc, name)) in enumerate(instrs, 1):
+            if instr_pc != expected:
+                return None
+            (instr_type, func) = self._get_instr(_get_opcode(instr_pc, self._memory))
+            if kind_name(instr_type) != name:
+                return None
+            if n != len(instrs) and instr_type in (InstrKind.JUMP, InstrKind.COND_ADVANCE, InstrKind.EXIT, InstrKind.DOUBLE_WIDE):
+                return None
+            block.append((instr_pc, func))
+            expected += 2
+        return Block(block)
+
+    def preload_blocks(self, layout):
+        # Blocks are recorded as they run so there's nothing to build them
+        # with. The instructions are decoded at the PCs that were recorded.
+        built = 0
+        for (pc, _, instrs) in layout:
+            if pc in self._block_cache or not instrs:
+                continue
+            try:
+                block = self._preload_block(pc, instrs)
+            except UnknownOpCodeException:
+                continue
+            if block is None:
+                continue
+            self._block_cache[pc] = block
+            (last_pc, _) = block.instrs[-1]
+            self._index.add(pc, block_end(last_pc), self._memory)
+            self._blocks_built += 1
+            built += 1
+        return built
 
     def _clear_blocks(self):
+        for block in self._block_cache.values():
+            block.valid = False
         self._block_cache = {}
+        self._index.clear(self._memory)
+        self._cache_clears += 1
         self._instruction_queue.clear()
         self._block_pc = -1
         self._block = deque()
+        self._prev_block = None
 
     def _record_block(self):
         if len(self._block) != 0:
-            self._block_cache[self._block_pc] = self._block
+            block = Block(list(self._block))
+            self._block_cache[self._block_pc] = block
+            self._prev_block = block
+            (last_pc, _) = self._block[-1]
+            self._index.add(self._block_pc, block_end(last_pc), self._memory)
+            self._blocks_built += 1
+            if self._shared is not None:
+                self._shared.add(self._block_pc, block, self._memory)
         self._block_pc = -1
         self._block = deque()
 
+    def _invalidate_writes(self):
+        '''
+        Drop the blocks that were overwritten, including the one being
+        recorded. Returns if any were.
+        '''
+        invalidated = False
+
+        for (start, length) in self._memory.take_code_writes():
+            for pc in self._index.remove(start, length, self._memory):
+                block = self._block_cache.pop(pc, None)
+                if block is not None:
+                    block.valid = False
+                self._blocks_invalidated += 1
+                invalidated = True
+
+            if len(self._block) != 0:
+                (last_pc, _) = self._block[-1]
+                if self._block_pc < start + length and block_end(last_pc) > start:
+                    self._block_pc = -1
+                    self._block = deque()
+                    invalidated = True
+
+        return invalidated
+
+    def _get_block(self, pc):
+        prev = self._prev_block
+        if prev is not None:
+            block = prev.successor(pc)
+            if block is not None:
+                return block
+
+        block = self._block_cache.get(pc)
+        if block is None and self._shared is not None:
+            block = self._shared.get(pc, self._memory)
+            if block is not None:
+                self._block_cache[pc] = block
+                (last_pc, _) = block.instrs[-1]
+                self._index.add(pc, block_end(last_pc), self._memory)
+        if prev is not None and block is not None:
+            prev.link(pc, block)
+        return block
+
     def _execute_next_op_queue(self):
         (pc, func) = self._instruction_queue.popleft()
         (advance, self_modified, is_jump) = func(self)
 
         if not advance:
-            self._registers.set_PC(pc)
+            self._instruction_queue.appendleft((pc, func))
             return
-        elif self_modified:
-            self._clear_blocks()
+        elif self_modified and self._invalidate_writes():
+            self._instruction_queue.clear()
+            self._prev_block = None
             if not is_jump:
                 self._registers.set_PC(pc+2)
 
+    def _get_instr(self, opcode):
+        instr = self._instr_cache.get(opcode)
+        if instr is None:
+            instr = get_op_instr(opcode, self._quirks, self._shared is not None)
+            self._instr_cache[opcode] = instr
+        return instr
+
     def _execute_next_op_pc(self):
         pc = self._registers.get_PC()
         opcode = _get_opcode(pc, self._memory)
-        (instr_type, func) = self._instr_cache.get(opcode, (None, None))
-
-        if not func:
-            instr_type, func = get_op_instr(opcode)
-            self._instr_cache[opcode] = (instr_type, func)
+        (instr_type, func) = self._get_instr(opcode)
 
         self._registers.advance_PC()
         (advance, self_modified, is_jump) = func(self)
@@ -122,8 +264,10 @@ class CachedLHotBlockCPU(iCPU):
         if not advance:
             self._registers.set_PC(pc)
             return
-        elif self_modified:
-            self._clear_blocks()
+        elif self_modified and self._invalidate_writes():
+            # The block being recorded might have been overwritten.
+            self._block_pc = -1
+            self._block = deque()
             return
 
         # Record the PC of the start of the block is this is the start
@@ -131,6 +275,8 @@ class CachedLHotBlockCPU(iCPU):
             self._block_pc = pc
 
         self._block.append((pc, func))
+        # Writes to the block being recorded need to be seen before it's in the index.
+        self._memory.watch_code(pc, 4)
 
         # All of these end the block because some kind of flow control is happening. Or double wide which
         # is a bit weird to handle since it skips an instruction (the operand data). So it's kinda like
@@ -144,16 +290,18 @@ class CachedLHotBlockCPU(iCPU):
 
         if len(self._instruction_queue) == 0:
             pc = self._registers.get_PC()
-            block = self._block_cache.get(pc, [])
-            self._instruction_queue.extend(block)
+            block = self._get_block(pc)
 
-            if len(self._instruction_queue) != 0:
+            if block is not None:
+                self._instruction_queue.extend(block.instrs)
                 # If we've loaded a block from the queue we want
                 # to close the current block we're working on so
                 # following instruction that aren't in queue don't
                 # try to add to it.
                 self._record_block()
 
+                self._prev_block = block
+
                 (pc, _) = self._instruction_queue[-1]
                 self._registers.set_PC(pc+2)
 
@@ -163,5 +311,63 @@ class CachedLHotBlockCPU(iCPU):
 
         self._execute_next_op_pc()
 
+    def run(self, max_ops, stop_on_draw):
+        registers = self._registers
+        queue = self._instruction_queue
+        self._draw_occurred = False
+
+        ops = 0
+        while ops < max_ops:
+            if len(queue) != 0:
+                # Finish the block single stepping stopped part way through.
+                instrs = list(queue)
+                queue.clear()
+            else:
+                block = self._get_block(registers.get_PC())
+                if block is None:
+                    # Not cached yet so it's run and recorded one instruction at a time.
+                    self._execute_next_op_pc()
+                    ops += 1
+                    if stop_on_draw and self._draw_occurred:
+                        return (ops, StopReason.draw)
+                    continue
+
+                self._record_block()
+                self._prev_block = block
+                instrs = block.instrs
+                (pc, _) = instrs[-1]
+                registers.set_PC(pc+2)
+
+            # Run the block straight from the list. Only what's left of it when
+            # stopping goes back in the queue.
+            i = 0
+            n = len(instrs)
+            while i < n:
+                if ops == max_ops:
+                    queue.extend(instrs[i:])
+                    return (ops, StopReason.max_ops)
+
+                (pc, func) = instrs[i]
+                (advance, self_modified, is_jump) = func(self)
+                ops += 1
+
+                # Instructions that don't advance run again.
+                if advance:
+                    if self_modified and self._invalidate_writes():
+                        self._prev_block = None
+                        if not is_jump:
+                            registers.set_PC(pc+2)
+                        break
+                    i += 1
+
+                if stop_on_draw and self._draw_occurred:
+                    queue.extend(instrs[i:])
+                    return (ops, StopReason.draw)
+
+        return (ops, StopReason.max_ops)
+
     def draw_occurred(self):
         return self._draw_occurred
+
+    def cache_stats(self):
+        return { 'blocks_built': self._blocks_built, 'blocks_invalidated': self._blocks_invalidated, 'cache_clears': self._cache_clears }
@@ -23,9 +23,11 @@
 from collections import deque
 from copy import deepcopy
 
-from ...icpu import iCPU
+from ...icpu import iCPU, StopReason
+from ....exceptions import NoInstructionsException
 
 from .emitter import Emitter
+from ..shared import get_shared_blocks
 
 class CachedLPreBlockCPU(iCPU):
     '''
@@ -44,6 +46,8 @@ class CachedLPreBlockCPU(iCPU):
     JUMP, or a conditional advance.
 
     Blocks are build before any instruction is run and only completed blocks will be run.
+    Each block links to the blocks that followed it so moving between blocks doesn't
+    need a lookup by PC.
 
     The PC is set to the last PC + 2 in the current block of opcodes that are being run.
     This simulates the entire block having been run and the PC advancing past. Operations
@@ -64,17 +68,48 @@ class CachedLPreBlockCPU(iCPU):
 
         self._instruction_queue = deque()
         self._emitter = Emitter()
+        # Last block loaded. The next block is linked to it.
+        self._block = None
 
     def copy_state(self, d):
         self._instruction_queue = deque(d._instruction_queue)
-        self._emitter = d._emitter
+        self._emitter = d._emitter.fork()
+        self._block = None
+
+    def sync(self):
+        if len(self._instruction_queue) == 0:
+            return
+        (pc, _) = self._instruction_queue[0]
+        self._registers.set_PC(pc)
+        self._instruction_queue.clear()
+        self._block = None
+
+    def clear_cache(self):
+        self._emitter.clear_block_cache(self._memory)
+        self._instruction_queue.clear()
+        self._block = None
+
+    def share_blocks(self, rom):
+        self._emitter.share_blocks(get_shared_blocks(rom, self._quirks, 'lamb'))
+
+    def block_layout(self):
+        return self._emitter.layout(self._memory, self._quirks)
+
+    def preload_blocks(self, layout):
+        pc = self._registers.get_PC()
+        for (start, _, _) in layout:
+            self._registers.set_PC(start)
+            self._emitter.get_block(self._registers, self._memory, self._quirks)
+        self._registers.set_PC(pc)
+        return len(layout)
 
     def execute_next_op(self):
         set_PC = False
         self._draw_occurred = False
 
         if len(self._instruction_queue) == 0:
-            self._instruction_queue.extend(self._emitter.get_block(self._registers, self._memory))
+            self._block = self._emitter.get_block(self._registers, self._memory, self._quirks, self._block)
+            self._instruction_queue.extend(self._block.instrs)
             set_PC = True
 
         if len(self._instruction_queue) == 0:
@@ -91,14 +126,14 @@ class CachedLPreBlockCPU(iCPU):
         (advance, self_modified, is_jump) = func(self)
 
         # Instructions can block advancing and run again. They can also indicate they self modified
-        # This could be from jumping out of the ROM space or writing into the ROM space.
+        # by writing to memory that cached blocks were built from.
         if not advance:
             self._instruction_queue.appendleft((pc, func))
-        elif self_modified:
-            # Clear the block cache because we don't know the state of the blocks since
-            # the program is no longer static in the ROM.
-            self._emitter.clear_block_cache()
+        elif self_modified and self._emitter.invalidate_writes(self._memory):
+            # Only the overwritten blocks are dropped. The running block might have been
+            # one of them so the rest of it is rebuilt from memory.
             self._instruction_queue.clear()
+            self._block = None
 
             if not is_jump:
                 # If we're not jumping to another address we need to update the
@@ -106,5 +141,60 @@ class CachedLPreBlockCPU(iCPU):
                 self._registers.set_PC(pc)
                 self._registers.advance_PC()
 
+    def run(self, max_ops, stop_on_draw):
+        registers = self._registers
+        memory = self._memory
+        emitter = self._emitter
+        queue = self._instruction_queue
+        self._draw_occurred = False
+
+        ops = 0
+        while ops < max_ops:
+            if len(queue) != 0:
+                # Finish the block single stepping stopped part way through.
+                instrs = list(queue)
+                queue.clear()
+            else:
+                self._block = emitter.get_block(registers, memory, self._quirks, self._block)
+                instrs = self._block.instrs
+                if len(instrs) == 0:
+                    raise NoInstructionsException('No instructions')
+
+                (pc, _) = instrs[-1]
+                registers.set_PC(pc)
+                registers.advance_PC()
+
+            # Run the block straight from the list. Only what's left of it when
+            # stopping goes back in the queue.
+            i = 0
+            n = len(instrs)
+            while i < n:
+                if ops == max_ops:
+                    queue.extend(instrs[i:])
+                    return (ops, StopReason.max_ops)
+
+                (pc, func) = instrs[i]
+                (advance, self_modified, is_jump) = func(self)
+                ops += 1
+
+                # Instructions that don't advance run again.
+                if advance:
+                    if self_modified and emitter.invalidate_writes(memory):
+                        self._block = None
+                        if not is_jump:
+                            registers.set_PC(pc)
+                            registers.advance_PC()
+                        break
+                    i += 1
+
+                if stop_on_draw and self._draw_occurred:
+                    queue.extend(instrs[i:])
+                    return (ops, StopReason.draw)
+
+        return (ops, StopReason.max_ops)
+
     def draw_occurred(self):
         return self._draw_occurred
+
+    def cache_stats(self):
+        return { 'blocks_built': self._emitter.blocks_built, 'blocks_invalidated': self._emitter.blocks_invalidated, 'cache_clears': self._emitter.cache_clears }
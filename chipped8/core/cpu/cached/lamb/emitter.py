@@ -19,7 +19,9 @@
 # SOFTWARE.
 
 from ....exceptions import UnknownOpCodeException
-from ..instr_kind import InstrKind
+from ..instr_kind import InstrKind, kind_name
+from ..block import Block
+from ..block_index import BlockIndex, block_end
 from .factory import get_op_instr
 
 class Emitter:
@@ -27,6 +29,36 @@ class Emitter:
     def __init__(self):
         self._instr_cache = {}
         self._block_cache = {}
+        self._index = BlockIndex()
+        # Blocks shared with other emulators running the same ROM.
+        self._shared = None
+
+        self.blocks_built = 0
+        self.blocks_invalidated = 0
+        self.cache_clears = 0
+
+    def fork(self):
+        '''
+        Emitter for a forked emulator. Decoded instructions only depend on the
+        opcode and the quirks. Forks have the same quirks so the cache is
+        shared. Blocks are built from memory which the
+        fork can change independently so they're copied.
+        '''
+        d = object.__new__(self.__class__)
+        d._instr_cache = self._instr_cache
+        d._block_cache = { pc: block.copy() for pc, block in self._block_cache.items() }
+        d._index = self._index.fork()
+        d._shared = self._shared
+        d.blocks_built = self.blocks_built
+        d.blocks_invalidated = self.blocks_invalidated
+        d.cache_clears = self.cache_clears
+        return d
+
+    def share_blocks(self, shared):
+        '''
+        Use and add to the SharedBlocks for the ROM.
+        '''
+        self._shared = shared
 
     def _get_opcode(self, pc, memory):
         return (memory.get_byte(pc) << 8) | memory.get_byte(pc + 1)
@@ -34,20 +66,20 @@ class Emitter:
     def _get_next_opcode(self, pc, memory):
         return (memory.get_byte(pc + 2) << 8) | memory.get_byte(pc + 3)
 
-    def _get_instruction(self, opcode):
+    def _get_instruction(self, opcode, quirks):
         (instr_type, func) = self._instr_cache.get(opcode, (InstrKind.EXIT, None))
 
         if not func:
-            (instr_type, func) = get_op_instr(opcode)
+            (instr_type, func) = get_op_instr(opcode, quirks, self._shared is not None)
             self._instr_cache[opcode] = (instr_type, func)
 
         return (instr_type, func)
 
-    def _get_next_instruction(self, registers, memory):
+    def _get_next_instruction(self, registers, memory, quirks):
         pc = registers.get_PC()
         opcode = self._get_opcode(pc, memory)
 
-        (instr_type, func) = self._get_instruction(opcode)
+        (instr_type, func) = self._get_instruction(opcode, quirks)
 
         # Advance our position to the next instruction.
         registers.advance_PC()
@@ -59,12 +91,12 @@ class Emitter:
 
         return (pc, instr_type, func)
 
-    def _build_block(self, registers, memory):
+    def _build_block(self, registers, memory, quirks):
         block = []
 
         while 1:
             try:
-                (pc, instr_type, func) = self._get_next_instruction(registers, memory)
+                (pc, instr_type, func) = self._get_next_instruction(registers, memory, quirks)
             except UnknownOpCodeException:
                 # If we're not pulling from the instruction cache we could hit an invalid
                 # opcode because of
@@ -82,17 +114,65 @@ class Emitter:
             if instr_type in (InstrKind.JUMP, InstrKind.COND_ADVANCE, InstrKind.EXIT, InstrKind.DOUBLE_WIDE):
                 break;
 
-        return block
+        return Block(block)
 
-    def clear_block_cache(self):
+    def clear_block_cache(self, memory):
+        for block in self._block_cache.values():
+            block.valid = False
         self._block_cache = {}
-
-    def get_block(self, registers, memory):
+        self._index.clear(memory)
+        self.cache_clears += 1
+
+    def invalidate_writes(self, memory):
+        '''
+        Drop the blocks that were overwritten. Returns if any were.
+        '''
+        removed = self._index.invalidate_writes(memory)
+        for pc in removed:
+            block = self._block_cache.pop(pc, None)
+            if block is not None:
+                block.valid = False
+        self.blocks_invalidated += len(removed)
+        return len(removed) != 0
+
+    def layout(self, memory, quirks):
+        '''
+        (pc, end, [(pc, kind name)]) for every cached block.
+        '''
+        layout = []
+        for (pc, block) in self._block_cache.items():
+            if block.length == 0:
+                continue
+            instrs = [ (instr_pc, kind_name(self._get_instruction(self._get_opcode(instr_pc, memory), quirks)[0])) for (instr_pc, _) in block.instrs ]
+            layout.append((pc, block_end(instrs[-1][0]), instrs))
+        return layout
+
+    def get_block(self, registers, memory, quirks, prev=None):
+        '''
+        Block starting at the PC. prev is the block that ran before it and
+        is linked to the block so the next time it runs the lookup is skipped.
+        '''
         pc = registers.get_PC()
 
+        if prev is not None:
+            block = prev.successor(pc)
+            if block is not None:
+                return block
+
         block = self._block_cache.get(pc)
         if not block:
-            block = self._build_block(registers, memory)
+            block = self._shared.get(pc, memory) if self._shared is not None else None
+            if block is None:
+                block = self._build_block(registers, memory, quirks)
+                self.blocks_built += 1
+                if self._shared is not None:
+                    self._shared.add(pc, block, memory)
             self._block_cache[pc] = block
+            if block:
+                (last_pc, _) = block.instrs[-1]
+                self._index.add(pc, block_end(last_pc), memory)
+
+        if prev is not None and block:
+            prev.link(pc, block)
 
         return block
@@ -18,8 +18,6 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from random import randint
-
 from ....keys import KeyState
 from ....display import Plane, ResolutionMode
 from ....exceptions import UnknownOpCodeException, ExitInterpreterException
@@ -29,6 +27,7 @@ def _get_opcode(pc, memory):
     return (memory.get_byte(pc) << 8) | memory.get_byte(pc + 1)
 
 # Returns: (advance, self_modified, is_jump)
+# self_modified is set when memory holding cached code was written.
 
 def _execute_00CN(cpu, n):
     cpu._display.scroll_down(n)
@@ -43,16 +42,11 @@ def _execute_00E0(cpu):
     return (True, False, False)
 
 def _execute_00EE(cpu):
-    self_modified = False
-
     pc = cpu._stack.pop()
-    if pc < 0x200 or pc >= cpu._memory.ram_start()-2:
-        self_modified = True
-
     cpu._registers.set_PC(pc)
     cpu._registers.advance_PC()
 
-    return (True, self_modified, True)
+    return (True, False, True)
 
 def _execute_00FB(cpu):
     cpu._display.scroll_right()
@@ -74,22 +68,13 @@ def _execute_00FF(cpu):
     return (True, False, False)
 
 def _execute_1NNN(cpu, nnn):
-    self_modified = False
-    if nnn < 0x200 or nnn >= cpu._memory.ram_start():
-        self_modified = True
-
     cpu._registers.set_PC(nnn)
-    return (True, self_modified, True)
+    return (True, False, True)
 
 def _execute_2NNN(cpu, nnn):
     cpu._stack.push(cpu._registers.get_PC()-2)
-
-    self_modified = False
-    if nnn < 0x200 or nnn >= cpu._memory.ram_start():
-        self_modified = True
-
     cpu._registers.set_PC(nnn)
-    return (True, self_modified, True)
+    return (True, False, True)
 
 def _execute_3XNN(cpu, x, nn):
     if cpu._registers.get_V(x) == nn:
@@ -116,9 +101,7 @@ def _execute_5XY0(cpu, x, y):
     return (True, False, False)
 
 def _execute_5XY2(cpu, x, y):
-    self_modified = False
-    if cpu._registers.get_I() < cpu._memory.ram_start():
-        self_modified = True
+    self_modified = cpu._memory.holds_code(cpu._registers.get_I(), abs(y - x) + 1)
 
     step = 1 if x <= y else -1
     for i, v in enumerate(range(x, y+step, step)):
@@ -146,20 +129,29 @@ def _execute_8XY0(cpu, x, y):
 
 def _execute_8XY1(cpu, x, y):
     cpu._registers.set_V(x, cpu._registers.get_V(x) | cpu._registers.get_V(y))
-    if cpu._quirks.logic:
-        cpu._registers.set_V(0xF, 0)
+    return (True, False, False)
+
+def _execute_8XY1_logic(cpu, x, y):
+    cpu._registers.set_V(x, cpu._registers.get_V(x) | cpu._registers.get_V(y))
+    cpu._registers.set_V(0xF, 0)
     return (True, False, False)
 
 def _execute_8XY2(cpu, x, y):
     cpu._registers.set_V(x, cpu._registers.get_V(x) & cpu._registers.get_V(y))
-    if cpu._quirks.logic:
-        cpu._registers.set_V(0xF, 0)
+    return (True, False, False)
+
+def _execute_8XY2_logic(cpu, x, y):
+    cpu._registers.set_V(x, cpu._registers.get_V(x) & cpu._registers.get_V(y))
+    cpu._registers.set_V(0xF, 0)
     return (True, False, False)
 
 def _execute_8XY3(cpu, x, y):
     cpu._registers.set_V(x, cpu._registers.get_V(x) ^ cpu._registers.get_V(y))
-    if cpu._quirks.logic:
-        cpu._registers.set_V(0xF, 0)
+    return (True, False, False)
+
+def _execute_8XY3_logic(cpu, x, y):
+    cpu._registers.set_V(x, cpu._registers.get_V(x) ^ cpu._registers.get_V(y))
+    cpu._registers.set_V(0xF, 0)
     return (True, False, False)
 
 def _execute_8XY4(cpu, x, y):
@@ -177,12 +169,9 @@ def _execute_8XY5(cpu, x, y):
     cpu._registers.set_V(0xF, 1 if vx >= vy else 0)
     return (True, False, False)
 
-def _execute_8XY6(cpu, x, y):
-    if cpu._quirks.shift:
-        n = cpu._registers.get_V(x)
-    else:
-        n = cpu._registers.get_V(y)
-
+# src is VX with the shift quirk otherwise VY.
+def _execute_8XY6(cpu, x, src):
+    n = cpu._registers.get_V(src)
     cpu._registers.set_V(x, n >> 1)
     cpu._registers.set_V(0xF, n & 0x1)
     return (True, False, False)
@@ -196,12 +185,8 @@ def _execute_8XY7(cpu, x, y):
     cpu._registers.set_V(0xF, 1 if vy >= vx else 0)
     return (True, False, False)
 
-def _execute_8XYE(cpu, x, y):
-    if cpu._quirks.shift:
-        n = cpu._registers.get_V(x)
-    else:
-        n = cpu._registers.get_V(y)
-
+def _execute_8XYE(cpu, x, src):
+    n = cpu._registers.get_V(src)
     cpu._registers.set_V(x, n << 1)
     cpu._registers.set_V(0xF, n >> 7)
     return (True, False, False)
@@ -218,29 +203,20 @@ def _execute_ANNN(cpu, nnn):
     cpu._registers.set_I(nnn)
     return (True, False, False)
 
+# x is 0 unless the jump quirk is set.
 def _execute_BNNN(cpu, x, nnn):
-    self_modified = False
-
-    if cpu._quirks.jump:
-        n = nnn + cpu._registers.get_V(x)
-    else:
-        n = nnn + cpu._registers.get_V(0)
-
-    if n >= cpu._memory.ram_start():
-        self_modified = True
-
-    cpu._registers.set_PC(n)
-    return (True, self_modified, True)
+    cpu._registers.set_PC(nnn + cpu._registers.get_V(x))
+    return (True, False, True)
 
 def _execute_CXNN(cpu, x, nn):
-    cpu._registers.set_V(x, randint(0, 255) & nn)
+    cpu._registers.set_V(x, cpu._registers.random_byte() & nn)
     return (True, False, False)
 
-def _execute_DXYN(cpu, x, y, n):
+def _execute_DXYN(cpu, x, y, n, wrap):
     vx = cpu._registers.get_V(x)
     vy = cpu._registers.get_V(y)
 
-    cpu._display.draw(vx, vy, n, cpu._quirks.wrap, cpu._registers, cpu._memory)
+    cpu._display.draw(vx, vy, n, wrap, cpu._registers, cpu._memory)
     cpu._draw_occurred = True
     return (True, False, False)
 
@@ -316,9 +292,7 @@ def _execute_FX30(cpu, x):
     return (True, False, False)
 
 def _execute_FX33(cpu, x):
-    self_modified = False
-    if cpu._registers.get_I() < cpu._memory.ram_start():
-        self_modified = True
+    self_modified = cpu._memory.holds_code(cpu._registers.get_I(), 3)
 
     n = cpu._registers.get_V(x)
     cpu._memory.set_byte(cpu._registers.get_I(), n // 100)
@@ -330,30 +304,21 @@ def _execute_FX3A(cpu, x):
     cpu._audio.pitch = cpu._registers.get_V(x)
     return (True, False, False)
 
-def _execute_FX55(cpu, x):
-    self_modified = False
-    if cpu._registers.get_I() < cpu._memory.ram_start():
-        self_modified = True
+# step is how far I moves which depends on the memory quirks.
+def _execute_FX55(cpu, x, step):
+    self_modified = cpu._memory.holds_code(cpu._registers.get_I(), x + 1)
 
     for i in range(x + 1):
         cpu._memory.set_byte(cpu._registers.get_I() + i, cpu._registers.get_V(i))
 
-    if not cpu._quirks.memoryLeaveIUnchanged:
-        if cpu._quirks.memoryIncrementByX:
-            cpu._registers.set_I(cpu._registers.get_I() + x)
-        else:
-            cpu._registers.set_I(cpu._registers.get_I() + x + 1)
+    cpu._registers.set_I(cpu._registers.get_I() + step)
     return (True, self_modified, False)
 
-def _execute_FX65(cpu, x):
+def _execute_FX65(cpu, x, step):
     for i in range(x + 1):
         cpu._registers.set_V(i, cpu._memory.get_byte(cpu._registers.get_I() + i))
 
-    if not cpu._quirks.memoryLeaveIUnchanged:
-        if cpu._quirks.memoryIncrementByX:
-            cpu._registers.set_I(cpu._registers.get_I() + x)
-        else:
-            cpu._registers.set_I(cpu._registers.get_I() + x + 1)
+    cpu._registers.set_I(cpu._registers.get_I() + step)
     return (True, False, False)
 
 def _execute_FX75(cpu, x):
@@ -366,7 +331,35 @@ def _execute_FX85(cpu, x):
         cpu._registers.set_V(i, cpu._registers.get_RPL(i))
     return (True, False, False)
 
-def get_op_instr(opcode):
+def _memory_step(x, quirks):
+    if quirks.memoryLeaveIUnchanged:
+        return 0
+    if quirks.memoryIncrementByX:
+        return x
+    return x + 1
+
+# Decoded instructions only depend on the opcode and quirks so emulators that
+# share blocks share them too. Keyed by (opcode, quirks state). Threads can
+# decode the same opcode at once but only the first one is kept.
+_instr_cache = {}
+
+def get_op_instr(opcode, quirks, shared=False):
+    '''
+    (InstrKind, func) for the opcode with the quirks applied. The quirks are
+    checked once here instead of every time the instruction runs. With shared
+    the instruction is taken from, or added to, the cache every emulator
+    sharing blocks uses.
+    '''
+    if not shared:
+        return _make_op_instr(opcode, quirks)
+
+    key = (opcode, quirks.get_state())
+    instr = _instr_cache.get(key)
+    if instr is None:
+        instr = _instr_cache.setdefault(key, _make_op_instr(opcode, quirks))
+    return instr
+
+def _make_op_instr(opcode, quirks):
     code = (opcode & 0xF000)
     x = (opcode & 0x0F00) >> 8
     y = (opcode & 0x00F0) >> 4
@@ -375,9 +368,9 @@ def get_op_instr(opcode):
     nnn = opcode & 0x0FFF
 
     match code:
-        case 0x0000 if (opcode & 0x0FFF) == 0x00C0:
+        case 0x0000 if (opcode & 0x0FF0) == 0x00C0:
             return (InstrKind.OPERATION, lambda cpu, n=n: _execute_00CN(cpu, n))
-        case 0x0000 if (opcode & 0x0FFF) == 0x00D0:
+        case 0x0000 if (opcode & 0x0FF0) == 0x00D0:
             return (InstrKind.OPERATION, lambda cpu, n=n: _execute_00DN(cpu, n))
         case 0x0000 if (opcode & 0x0FFF) == 0x00E0:
             return (InstrKind.OPERATION, lambda cpu: _execute_00E0(cpu))
@@ -422,21 +415,29 @@ def get_op_instr(opcode):
         case 0x8000 if (opcode & 0x000F) == 0x0000:
             return (InstrKind.OPERATION, lambda cpu, x=x, y=y: _execute_8XY0(cpu, x, y))
         case 0x8000 if (opcode & 0x000F) == 0x0001:
+            if quirks.logic:
+                return (InstrKind.OPERATION, lambda cpu, x=x, y=y: _execute_8XY1_logic(cpu, x, y))
             return (InstrKind.OPERATION, lambda cpu, x=x, y=y: _execute_8XY1(cpu, x, y))
         case 0x8000 if (opcode & 0x000F) == 0x0002:
+            if quirks.logic:
+                return (InstrKind.OPERATION, lambda cpu, x=x, y=y: _execute_8XY2_logic(cpu, x, y))
             return (InstrKind.OPERATION, lambda cpu, x=x, y=y: _execute_8XY2(cpu, x, y))
         case 0x8000 if (opcode & 0x000F) == 0x0003:
+            if quirks.logic:
+                return (InstrKind.OPERATION, lambda cpu, x=x, y=y: _execute_8XY3_logic(cpu, x, y))
             return (InstrKind.OPERATION, lambda cpu, x=x, y=y: _execute_8XY3(cpu, x, y))
         case 0x8000 if (opcode & 0x000F) == 0x0004:
             return (InstrKind.OPERATION, lambda cpu, x=x, y=y: _execute_8XY4(cpu, x, y))
         case 0x8000 if (opcode & 0x000F) == 0x0005:
             return (InstrKind.OPERATION, lambda cpu, x=x, y=y: _execute_8XY5(cpu, x, y))
         case 0x8000 if (opcode & 0x000F) == 0x0006:
-            return (InstrKind.OPERATION, lambda cpu, x=x, y=y: _execute_8XY6(cpu, x, y))
+            src = x if quirks.shift else y
+            return (InstrKind.OPERATION, lambda cpu, x=x, src=src: _execute_8XY6(cpu, x, src))
         case 0x8000 if (opcode & 0x000F) == 0x0007:
             return (InstrKind.OPERATION, lambda cpu, x=x, y=y: _execute_8XY7(cpu, x, y))
         case 0x8000 if (opcode & 0x000F) == 0x000E:
-            return (InstrKind.OPERATION, lambda cpu, x=x, y=y: _execute_8XYE(cpu, x, y))
+            src = x if quirks.shift else y
+            return (InstrKind.OPERATION, lambda cpu, x=x, src=src: _execute_8XYE(cpu, x, src))
 
         case 0x9000:
             return (InstrKind.COND_ADVANCE, lambda cpu, x=x, y=y: _execute_9XY0(cpu, x, y))
@@ -445,13 +446,14 @@ def get_op_instr(opcode):
             return (InstrKind.OPERATION, lambda cpu, nnn=nnn: _execute_ANNN(cpu, nnn))
 
         case 0xB000:
+            x = x if quirks.jump else 0
             return (InstrKind.JUMP, lambda cpu, x=x, nnn=nnn: _execute_BNNN(cpu, x, nnn))
 
         case 0xC000:
             return (InstrKind.OPERATION, lambda cpu, x=x, nn=nn: _execute_CXNN(cpu, x, nn))
 
         case 0xD000:
-            return (InstrKind.OPERATION, lambda cpu, x=x, y=y, n=n: _execute_DXYN(cpu, x, y, n))
+            return (InstrKind.OPERATION, lambda cpu, x=x, y=y, n=n, wrap=quirks.wrap: _execute_DXYN(cpu, x, y, n, wrap))
 
         case 0xE000 if (opcode & 0x00FF) == 0x009E:
             return (InstrKind.COND_ADVANCE, lambda cpu, x=x: _execute_EX9E(cpu, x))
@@ -484,9 +486,9 @@ def get_op_instr(opcode):
         case 0xF000 if (opcode & 0x00FF) == 0x003A:
             return (InstrKind.OPERATION, lambda cpu, x=x: _execute_FX3A(cpu, x))
         case 0xF000 if (opcode & 0x00FF) == 0x0055:
-            return (InstrKind.OPERATION, lambda cpu, x=x: _execute_FX55(cpu, x))
+            return (InstrKind.OPERATION, lambda cpu, x=x, step=_memory_step(x, quirks): _execute_FX55(cpu, x, step))
         case 0xF000 if (opcode & 0x00FF) == 0x0065:
-            return (InstrKind.OPERATION, lambda cpu, x=x: _execute_FX65(cpu, x))
+            return (InstrKind.OPERATION, lambda cpu, x=x, step=_memory_step(x, quirks): _execute_FX65(cpu, x, step))
         case 0xF000 if (opcode & 0x00FF) == 0x0075:
             return (InstrKind.OPERATION, lambda cpu, x=x: _execute_FX75(cpu, x))
         case 0xF000 if (opcode & 0x00FF) == 0x0085:
@@ -23,7 +23,8 @@
 from collections import deque
 from copy import deepcopy
 
-from ...icpu import iCPU
+from ...icpu import iCPU, StopReason
+from ....exceptions import NoInstructionsException
 
 from .instrs.emitter import InstrBlockEmitter
 from ..instr_kind import InstrKind
@@ -56,6 +57,9 @@ class CachedOSplitPreBlockCPU(iCPU):
     The PC is not explicitly set and naturally tracks based on program flow and
     manipulation via jumps when loading a knew block. The non-PIC instructions make
     this possible.
+
+    Each block links to the blocks that followed it so moving between blocks doesn't
+    need a lookup by PC.
     '''
 
     def __init__(self, registers, stack, memory, timers, keys, display, quirks, audio):
@@ -72,16 +76,49 @@ class CachedOSplitPreBlockCPU(iCPU):
 
         self._instruction_queue = deque()
         self._block_emitter = InstrBlockEmitter()
+        # Last block loaded. The next block is linked to it.
+        self._block = None
 
     def copy_state(self, d):
         self._instruction_queue = deque(d._instruction_queue)
-        self._block_emitter = d._block_emitter
+        self._block_emitter = d._block_emitter.fork()
+        self._block = None
+
+    def sync(self):
+        if len(self._instruction_queue) == 0:
+            return
+        (pc, _) = self._instruction_queue[0]
+        self._registers.set_PC(pc)
+        self._instruction_queue.clear()
+        self._block = None
+
+    def clear_cache(self):
+        self._block_emitter.clear_pc_cache(self._memory)
+        self._instruction_queue.clear()
+        self._block = None
+
+    def share_blocks(self, rom):
+        # Instructions hold the result of running them so they can't be
+        # shared with emulators that might run at the same time.
+        pass
+
+    def block_layout(self):
+        return self._block_emitter.layout()
+
+    def preload_blocks(self, layout):
+        pc = self._registers.get_PC()
+        for (start, _, _) in layout:
+            self._registers.set_PC(start)
+            self._block_emitter.get_block(self._registers, self._memory, self._quirks)
+        self._registers.set_PC(pc)
+        return len(layout)
 
     def execute_next_op(self):
         self._draw_occurred = False
 
         if len(self._instruction_queue) == 0:
-            self._instruction_queue.extend(self._block_emitter.get_block(self._registers, self._memory, self._quirks))
+            self._block = self._block_emitter.get_block(self._registers, self._memory, self._quirks, self._block)
+            self._instruction_queue.extend(self._block.instrs)
 
         if len(self._instruction_queue) == 0:
             raise NoInstructionsException('No instructions')
@@ -94,17 +131,13 @@ class CachedOSplitPreBlockCPU(iCPU):
         if instr.draw_occurred:
             self._draw_occurred = True
 
-        # Check if the instruction self modified. This is either memory within the
-        # ROMs address space was modified or we have a jump outside of the ROMs
-        # address space indicating instructions were written into RAM.
-        #if not self._self_modified and instr.self_modified():
-        if instr.self_modified:
-            # Disable caching of basic blocks because they may no longer be correct
-            self._block_emitter.clear_pc_cache()
-
+        # Check if the instruction self modified. This is memory that cached
+        # instructions were built from being written.
+        if instr.self_modified and self._block_emitter.invalidate_writes(self._memory):
             # Clear the instruction queue because we can't guarantee the
             # Current basic block is still valid
             self._instruction_queue.clear()
+            self._block = None
 
             # Jump will set the PC address for us so we only need to update it
             # for other operations
@@ -114,5 +147,59 @@ class CachedOSplitPreBlockCPU(iCPU):
                 self._registers.set_PC(pc)
                 self._registers.advance_PC()
 
+    def run(self, max_ops, stop_on_draw):
+        registers = self._registers
+        memory = self._memory
+        emitter = self._block_emitter
+        queue = self._instruction_queue
+        args = (registers, self._stack, memory, self._timers, self._keys, self._display, self._audio)
+        self._draw_occurred = False
+
+        ops = 0
+        while ops < max_ops:
+            if len(queue) != 0:
+                # Finish the block single stepping stopped part way through.
+                instrs = list(queue)
+                queue.clear()
+            else:
+                self._block = emitter.get_block(registers, memory, self._quirks, self._block)
+                instrs = self._block.instrs
+                if len(instrs) == 0:
+                    raise NoInstructionsException('No instructions')
+
+            # Run the block straight from the list. Only what's left of it when
+            # stopping goes back in the queue.
+            i = 0
+            n = len(instrs)
+            while i < n:
+                if ops == max_ops:
+                    queue.extend(instrs[i:])
+                    return (ops, StopReason.max_ops)
+
+                (pc, instr) = instrs[i]
+                instr.execute(*args)
+                ops += 1
+
+                if instr.advance:
+                    i += 1
+
+                if instr.self_modified and emitter.invalidate_writes(memory):
+                    self._block = None
+                    if instr.kind is not InstrKind.JUMP:
+                        registers.set_PC(pc)
+                        registers.advance_PC()
+                    break
+
+                if instr.draw_occurred:
+                    self._draw_occurred = True
+                    if stop_on_draw:
+                        queue.extend(instrs[i:])
+                        return (ops, StopReason.draw)
+
+        return (ops, StopReason.max_ops)
+
     def draw_occurred(self):
         return self._draw_occurred
+
+    def cache_stats(self):
+        return { 'blocks_built': self._block_emitter.blocks_built, 'blocks_invalidated': self._block_emitter.blocks_invalidated, 'cache_clears': self._block_emitter.cache_clears }
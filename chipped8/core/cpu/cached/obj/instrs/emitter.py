@@ -23,7 +23,10 @@
 from .....exceptions import UnknownOpCodeException
 
 from .instr import InstrKind
+from ...instr_kind import kind_name
 from .factory import InstrFactory
+from ...block import Block
+from ...block_index import BlockIndex, block_end
 
 class InstrBlockEmitter:
 
@@ -31,12 +34,65 @@ class InstrBlockEmitter:
         self._instr_cache = {}
         self._pc_instr_cache = {}
         self._block_cache = {}
+        self._index = BlockIndex()
 
         self._instr_factory = InstrFactory()
 
-    def clear_pc_cache(self):
+        self.blocks_built = 0
+        self.blocks_invalidated = 0
+        self.cache_clears = 0
+
+    def fork(self):
+        '''
+        Emitter for a forked emulator. Position independent instructions only
+        depend on the opcode so the cache is shared. Everything built from
+        memory at a PC is copied because the fork's memory can change
+        independently.
+        '''
+        d = object.__new__(self.__class__)
+        d._instr_cache = self._instr_cache
+        d._pc_instr_cache = dict(self._pc_instr_cache)
+        d._block_cache = { pc: block.copy() for pc, block in self._block_cache.items() }
+        d._index = self._index.fork()
+        d._instr_factory = self._instr_factory
+        d.blocks_built = self.blocks_built
+        d.blocks_invalidated = self.blocks_invalidated
+        d.cache_clears = self.cache_clears
+        return d
+
+    def clear_pc_cache(self, memory):
+        for block in self._block_cache.values():
+            block.valid = False
         self._pc_instr_cache = {}
         self._block_cache = {}
+        self._index.clear(memory)
+        self.cache_clears += 1
+
+    def invalidate_writes(self, memory):
+        '''
+        Drop the blocks and instructions that were overwritten. Returns if any were.
+        '''
+        invalidated = False
+
+        for (start, length) in memory.take_code_writes():
+            for pc in self._index.remove(start, length, memory):
+                block = self._block_cache.pop(pc, None)
+                if block is not None:
+                    block.valid = False
+                    # Memory stops watching the block so later writes to
+                    # the rest of it won't drop its instructions.
+                    (last_pc, _) = block.instrs[-1]
+                    for instr_pc in range(pc, block_end(last_pc)):
+                        self._pc_instr_cache.pop(instr_pc, None)
+                self.blocks_invalidated += 1
+                invalidated = True
+
+            # Instructions cached by PC can hold the opcode after them.
+            for pc in range(max(start - 3, 0), start + length):
+                if self._pc_instr_cache.pop(pc, None):
+                    invalidated = True
+
+        return invalidated
 
     def _get_opcode(self, pc, memory):
         return (memory.get_byte(pc) << 8) | memory.get_byte(pc + 1)
@@ -93,11 +149,30 @@ class InstrBlockEmitter:
             if instr.kind in (InstrKind.JUMP, InstrKind.COND_ADVANCE, InstrKind.EXIT):
                 break;
 
-        return block
-
-    def get_block(self, registers, memory, quirks):
+        return Block(block)
+
+    def layout(self):
+        '''
+        (pc, end, [(pc, kind name)]) for every cached block.
+        '''
+        layout = []
+        for (pc, block) in self._block_cache.items():
+            instrs = [ (instr_pc, kind_name(instr.kind)) for (instr_pc, instr) in block.instrs ]
+            layout.append((pc, block_end(instrs[-1][0]), instrs))
+        return layout
+
+    def get_block(self, registers, memory, quirks, prev=None):
+        '''
+        Block starting at the PC. prev is the block that ran before it and
+        is linked to the block so the next time it runs the lookup is skipped.
+        '''
         pc = registers.get_PC()
 
+        if prev is not None:
+            block = prev.successor(pc)
+            if block is not None:
+                return block
+
         block = self._block_cache.get(pc)
         if not block:
             # Build block loops and if it's self modifying we might
@@ -111,13 +186,22 @@ class InstrBlockEmitter:
             # in order to continue emulation.
             try:
                 block = self._build_block(registers, memory, quirks)
-                self._save_block(pc, block)
+                self._save_block(pc, block, memory)
             except UnknownOpCodeException:
-                self.clear_pc_cache()
+                self.clear_pc_cache(memory)
                 registers.set_PC(pc)
-                block = [self._get_next_instruction(registers, memory, quirks)]
+                block = Block([self._get_next_instruction(registers, memory, quirks)])
+                memory.watch_code(pc, 4)
+                # Not cached so it can't be linked to either.
+                block.valid = False
+
+        if prev is not None:
+            prev.link(pc, block)
 
         return block
 
-    def _save_block(self, pc, block):
+    def _save_block(self, pc, block, memory):
         self._block_cache[pc] = block
+        (last_pc, _) = block.instrs[-1]
+        self._index.add(pc, block_end(last_pc), memory)
+        self.blocks_built += 1
@@ -141,7 +141,7 @@ class InstrFactory:
         elif subcode == 0x85:
             return InstrFX85(x)
         else:
-            raise Exception('Unknown opcode: FX{:02X}'.format(subcode))
+            raise UnknownOpCodeException('Unknown opcode: FX{:02X}'.format(subcode))
 
     def create(self, pc, opcode, next_opcode, quirks):
         code = opcode & 0xF000
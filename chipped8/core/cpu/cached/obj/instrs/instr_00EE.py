@@ -33,11 +33,6 @@ class Instr00EE(Instr):
         self.kind = InstrKind.JUMP
 
     def execute(self, registers, stack, memory, timers, keys, display, audio):
-        self.self_modified = False
-
         pc = stack.pop()
-        if pc >= memory.ram_start()-2:
-            self.self_modified = True
-
         registers.set_PC(pc)
         registers.advance_PC()
@@ -30,7 +30,7 @@ class Instr00FD(Instr):
     00FD: Exit interpreter
     '''
 
-    def __init__(self, quirks):
+    def __init__(self):
         super().__init__()
         self.kind = InstrKind.EXIT
 
@@ -35,9 +35,4 @@ class Instr1NNN(Instr):
         self.kind = InstrKind.JUMP
 
     def execute(self, registers, stack, memory, timers, keys, display, audio):
-        self.self_modified = False
-
-        if self._addr >= memory.ram_start():
-            self.self_modified = True
-
         registers.set_PC(self._addr)
@@ -34,10 +34,7 @@ class Instr5XY2(Instr):
         super().__init__()
 
     def execute(self, registers, stack, memory, timers, keys, display, audio):
-        self.self_modified = False
-
-        if registers.get_I() < memory.ram_start():
-            self.self_modified = True
+        self.self_modified = memory.holds_code(registers.get_I(), abs(self._y - self._x) + 1)
 
         step = 1 if self._x <= self._y else -1
         for i, v in enumerate(range(self._x, self._y+step, step)):
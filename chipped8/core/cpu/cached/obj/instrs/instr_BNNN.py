@@ -37,14 +37,9 @@ class InstrBNNN(Instr):
         self.kind = InstrKind.JUMP
 
     def execute(self, registers, stack, memory, timers, keys, display, audio):
-        self.self_modified = False
-
         if self._quirk_jump:
             n = self._nnn + registers.get_V(self._x)
         else:
             n = self._nnn + registers.get_V(0)
 
-        if n >= memory.ram_start():
-            self.self_modified = True
-
         registers.set_PC(n)
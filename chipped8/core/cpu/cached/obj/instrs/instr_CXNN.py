@@ -20,8 +20,6 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from random import randint
-
 from .instr import Instr
 
 class InstrCXNN(Instr):
@@ -35,4 +33,4 @@ class InstrCXNN(Instr):
         super().__init__()
 
     def execute(self, registers, stack, memory, timers, keys, display, audio):
-        registers.set_V(self._x, randint(0, 255) & self._mask)
+        registers.set_V(self._x, registers.random_byte() & self._mask)
@@ -34,9 +34,7 @@ class InstrFX33(Instr):
         super().__init__()
 
     def execute(self, registers, stack, memory, timers, keys, display, audio):
-        self.self_modified = False
-        if registers.get_I() < memory.ram_start():
-            self.self_modified = True
+        self.self_modified = memory.holds_code(registers.get_I(), 3)
 
         n = registers.get_V(self._x)
         memory.set_byte(registers.get_I(), n // 100)
@@ -35,9 +35,7 @@ class InstrFX55(Instr):
         super().__init__()
 
     def execute(self, registers, stack, memory, timers, keys, display, audio):
-        self.self_modified = False
-        if registers.get_I() < memory.ram_start():
-            self.self_modified = True
+        self.self_modified = memory.holds_code(registers.get_I(), self._x + 1)
 
         for i in range(self._x + 1):
             memory.set_byte(registers.get_I() + i, registers.get_V(i))
@@ -0,0 +1,97 @@
+# Copyright 2025 John Schember <john@nachtimwald.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from collections import OrderedDict
+from hashlib import sha1
+from threading import Lock
+
+from .block_index import block_end
+
+class SharedBlocks:
+    '''
+    Blocks built from a ROM shared by every emulator running the ROM with the
+    same quirks. A session started on a ROM another session has already run
+    uses these instead of decoding.
+
+    The memory each block was built from is kept with it and the block is only
+    used when memory holds the same bytes. Code the ROM writes over is built
+    by the emulator that wrote it like any other block.
+
+    Blocks are stored without links and every emulator gets its own copy so
+    the instructions are shared but nothing that changes while running is.
+    Safe to use from multiple threads.
+    '''
+
+    def __init__(self):
+        # pc -> (block, memory it was built from)
+        self._blocks = {}
+
+    def __len__(self):
+        return len(self._blocks)
+
+    def get(self, pc, memory):
+        '''
+        Copy of the block at pc if there is one and memory still holds what it
+        was built from.
+        '''
+        shared = self._blocks.get(pc)
+        if shared is None:
+            return None
+        (block, data) = shared
+        if not memory.matches(pc, data):
+            return None
+        return block.copy()
+
+    def add(self, pc, block, memory):
+        if block.length == 0 or pc in self._blocks:
+            return
+        (last_pc, _) = block.instrs[-1]
+        data = bytes(memory.get_range(pc, block_end(last_pc) - pc))
+        # Another thread could have added it first, either is fine.
+        self._blocks.setdefault(pc, (block.copy(), data))
+
+# ROMs whose blocks are kept for new emulators. Emulators already running a
+# ROM keep using its blocks when it's dropped.
+MAX_SHARED_ROMS = 16
+
+_shared = OrderedDict()
+_shared_lock = Lock()
+
+def get_shared_blocks(rom, quirks, kind):
+    '''
+    Blocks shared by every emulator running rom with the quirks. kind is the
+    type of blocks because each emitter builds its own.
+    '''
+    key = (sha1(rom).digest(), quirks.get_state(), kind)
+    with _shared_lock:
+        shared = _shared.get(key)
+        if shared is None:
+            shared = SharedBlocks()
+            _shared[key] = shared
+            # Least recently used are dropped.
+            while len(_shared) > MAX_SHARED_ROMS:
+                _shared.popitem(last=False)
+        else:
+            _shared.move_to_end(key)
+    return shared
+
+def clear_shared_blocks():
+    with _shared_lock:
+        _shared.clear()
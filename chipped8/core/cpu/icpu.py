@@ -21,6 +21,17 @@
 # SOFTWARE.
 
 from abc import ABC, abstractmethod
+from enum import Enum
+
+class StopReason(Enum):
+    '''
+    Why iCPU.run returned.
+    '''
+    max_ops = 'max_ops'
+    draw = 'draw'
+
+    def __str__(self):
+        return self.value
 
 class iCPU(ABC):
 
@@ -35,11 +46,81 @@ class iCPU(ABC):
         '''
         pass
 
+    @abstractmethod
+    def sync(self) -> None:
+        '''
+        Bring the registers up to date with execution so the emulator state
+        fully describes where the CPU is. Cached interpreters set the PC to the
+        end of a block while it runs. This drops the rest of the running block
+        and points the PC at the next instruction that would have run.
+        '''
+        pass
+
+    @abstractmethod
+    def clear_cache(self) -> None:
+        '''
+        Throw away any cached instructions and blocks. Needed when memory is
+        replaced outside of normal execution, such as restoring a saved state.
+        '''
+        pass
+
+    @abstractmethod
+    def share_blocks(self, rom: bytes) -> None:
+        '''
+        Share blocks built from the ROM with every other emulator in the process
+        running it with the same quirks. Interpreters that don't build blocks,
+        or whose blocks can't be shared, ignore this.
+        '''
+        pass
+
+    @abstractmethod
+    def block_layout(self) -> list:
+        '''
+        (pc, end, [(pc, kind name)]) for every cached block. end is the end of
+        the memory the block was built from. Interpreters without blocks
+        return nothing.
+        '''
+        pass
+
+    @abstractmethod
+    def preload_blocks(self, layout: list) -> int:
+        '''
+        Build the blocks from a block_layout before they run. Memory must hold
+        what the blocks were built from. Returns the number of blocks built.
+        '''
+        pass
+
     @abstractmethod
     def execute_next_op(self) -> None:
         pass
 
+    @abstractmethod
+    def run(self, max_ops: int, stop_on_draw: bool) -> tuple[int, StopReason]:
+        '''
+        Execute up to max_ops instructions in one call. Stops early after an
+        instruction that draws when stop_on_draw is set. Returns the number of
+        instructions executed and why it stopped.
+
+        Runs the same instructions as calling execute_next_op max_ops times.
+        A block that's only partly run when it stops is finished by the next
+        call to either.
+        '''
+        pass
+
     @abstractmethod
     def draw_occurred(self) -> bool:
+        '''
+        If the last instruction drew. After run, if any instruction it
+        executed drew.
+        '''
+        pass
+
+    @abstractmethod
+    def cache_stats(self) -> dict:
+        '''
+        Counters for how often cached blocks were built, how many were
+        dropped because their memory was written and how often the whole
+        cache was thrown away. Used for benchmarking.
+        '''
         pass
 
@@ -20,9 +20,7 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from random import randint
-
-from ..icpu import iCPU
+from ..icpu import iCPU, StopReason
 
 from ...keys import KeyState
 from ...display import Plane, ResolutionMode
@@ -347,7 +345,7 @@ class PureCPU(iCPU):
     def _execute_CXNN(self, opcode):
         x = (opcode & 0x0F00) >> 8
         mask = (opcode & 0xFF)
-        self._registers.set_V(x, randint(0, 255) & mask)
+        self._registers.set_V(x, self._registers.random_byte() & mask)
         self._registers.advance_PC()
 
     # DXYN: Draws a sprite at coordinate (VX, VY) that has a width of 8 pixels
@@ -597,11 +595,46 @@ class PureCPU(iCPU):
     def copy_state(self, d):
         pass
 
+    def sync(self):
+        pass
+
+    def clear_cache(self):
+        pass
+
+    def share_blocks(self, rom):
+        pass
+
+    def block_layout(self):
+        return []
+
+    def preload_blocks(self, layout):
+        return 0
+
     def execute_next_op(self):
         self._draw_occurred = False
         opcode = self._get_opcode()
         self._execute_op(opcode)
 
+    def run(self, max_ops, stop_on_draw):
+        registers = self._registers
+        get_byte = self._memory.get_byte
+        execute_op = self._execute_op
+        self._draw_occurred = False
+
+        ops = 0
+        while ops < max_ops:
+            pc = registers._PC
+            execute_op((get_byte(pc) << 8) | get_byte(pc + 1))
+            ops += 1
+
+            if stop_on_draw and self._draw_occurred:
+                return (ops, StopReason.draw)
+
+        return (ops, StopReason.max_ops)
+
     def draw_occurred(self):
         return self._draw_occurred
 
+    def cache_stats(self):
+        return { 'blocks_built': 0, 'blocks_invalidated': 0, 'cache_clears': 0 }
+
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+
+# Copyright 2025 John Schember <john@nachtimwald.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from .cpu import PureCPU
+from .table import get_table
+
+from ..icpu import StopReason
+
+class PureTableCPU(PureCPU):
+    '''
+    Pure interpreter that dispatches through a table instead of decoding.
+
+    The table has a handler for every one of the 65536 opcodes with the
+    operands and quirks already applied. Running an instruction is reading
+    the opcode and calling its handler. Tables are built once per set of
+    quirks and shared by every CPU using them.
+
+    Like the pure interpreter nothing is cached from memory so self modifying
+    code has no cost.
+    '''
+
+    def __init__(self, registers, stack, memory, timers, keys, display, quirks, audio):
+        super().__init__(registers, stack, memory, timers, keys, display, quirks, audio)
+
+        # Looked up on first use so the quirks can be set after the CPU is made.
+        self._table = None
+
+    def _get_table(self):
+        if self._table is None:
+            self._table = get_table(self._quirks)
+        return self._table
+
+    def _execute_op(self, opcode):
+        self._get_table()[opcode](self)
+
+    def clear_cache(self):
+        # Looked up again in case the quirks changed.
+        self._table = None
+
+    def execute_next_op(self):
+        self._draw_occurred = False
+        pc = self._registers._PC
+        get_byte = self._memory.get_byte
+        self._get_table()[(get_byte(pc) << 8) | get_byte(pc + 1)](self)
+
+    def run(self, max_ops, stop_on_draw):
+        registers = self._registers
+        get_byte = self._memory.get_byte
+        table = self._get_table()
+        self._draw_occurred = False
+
+        ops = 0
+        while ops < max_ops:
+            pc = registers._PC
+            table[(get_byte(pc) << 8) | get_byte(pc + 1)](self)
+            ops += 1
+
+            if stop_on_draw and self._draw_occurred:
+                return (ops, StopReason.draw)
+
+        return (ops, StopReason.max_ops)
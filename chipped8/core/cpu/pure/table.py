@@ -0,0 +1,647 @@
+# Copyright 2025 John Schember <john@nachtimwald.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from ...keys import KeyState
+from ...display import Plane, ResolutionMode
+from ...exceptions import ExitInterpreterException
+
+# Handlers for the table driven pure interpreter. Each one takes the CPU and
+# runs a single opcode. The operands and quirks are fixed when the handler is
+# made so nothing is decoded or checked when it runs.
+#
+# Registers are accessed directly. An instruction only runs when both of its
+# bytes are in memory so the PC is at most 0xFFFE. Advancing it by 2 can only
+# wrap to 0, which `or 512` turns into 512 like Registers.set_PC. Skips advance
+# again from a PC that wasn't read, which can be odd, so they use _pc.
+
+def _pc(val):
+    # Same as Registers.set_PC.
+    val = val & 0xFFFF
+    if val < 512:
+        return 512
+    return val
+
+def _skip(r, mem):
+    # Skipping over XO-Chip's four byte F000 NNNN skips both halves.
+    pc = (r._PC + 2) & 0xFFFF or 512
+    # Both bytes are read like the pure interpreter so it fails the same way at
+    # the end of memory.
+    if (mem.get_byte(pc) << 8) | mem.get_byte(pc + 1) == 0xF000:
+        pc = _pc(pc + 2)
+    r._PC = _pc(pc + 2)
+
+def _unknown(cpu):
+    # One handler for every unknown opcode so the tables don't hold one each.
+    # It's only called for the opcode at the PC.
+    r = cpu._registers
+    mem = cpu._memory
+    opcode = (mem.get_byte(r._PC) << 8) | mem.get_byte(r._PC + 1)
+    code = opcode >> 12
+    if code == 0x0:
+        name = f'00{opcode & 0xFF:02X}'
+    elif code in (0x5, 0x8):
+        name = f'{code:X}XY{opcode & 0xF:01X}'
+    elif code in (0xE, 0xF):
+        name = f'{code:X}X{opcode & 0xFF:02X}'
+    else:
+        name = f'{opcode:04X}'
+    raise Exception(f'Unknown opcode: {name}')
+
+# 00CN: Scroll down N pixels
+def _op_00CN(n):
+    def op(cpu):
+        cpu._display.scroll_down(n)
+        r = cpu._registers
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# 00DN: Scroll up N pixels
+def _op_00DN(n):
+    def op(cpu):
+        cpu._display.scroll_up(n)
+        r = cpu._registers
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# 00E0: Clears the screen
+def _op_00E0(cpu):
+    cpu._display.clear_screen()
+    r = cpu._registers
+    r._PC = (r._PC + 2) & 0xFFFF or 512
+
+# 00EE: Return from subroutine
+def _op_00EE(cpu):
+    r = cpu._registers
+    r._PC = _pc(_pc(cpu._stack.pop()) + 2)
+
+# 00FB: Scroll right by 4 pixels
+def _op_00FB(cpu):
+    cpu._display.scroll_right()
+    r = cpu._registers
+    r._PC = (r._PC + 2) & 0xFFFF or 512
+
+# 00FC: Scroll left by 4 pixels
+def _op_00FC(cpu):
+    cpu._display.scroll_left()
+    r = cpu._registers
+    r._PC = (r._PC + 2) & 0xFFFF or 512
+
+# 00FD: Exit interpreter
+def _op_00FD(cpu):
+    raise ExitInterpreterException()
+
+# 00FE: Switch to low resolution mode
+def _op_00FE(cpu):
+    cpu._display.resmode = ResolutionMode.lowres
+    r = cpu._registers
+    r._PC = (r._PC + 2) & 0xFFFF or 512
+
+# 00FF: Switch to high resolution mode
+def _op_00FF(cpu):
+    cpu._display.resmode = ResolutionMode.hires
+    r = cpu._registers
+    r._PC = (r._PC + 2) & 0xFFFF or 512
+
+# 1NNN: Jump to address NNN
+def _op_1NNN(nnn):
+    addr = _pc(nnn)
+    def op(cpu):
+        cpu._registers._PC = addr
+    return op
+
+# 2NNN: Calls subroutine at address NNN
+def _op_2NNN(nnn):
+    addr = _pc(nnn)
+    def op(cpu):
+        r = cpu._registers
+        cpu._stack.push(r._PC)
+        r._PC = addr
+    return op
+
+# 3XNN: Skips the next instruction if VX equals NN
+def _op_3XNN(x, nn):
+    def op(cpu):
+        r = cpu._registers
+        if r._V[x] == nn:
+            _skip(r, cpu._memory)
+        else:
+            r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# 4XNN: Skips the next instruction if VX does not equal NN
+def _op_4XNN(x, nn):
+    def op(cpu):
+        r = cpu._registers
+        if r._V[x] != nn:
+            _skip(r, cpu._memory)
+        else:
+            r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# 5XY0: Skips the next instruction if VX equals VY
+def _op_5XY0(x, y):
+    def op(cpu):
+        r = cpu._registers
+        if r._V[x] == r._V[y]:
+            _skip(r, cpu._memory)
+        else:
+            r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+def _reg_range(x, y):
+    step = 1 if x <= y else -1
+    return tuple(range(x, y + step, step))
+
+# 5XY2: Save VX..VY inclusive to memory starting at I. Does not increment I
+def _op_5XY2(x, y):
+    regs = _reg_range(x, y)
+    def op(cpu):
+        r = cpu._registers
+        V = r._V
+        I = r._I
+        set_byte = cpu._memory.set_byte
+        for i, v in enumerate(regs):
+            set_byte(I + i, V[v])
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# 5XY3: Load VX..VY inclusive from memory starting at I. Does not increment I
+def _op_5XY3(x, y):
+    regs = _reg_range(x, y)
+    def op(cpu):
+        r = cpu._registers
+        V = r._V
+        I = r._I
+        get_byte = cpu._memory.get_byte
+        for i, v in enumerate(regs):
+            V[v] = get_byte(I + i)
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# 6XNN: Sets VX to NN
+def _op_6XNN(x, nn):
+    def op(cpu):
+        r = cpu._registers
+        r._V[x] = nn
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# 7XNN: Adds NN to VX (carry flag is not changed)
+def _op_7XNN(x, nn):
+    def op(cpu):
+        r = cpu._registers
+        V = r._V
+        V[x] = (V[x] + nn) & 0xFF
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# 8XY0: Sets VX to the value of VY
+def _op_8XY0(x, y):
+    def op(cpu):
+        r = cpu._registers
+        V = r._V
+        V[x] = V[y]
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# 8XY1: Sets VX to VX or VY
+def _op_8XY1(x, y, logic):
+    if logic:
+        def op(cpu):
+            r = cpu._registers
+            V = r._V
+            V[x] = V[x] | V[y]
+            V[0xF] = 0
+            r._PC = (r._PC + 2) & 0xFFFF or 512
+    else:
+        def op(cpu):
+            r = cpu._registers
+            V = r._V
+            V[x] = V[x] | V[y]
+            r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# 8XY2: Sets VX to VX and VY
+def _op_8XY2(x, y, logic):
+    if logic:
+        def op(cpu):
+            r = cpu._registers
+            V = r._V
+            V[x] = V[x] & V[y]
+            V[0xF] = 0
+            r._PC = (r._PC + 2) & 0xFFFF or 512
+    else:
+        def op(cpu):
+            r = cpu._registers
+            V = r._V
+            V[x] = V[x] & V[y]
+            r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# 8XY3: Sets VX to VX xor VY
+def _op_8XY3(x, y, logic):
+    if logic:
+        def op(cpu):
+            r = cpu._registers
+            V = r._V
+            V[x] = V[x] ^ V[y]
+            V[0xF] = 0
+            r._PC = (r._PC + 2) & 0xFFFF or 512
+    else:
+        def op(cpu):
+            r = cpu._registers
+            V = r._V
+            V[x] = V[x] ^ V[y]
+            r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# 8XY4: Adds VY to VX. VF is set to 1 when there's an overflow, and to 0 when there is not
+def _op_8XY4(x, y):
+    def op(cpu):
+        r = cpu._registers
+        V = r._V
+        n = V[x] + V[y]
+        V[x] = n & 0xFF
+        V[0xF] = 1 if n > 0xFF else 0
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# 8XY5: VY is subtracted from VX. VF is set to 0 when there's an underflow, and 1 when there is not
+# 8XY7: Sets VX to VY minus VX. VF is set to 0 when there's an underflow, and 1 when there is not
+def _op_8XY5(x, a, b):
+    def op(cpu):
+        r = cpu._registers
+        V = r._V
+        va = V[a]
+        vb = V[b]
+        V[x] = (va - vb) & 0xFF
+        V[0xF] = 1 if va >= vb else 0
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# 8XY6: Store VY, or VX with the shift quirk, shifted right one bit in register
+#       VX. Set register VF to the least significant bit prior to the shift
+def _op_8XY6(x, src):
+    def op(cpu):
+        r = cpu._registers
+        V = r._V
+        n = V[src]
+        V[x] = n >> 1
+        V[0xF] = n & 0x1
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# 8XYE: Store VY, or VX with the shift quirk, shifted left one bit in register VX.
+#       Set register VF to the most significant bit prior to the shift
+def _op_8XYE(x, src):
+    def op(cpu):
+        r = cpu._registers
+        V = r._V
+        n = V[src]
+        V[x] = (n << 1) & 0xFF
+        V[0xF] = n >> 7
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# 9XY0: Skips the next instruction if VX does not equal VY
+def _op_9XY0(x, y):
+    def op(cpu):
+        r = cpu._registers
+        if r._V[x] != r._V[y]:
+            _skip(r, cpu._memory)
+        else:
+            r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# ANNN: Sets I to the address NNN
+def _op_ANNN(nnn):
+    def op(cpu):
+        r = cpu._registers
+        r._I = nnn
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# BNNN: Jumps to the address NNN plus V0, or VX with the jump quirk
+def _op_BNNN(nnn, x):
+    def op(cpu):
+        r = cpu._registers
+        r._PC = _pc(nnn + r._V[x])
+    return op
+
+# CXNN: Sets VX to the result of a bitwise and operation on a random number
+def _op_CXNN(x, nn):
+    def op(cpu):
+        r = cpu._registers
+        r._V[x] = r.random_byte() & nn
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# DXYN: Draws a sprite at coordinate (VX, VY)
+def _op_DXYN(x, y, n, wrap):
+    def op(cpu):
+        r = cpu._registers
+        V = r._V
+        cpu._display.draw(V[x], V[y], n, wrap, r, cpu._memory)
+        cpu._draw_occurred = True
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# EX9E: Skips the next instruction if the key stored in VX is pressed
+def _op_EX9E(x):
+    def op(cpu):
+        r = cpu._registers
+        if cpu._keys.get_key_state(r._V[x]) == KeyState.down:
+            _skip(r, cpu._memory)
+        else:
+            r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# EXA1: Skips the next instruction if the key stored in VX is not pressed
+def _op_EXA1(x):
+    def op(cpu):
+        r = cpu._registers
+        if cpu._keys.get_key_state(r._V[x]) == KeyState.up:
+            _skip(r, cpu._memory)
+        else:
+            r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# F000 NNNN: Load I with 16-bit address NNNN this is a four byte instruction
+def _op_F000(cpu):
+    r = cpu._registers
+    mem = cpu._memory
+    pc = (r._PC + 2) & 0xFFFF or 512
+    r._I = (mem.get_byte(pc) << 8) | mem.get_byte(pc + 1)
+    r._PC = (pc + 2) & 0xFFFF or 512
+
+# FN01: Select drawing planes by bitmask
+def _op_FX01(x):
+    plane = Plane(0)
+    if x & 1:
+        plane = plane | Plane.p1
+    if x & 2:
+        plane = plane | Plane.p2
+    def op(cpu):
+        cpu._display.plane = plane
+        r = cpu._registers
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# F002: Store 16 bytes in audio pattern buffer, starting at I
+def _op_F002(cpu):
+    r = cpu._registers
+    cpu._audio.pattern = cpu._memory.get_range(r._I, 16)
+    r._PC = (r._PC + 2) & 0xFFFF or 512
+
+# FX07: Sets VX to the value of the delay timer
+def _op_FX07(x):
+    def op(cpu):
+        r = cpu._registers
+        r._V[x] = cpu._timers.delay
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# FX0A: Wait for a keypress and store the result in register VX
+def _op_FX0A(x):
+    def op(cpu):
+        for i, ks in enumerate(cpu._keys.get_keys()):
+            if ks == KeyState.down:
+                r = cpu._registers
+                r._V[x] = i
+                r._PC = (r._PC + 2) & 0xFFFF or 512
+                break
+    return op
+
+# FX15: Sets the delay timer to VX
+def _op_FX15(x):
+    def op(cpu):
+        r = cpu._registers
+        cpu._timers.delay = r._V[x]
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# FX18: Sets the sound timer to VX
+def _op_FX18(x):
+    def op(cpu):
+        r = cpu._registers
+        cpu._timers.sound = r._V[x]
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# FX1E: Adds VX to I. VF is not affected
+def _op_FX1E(x):
+    def op(cpu):
+        r = cpu._registers
+        r._I = (r._I + r._V[x]) & 0xFFFF
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# FX29: Sets I to the location of the sprite for the character in VX
+def _op_FX29(x):
+    def op(cpu):
+        r = cpu._registers
+        r._I = r._V[x] * 5
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# FX30: Point I to 10-byte font sprite for digit VX
+def _op_FX30(x):
+    def op(cpu):
+        r = cpu._registers
+        r._I = cpu._memory.font_large_offset() + (r._V[x] * 10)
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# FX33: Stores the binary-coded decimal representation of VX at I, I+1 and I+2
+def _op_FX33(x):
+    def op(cpu):
+        r = cpu._registers
+        mem = cpu._memory
+        n = r._V[x]
+        I = r._I
+        mem.set_byte(I, n // 100)
+        mem.set_byte(I + 1, (n // 10) % 10)
+        mem.set_byte(I + 2, n % 10)
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# FX3A: Set the pitch register to the value in VX.
+def _op_FX3A(x):
+    def op(cpu):
+        r = cpu._registers
+        cpu._audio.pitch = r._V[x]
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# FX55: Stores from V0 to VX (including VX) in memory, starting at address I.
+#       I is moved past the values unless the quirks say otherwise.
+def _op_FX55(x, step):
+    def op(cpu):
+        r = cpu._registers
+        V = r._V
+        I = r._I
+        set_byte = cpu._memory.set_byte
+        for i in range(x + 1):
+            set_byte(I + i, V[i])
+        r._I = (I + step) & 0xFFFF
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# FX65: Fills from V0 to VX (including VX) with values from memory, starting
+#       at address I. I is moved past the values unless the quirks say otherwise.
+def _op_FX65(x, step):
+    def op(cpu):
+        r = cpu._registers
+        V = r._V
+        I = r._I
+        get_byte = cpu._memory.get_byte
+        for i in range(x + 1):
+            V[i] = get_byte(I + i)
+        r._I = (I + step) & 0xFFFF
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# FX75: Store V0..VX in RPL user flags
+def _op_FX75(x):
+    def op(cpu):
+        r = cpu._registers
+        r._RPL[0:x+1] = r._V[0:x+1]
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+# FX85: Read V0..VX from RPL user flags
+def _op_FX85(x):
+    def op(cpu):
+        r = cpu._registers
+        r._V[0:x+1] = r._RPL[0:x+1]
+        r._PC = (r._PC + 2) & 0xFFFF or 512
+    return op
+
+def _make_op(opcode, quirks):
+    # Decodes the same way as PureCPU._execute_op.
+    code = opcode & 0xF000
+    x = (opcode & 0x0F00) >> 8
+    y = (opcode & 0x00F0) >> 4
+    n = opcode & 0x000F
+    nn = opcode & 0x00FF
+    nnn = opcode & 0x0FFF
+
+    if code == 0x0000:
+        if nn & 0xF0 == 0xC0:
+            return _op_00CN(n)
+        if nn & 0xF0 == 0xD0:
+            return _op_00DN(n)
+        op = { 0xE0: _op_00E0, 0xEE: _op_00EE, 0xFB: _op_00FB, 0xFC: _op_00FC, 0xFD: _op_00FD, 0xFE: _op_00FE, 0xFF: _op_00FF }.get(nn)
+        return op or _unknown
+    elif code == 0x1000:
+        return _op_1NNN(nnn)
+    elif code == 0x2000:
+        return _op_2NNN(nnn)
+    elif code == 0x3000:
+        return _op_3XNN(x, nn)
+    elif code == 0x4000:
+        return _op_4XNN(x, nn)
+    elif code == 0x5000:
+        if n == 0x0:
+            return _op_5XY0(x, y)
+        elif n == 0x2:
+            return _op_5XY2(x, y)
+        elif n == 0x3:
+            return _op_5XY3(x, y)
+        return _unknown
+    elif code == 0x6000:
+        return _op_6XNN(x, nn)
+    elif code == 0x7000:
+        return _op_7XNN(x, nn)
+    elif code == 0x8000:
+        if n == 0x0:
+            return _op_8XY0(x, y)
+        elif n == 0x1:
+            return _op_8XY1(x, y, quirks.logic)
+        elif n == 0x2:
+            return _op_8XY2(x, y, quirks.logic)
+        elif n == 0x3:
+            return _op_8XY3(x, y, quirks.logic)
+        elif n == 0x4:
+            return _op_8XY4(x, y)
+        elif n == 0x5:
+            return _op_8XY5(x, x, y)
+        elif n == 0x6:
+            return _op_8XY6(x, x if quirks.shift else y)
+        elif n == 0x7:
+            return _op_8XY5(x, y, x)
+        elif n == 0xE:
+            return _op_8XYE(x, x if quirks.shift else y)
+        return _unknown
+    elif code == 0x9000:
+        return _op_9XY0(x, y)
+    elif code == 0xA000:
+        return _op_ANNN(nnn)
+    elif code == 0xB000:
+        return _op_BNNN(nnn, x if quirks.jump else 0)
+    elif code == 0xC000:
+        return _op_CXNN(x, nn)
+    elif code == 0xD000:
+        return _op_DXYN(x, y, n, quirks.wrap)
+    elif code == 0xE000:
+        if nn == 0x9E:
+            return _op_EX9E(x)
+        elif nn == 0xA1:
+            return _op_EXA1(x)
+        return _unknown
+
+    if quirks.memoryLeaveIUnchanged:
+        step = 0
+    elif quirks.memoryIncrementByX:
+        step = x
+    else:
+        step = x + 1
+
+    if nn == 0x00:
+        return _op_F000
+    elif nn == 0x01:
+        return _op_FX01(x)
+    elif nn == 0x02:
+        return _op_F002
+    elif nn == 0x55:
+        return _op_FX55(x, step)
+    elif nn == 0x65:
+        return _op_FX65(x, step)
+
+    make = { 0x07: _op_FX07, 0x0A: _op_FX0A, 0x15: _op_FX15, 0x18: _op_FX18, 0x1E: _op_FX1E, 0x29: _op_FX29,
+             0x30: _op_FX30, 0x33: _op_FX33, 0x3A: _op_FX3A, 0x75: _op_FX75, 0x85: _op_FX85 }.get(nn)
+    if make:
+        return make(x)
+    return _unknown
+
+# Tables are shared by every CPU with the same quirks.
+_tables = {}
+
+def get_table(quirks):
+    '''
+    Handler for every opcode specialized for the quirks. Index by the opcode
+    and call with the CPU.
+    '''
+    key = quirks.get_state()
+    table = _tables.get(key)
+    if table is None:
+        table = tuple(_make_op(opcode, quirks) for opcode in range(0x10000))
+        _tables[key] = table
+    return table
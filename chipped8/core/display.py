@@ -23,7 +23,7 @@
 from numpy.typing import NDArray
 import numpy as np
 
-from copy import deepcopy
+import struct
 from enum import Enum, Flag, auto
 
 from .registers import Registers
@@ -32,6 +32,21 @@ from .memory import Memory
 SCREEN_WIDTH = 128
 SCREEN_HEIGHT = 64
 SCREEN_PIXEL_COUNT = SCREEN_WIDTH * SCREEN_HEIGHT
+SCREEN_ROW_MASK = (1 << SCREEN_WIDTH) - 1
+SCREEN_ALL_ROWS = (1 << SCREEN_HEIGHT) - 1
+
+# Moving the framebuffer costs more than rebuilding it once many scrolls happen between reads.
+FRAMEBUFFER_MAX_MOVES = 4
+
+# Low res pixels are 2x2 so every sprite bit becomes two adjacent bits in a row.
+def _double_bits(b):
+    d = 0
+    for i in range(8):
+        if b & (1 << i):
+            d |= 0b11 << (i * 2)
+    return d
+
+_DOUBLE_BITS = [ _double_bits(b) for b in range(256) ]
 
 class ResolutionMode(Enum):
     lowres = auto()
@@ -52,9 +67,10 @@ class Displaly():
     In order to know if we need to write one or a 2x2 pixel square (for low res mode). Otherwise,
     all other display operations are the same.
 
-    A screen buffer is a one dimensional array of 0 or 1 denoting if the pixel is set or not.
-    The pixels in the buffer are rows next to each other instead of on top of each other.
-    In the buffer: | row | row | row | row |. Each row is a row of pixels.
+    A screen plane is a list of rows. Each row is a 128 bit int where each bit is a pixel.
+    The most significant bit is the left most pixel (column 0). Storing rows as ints lets
+    a whole sprite row be XORed onto the screen at once instead of pixel by pixel.
+    Collision is when the sprite row and screen row share any set bits.
 
     XO-Chip uses 2 screen planes (layers) that get overlaid when rendering the screen.
     This allows for 4 colors. Pixel off, plane 1 pixel on, plane 2 pixel on, and plane
@@ -64,29 +80,103 @@ class Displaly():
     two color support.
 
     Multiple planes can be selected and written to at the same time.
+
+    The combined pixel indices of both planes are kept in a persistent framebuffer.
+    Rows that are changed are marked dirty and only those rows are rebuilt when
+    the pixels are requested.
+
+    Separately, the columns changed in each row since the last screen update are
+    tracked. These are reported as rectangles so a renderer can only redraw the
+    parts of the screen that changed.
     '''
 
+    # Resolution mode, target plane and both planes with one bit per pixel
+    STATE_SIZE = 1 + 1 + (2 * SCREEN_PIXEL_COUNT // 8)
+
     def __init__(self):
         self._screen_planes = [ self._generate_empty_plane(), self._generate_empty_plane() ]
         self._update_screen = False
         self._res_mode = ResolutionMode.lowres
         self._target_plane = Plane.p1
+        self._set_framebuffer(np.zeros((SCREEN_HEIGHT, SCREEN_WIDTH), dtype=np.uint8))
+        self._framebuffer_dirty = 0
+        self._framebuffer_moves = 0
+        self._dirty_cols = [0] * SCREEN_HEIGHT
+        # Plane rows as bytes for the state. Rebuilt only for changed rows.
+        self._state_buffer = bytearray(2 * SCREEN_PIXEL_COUNT // 8)
+        self._state_dirty = 0
+        # The first blit needs to draw the whole blank screen.
+        self._mark_all_dirty()
 
     def __deepcopy__(self, memo):
         if id(self) in memo:
             return memo[id(self)]
 
         d = object.__new__(self.__class__)
-        d._screen_planes = deepcopy(self._screen_planes, memo)
+        d._screen_planes = [ self._copy_plane(p) for p in self._screen_planes ]
         d._update_screen = self._update_screen
         d._res_mode = self._res_mode
         d._target_plane = self._target_plane
+        d._set_framebuffer(self._framebuffer.copy())
+        d._framebuffer_dirty = self._framebuffer_dirty
+        d._framebuffer_moves = self._framebuffer_moves
+        d._dirty_cols = list(self._dirty_cols)
+        d._state_buffer = bytearray(self._state_buffer)
+        d._state_dirty = self._state_dirty
 
         memo[id(self)] = d
         return d
 
     def _generate_empty_plane(self):
-        return bytearray(SCREEN_PIXEL_COUNT)
+        return [0] * SCREEN_HEIGHT
+
+    def _copy_plane(self, plane_buffer):
+        # Rows are immutable ints so copying the list is a full copy.
+        return list(plane_buffer)
+
+    def _planes_to_bytes(self):
+        row_size = SCREEN_WIDTH // 8
+        plane_size = SCREEN_PIXEL_COUNT // 8
+        buffer = self._state_buffer
+        dirty = self._state_dirty
+        self._state_dirty = 0
+
+        if dirty == SCREEN_ALL_ROWS:
+            buffer[:] = b''.join(row.to_bytes(row_size, 'big') for plane_buffer in self._screen_planes for row in plane_buffer)
+            return bytes(buffer)
+
+        while dirty:
+            low = dirty & -dirty
+            dirty ^= low
+            r = low.bit_length() - 1
+            offset = r * row_size
+            buffer[offset : offset+row_size] = self._screen_planes[0][r].to_bytes(row_size, 'big')
+            offset += plane_size
+            buffer[offset : offset+row_size] = self._screen_planes[1][r].to_bytes(row_size, 'big')
+
+        return bytes(buffer)
+
+    def _plane_from_bytes(self, data):
+        # A 128 bit row is read as two 64 bit halves which is cheaper than
+        # slicing out each row.
+        return [ (high << 64) | low for high, low in struct.iter_unpack('>QQ', data) ]
+
+    def get_state(self) -> bytes:
+        mode = 1 if self._res_mode == ResolutionMode.hires else 0
+        return bytes((mode, self._target_plane.value)) + self._planes_to_bytes()
+
+    def set_state(self, data: bytes) -> None:
+        plane_size = SCREEN_PIXEL_COUNT // 8
+
+        self._res_mode = ResolutionMode.hires if data[0] == 1 else ResolutionMode.lowres
+        self._target_plane = Plane(data[1])
+        self._screen_planes = [ self._plane_from_bytes(data[2 : 2+plane_size]), self._plane_from_bytes(data[2+plane_size : 2+(plane_size*2)]) ]
+        self._mark_all_dirty()
+
+    def _set_framebuffer(self, framebuffer):
+        self._framebuffer = framebuffer
+        self._framebuffer_view = framebuffer.view()
+        self._framebuffer_view.flags.writeable = False
 
     @property
     def resmode(self) -> ResolutionMode:
@@ -119,206 +209,256 @@ class Displaly():
 
     def clear_screen(self) -> None:
         self._screen_planes = [ self._generate_empty_plane(), self._generate_empty_plane() ]
-        self._update_screen = True
+        self._mark_all_dirty()
 
-    def get_pixels(self) -> NDArray[np.uint8]:
-        '''
-        Return a 2D NumPy array of pixel indices (0–3) for fast rendering.
-        Each index maps to a color via.
-        '''
-        plane0 = np.array(self._screen_planes[0], dtype=np.uint8)
-        plane1 = np.array(self._screen_planes[1], dtype=np.uint8)
+    def _unpack_rows(self, plane_buffer, rows):
+        data = b''.join(plane_buffer[r].to_bytes(SCREEN_WIDTH // 8, 'big') for r in rows)
+        return np.unpackbits(np.frombuffer(data, dtype=np.uint8)).reshape((len(rows), SCREEN_WIDTH))
+
+    def _refresh_framebuffer(self):
+        rows = [ r for r in range(SCREEN_HEIGHT) if self._framebuffer_dirty & (1 << r) ]
+        plane0 = self._unpack_rows(self._screen_planes[0], rows)
+        plane1 = self._unpack_rows(self._screen_planes[1], rows)
 
         # Mapping:
         #   0b00 = 0 -> color_1
         #   0b01 = 1 -> color_2
         #   0b10 = 2 -> color_3
         #   0b11 = 3 -> color_4
-        keys = (plane1 << 1) | plane0
+        self._framebuffer[rows] = (plane1 << 1) | plane0
 
-        # Remap keys to match color index order: [color_1, color_2, color_3, color_4]
-        remap = np.array([0, 1, 2, 3], dtype=np.uint8)
-        pixel_indices = remap[keys].reshape((SCREEN_HEIGHT, SCREEN_WIDTH))
+    def get_pixels(self, out: NDArray[np.uint8] | None = None) -> NDArray[np.uint8]:
+        '''
+        Return a 2D NumPy array of pixel indices (0–3) for fast rendering.
+        Each index maps to a color via.
 
-        return pixel_indices
+        Without out a read only view of the framebuffer is returned. The view
+        reflects any further changes to the display so it needs to be copied if
+        it will be kept or used by another thread. If out is provided, the pixels
+        are copied into it and it is returned.
+        '''
+        if self._framebuffer_dirty:
+            self._refresh_framebuffer()
+            self._framebuffer_dirty = 0
+        self._framebuffer_moves = 0
+
+        if out is not None:
+            np.copyto(out, self._framebuffer)
+            return out
+        return self._framebuffer_view
 
     def screen_changed(self) -> bool:
         return self._update_screen
 
     def screen_updated(self) -> None:
         self._update_screen = False
+        self._dirty_cols = [0] * SCREEN_HEIGHT
 
-    def _set_pixel_lowres(self, plane_buffer, x, y, v):
-        unset = False
-        x = x * 2
-        y = y * 2
-
-        for i in range(2):
-            col = (x + i) % SCREEN_WIDTH
-
-            for j in range(2):
-                row = (y + j) % SCREEN_HEIGHT
-                idx = col + (row * SCREEN_WIDTH)
+    def _mark_all_dirty(self):
+        self._update_screen = True
+        self._framebuffer_dirty = SCREEN_ALL_ROWS
+        self._dirty_cols = [SCREEN_ROW_MASK] * SCREEN_HEIGHT
+        self._state_dirty = SCREEN_ALL_ROWS
 
-                # XOR can only flip if the current bit is 1
-                if plane_buffer[idx] == 1:
-                    unset = True
-                plane_buffer[idx] = plane_buffer[idx] ^ v
+    def get_dirty_regions(self) -> list[tuple[int, int, int, int]]:
+        '''
+        Return the parts of the screen changed since the last screen update as
+        a list of (x, y, width, height) rectangles in screen pixels.
 
-        return unset
+        Adjacent changed rows are merged into one rectangle which spans the
+        changed columns of all of those rows.
+        '''
+        regions = []
+        dirty_cols = self._dirty_cols
 
-    def _set_pixel_hires(self, plane_buffer, x, y, v):
-        unset = False
+        y = 0
+        while y < SCREEN_HEIGHT:
+            if not dirty_cols[y]:
+                y += 1
+                continue
 
-        x = x % SCREEN_WIDTH
-        y = y % SCREEN_HEIGHT
-        idx = x + (y * SCREEN_WIDTH)
+            start = y
+            cols = 0
+            while y < SCREEN_HEIGHT and dirty_cols[y]:
+                cols |= dirty_cols[y]
+                y += 1
 
-        # XOR can only flip if the current bit is 1
-        if plane_buffer[idx] == 1:
-            unset = True
-        plane_buffer[idx] = plane_buffer[idx] ^ v
+            # Column 0 is the most significant bit.
+            first = SCREEN_WIDTH - cols.bit_length()
+            last = SCREEN_WIDTH - (cols & -cols).bit_length()
+            regions.append((first, start, last - first + 1, y - start))
 
-        return unset
+        return regions
 
-    def _set_pixel(self, plane, x, y, v):
-        # XOR with 0 won't change the value
-        if v == 0:
-            return False
+    def _scroll_framebuffer(self, rows, cols):
+        '''
+        Move the framebuffer the same way the planes were scrolled instead of
+        rebuilding it. Positive rows and cols move down and right.
 
-        if not (plane & self._target_plane):
-            return False
+        The framebuffer combines both planes so it can only be moved when the
+        planes that were not scrolled are blank. Otherwise, it's rebuilt. It's
+        also rebuilt if it's already being fully rebuilt or it has been moved
+        too many times since the pixels were last read.
+        '''
+        self._update_screen = True
+        self._dirty_cols = [SCREEN_ROW_MASK] * SCREEN_HEIGHT
+        self._state_dirty = SCREEN_ALL_ROWS
 
-        unset = False
-        plane_buffer = self._screen_planes[0] if plane == Plane.p1 else self._screen_planes[1]
-        if self._res_mode == ResolutionMode.lowres:
-            u = self._set_pixel_lowres(plane_buffer, x, y, v)
-        else:
-            u = self._set_pixel_hires(plane_buffer, x, y, v)
+        self._framebuffer_moves += 1
+        if self._framebuffer_dirty == SCREEN_ALL_ROWS or self._framebuffer_moves > FRAMEBUFFER_MAX_MOVES:
+            self._framebuffer_dirty = SCREEN_ALL_ROWS
+            return
 
-        if u:
-            unset = True
+        if (not (self._target_plane & Plane.p1) and any(self._screen_planes[0])) or (not (self._target_plane & Plane.p2) and any(self._screen_planes[1])):
+            self._framebuffer_dirty = SCREEN_ALL_ROWS
+            return
 
-        self._update_screen = True
-        return unset
+        # Rows waiting to be rebuilt move with the scroll.
+        fb = self._framebuffer
+        if rows > 0:
+            fb[rows:] = fb[:-rows]
+            fb[:rows] = 0
+            self._framebuffer_dirty = (self._framebuffer_dirty << rows) & SCREEN_ALL_ROWS
+        elif rows < 0:
+            fb[:rows] = fb[-rows:]
+            fb[rows:] = 0
+            self._framebuffer_dirty = self._framebuffer_dirty >> -rows
+        elif cols > 0:
+            fb[:, cols:] = fb[:, :-cols]
+            fb[:, :cols] = 0
+        elif cols < 0:
+            fb[:, :cols] = fb[:, -cols:]
+            fb[:, cols:] = 0
 
     def scroll_down(self, num_pixels):
         if self._res_mode == ResolutionMode.lowres:
             num_pixels = num_pixels * 2
 
-        plane_buffers = self._get_plane_buffers()
+        # Scrolling by 0 doesn't move anything.
+        if num_pixels == 0:
+            return
 
-        for plane_buffer in plane_buffers:
-            plane_buffer[:] = bytearray(SCREEN_WIDTH * num_pixels) + plane_buffer[ : -1 * SCREEN_WIDTH * num_pixels ]
-        self._update_screen = True
+        for plane_buffer in self._get_plane_buffers():
+            del plane_buffer[-num_pixels:]
+            plane_buffer[0:0] = [0] * num_pixels
+        self._scroll_framebuffer(num_pixels, 0)
 
     def scroll_up(self, num_pixels: int) -> None:
         if self._res_mode == ResolutionMode.lowres:
             num_pixels = num_pixels * 2
 
-        plane_buffers = self._get_plane_buffers()
+        if num_pixels == 0:
+            return
 
-        for plane_buffer in plane_buffers:
-            plane_buffer[:] = plane_buffer[ SCREEN_WIDTH * num_pixels : ] + bytearray(SCREEN_WIDTH * num_pixels)
-        self._update_screen = True
+        for plane_buffer in self._get_plane_buffers():
+            del plane_buffer[:num_pixels]
+            plane_buffer.extend([0] * num_pixels)
+        self._scroll_framebuffer(-num_pixels, 0)
 
     def scroll_left(self) -> None:
         num_pixels = 4
         if self._res_mode == ResolutionMode.lowres:
             num_pixels = 8
 
-        plane_buffers = self._get_plane_buffers()
-
-        for plane_buffer in plane_buffers:
-            buffer = bytearray()
-
-            for x in range(SCREEN_HEIGHT):
-                row =  plane_buffer[SCREEN_WIDTH * x + num_pixels: SCREEN_WIDTH * x + SCREEN_WIDTH ] + bytearray(num_pixels)
-                buffer.extend(row)
-
-            plane_buffer[:] = buffer
-
-        self._update_screen = True
+        for plane_buffer in self._get_plane_buffers():
+            plane_buffer[:] = [ (row << num_pixels) & SCREEN_ROW_MASK for row in plane_buffer ]
+        self._scroll_framebuffer(0, -num_pixels)
 
     def scroll_right(self) -> None:
         num_pixels = 4
         if self._res_mode == ResolutionMode.lowres:
             num_pixels = 8
 
-        plane_buffers = self._get_plane_buffers()
-
-        for plane_buffer in plane_buffers:
-            buffer = bytearray()
-
-            for x in range(SCREEN_HEIGHT):
-                row = bytearray(num_pixels) + plane_buffer[SCREEN_WIDTH * x : SCREEN_WIDTH * x + SCREEN_WIDTH - num_pixels ]
-                buffer.extend(row)
-
-            plane_buffer[:] = buffer
-
-        self._update_screen = True
-
-    def _sprite_will_wrap(self, x1, y1, x2, y2):
-        if self._res_mode == ResolutionMode.lowres:
-            x1 = x1 * 2
-            y1 = y1 * 2
-            x2 = x2 * 2
-            y2 = y2 * 2
-
-        x1 = x1 % SCREEN_WIDTH
-        y1 = y1 % SCREEN_HEIGHT
-        x2 = x2 % SCREEN_WIDTH
-        y2 = y2 % SCREEN_HEIGHT
+        for plane_buffer in self._get_plane_buffers():
+            plane_buffer[:] = [ row >> num_pixels for row in plane_buffer ]
+        self._scroll_framebuffer(0, num_pixels)
 
-        if x1 > x2 or y1 > y2:
-            return True
-        return False
-
-    def _draw_s8(self, x, y, n, wrap, registers, memory):
-        registers.set_V(0xF, 0)
-        I = registers.get_I()
-        for plane in self._target_plane:
-            for i in range(n):
-                sprite = memory.get_byte(I + i)
+    def _xor_rows(self, plane_buffer, rows, scale, x, y, width, wrap):
+        '''
+        XOR sprite rows onto a plane. Each sprite row is width bits wide and will
+        cover scale screen rows. x and y are the screen position of the sprite.
 
-                for j in range(8):
-                    # XOR with 0 won't change the value
-                    if sprite & (0x80 >> j) == 0:
-                        continue
+        The sprite row is placed into a double wide (256 bit) row. The upper half is
+        the visible part and the lower half is the part that went off the right edge.
+        When wrapping the lower half is folded back onto the left edge. Otherwise,
+        it is clipped.
 
-                    row = x + j
-                    col = y + i
+        Returns a tuple of (collision, changed).
+        '''
+        shift = (SCREEN_WIDTH * 2) - width - x
+        collision = False
+        changed_rows = 0
+        dirty_cols = self._dirty_cols
+
+        for i, sprite in enumerate(rows):
+            # XOR with 0 won't change the value
+            if sprite == 0:
+                continue
+
+            wide = sprite << shift
+            mask = wide >> SCREEN_WIDTH
+            if wrap:
+                mask |= wide & SCREEN_ROW_MASK
+            if mask == 0:
+                continue
+
+            row = y + (i * scale)
+            for r in range(row, row + scale):
+                if r >= SCREEN_HEIGHT:
+                    if not wrap:
+                        break
+                    r = r % SCREEN_HEIGHT
+
+                screen_row = plane_buffer[r]
+                # XOR can only flip if the current bit is 1
+                if screen_row & mask:
+                    collision = True
+                plane_buffer[r] = screen_row ^ mask
+                dirty_cols[r] |= mask
+                changed_rows |= 1 << r
 
-                    if not wrap and self._sprite_will_wrap(x, y, x+j, y+i):
-                        continue
+        self._framebuffer_dirty |= changed_rows
+        self._state_dirty |= changed_rows
+        return collision, changed_rows != 0
 
-                    unset = self._set_pixel(plane, row, col, 1)
-                    if unset:
-                        registers.set_V(0xF, 1)
-            I = I + n
+    def _read_sprite(self, I, n, lowres, memory):
+        if n == 0:
+            rows = [ (memory.get_byte(I + (i*2)) << 8) | memory.get_byte(I + (i*2) + 1) for i in range(16) ]
+            if lowres:
+                rows = [ (_DOUBLE_BITS[r >> 8] << 16) | _DOUBLE_BITS[r & 0xFF] for r in rows ]
+        else:
+            rows = [ memory.get_byte(I + i) for i in range(n) ]
+            if lowres:
+                rows = [ _DOUBLE_BITS[r] for r in rows ]
+        return rows
 
-    def _draw_s16(self, x, y, registers, memory):
+    def draw(self, x: int, y: int, n: int, wrap: bool, registers: Registers, memory: Memory) -> None:
         registers.set_V(0xF, 0)
         I = registers.get_I()
-        for plane in self._target_plane:
-            for i in range(16):
-                sprite = (memory.get_byte(I + (i*2)) << 8) | memory.get_byte(I + (i*2) + 1)
-
-                for j in range(16):
-                    # XOR with 0 won't change the value
-                    if sprite & (0x8000 >> j) == 0:
-                        continue
 
-                    row = x + j
-                    col = y + i
-
-                    unset = self._set_pixel(plane, row, col, 1)
-                    if unset:
-                        registers.set_V(0xF, 1)
-            I = I + 32
-
-    def draw(self, x: int, y: int, n: int, wrap: bool, registers: Registers, memory: Memory) -> None:
+        # 16x16 sprites always wrap.
         if n == 0:
-            self._draw_s16(x, y, registers, memory)
+            width = 16
+            size = 32
+            wrap = True
         else:
-            self._draw_s8(x, y, n, wrap, registers, memory)
+            width = 8
+            size = n
+
+        lowres = self._res_mode == ResolutionMode.lowres
+        scale = 2 if lowres else 1
+        x = (x * scale) % SCREEN_WIDTH
+        y = (y * scale) % SCREEN_HEIGHT
+
+        collision = False
+        for plane_buffer in self._get_plane_buffers():
+            rows = self._read_sprite(I, n, lowres, memory)
+            c, u = self._xor_rows(plane_buffer, rows, scale, x, y, width * scale, wrap)
+            if c:
+                collision = True
+            if u:
+                self._update_screen = True
+            I = I + size
+
+        if collision:
+            registers.set_V(0xF, 1)
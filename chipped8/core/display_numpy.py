@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+
+# Copyright 2025 John Schember <john@nachtimwald.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import numpy as np
+
+from .registers import Registers
+from .memory import Memory, MEMORY_SIZE
+from .display import Displaly, ResolutionMode, SCREEN_WIDTH, SCREEN_HEIGHT
+
+_COLS = np.arange(SCREEN_WIDTH * 2)
+_ROWS = np.arange(SCREEN_HEIGHT * 2)
+
+class NumPyDisplaly(Displaly):
+    '''
+    Display that stores each plane as a 64x128 NumPy array with one byte per pixel.
+
+    Sprites are unpacked from memory into a bit array, scaled for low res mode
+    and XORed onto the plane as a single block. Wrapping and clipping are handled
+    by the row and column index arrays used to select the block of the plane the
+    sprite covers.
+
+    Behaves identically to the packed display. It exists so the two approaches
+    can be compared.
+    '''
+
+    def _generate_empty_plane(self):
+        return np.zeros((SCREEN_HEIGHT, SCREEN_WIDTH), dtype=np.uint8)
+
+    def _copy_plane(self, plane_buffer):
+        return plane_buffer.copy()
+
+    def _planes_to_bytes(self):
+        return np.packbits(self._screen_planes[0]).tobytes() + np.packbits(self._screen_planes[1]).tobytes()
+
+    def _plane_from_bytes(self, data):
+        return np.unpackbits(np.frombuffer(data, dtype=np.uint8)).reshape((SCREEN_HEIGHT, SCREEN_WIDTH))
+
+    def _refresh_framebuffer(self):
+        # Combining the whole planes in place is cheaper than selecting rows.
+        np.left_shift(self._screen_planes[1], 1, out=self._framebuffer)
+        np.bitwise_or(self._framebuffer, self._screen_planes[0], out=self._framebuffer)
+
+    def scroll_down(self, num_pixels):
+        if self._res_mode == ResolutionMode.lowres:
+            num_pixels = num_pixels * 2
+
+        # Scrolling by 0 doesn't move anything.
+        if num_pixels == 0:
+            return
+
+        for plane_buffer in self._get_plane_buffers():
+            plane_buffer[num_pixels:] = plane_buffer[:-num_pixels]
+            plane_buffer[:num_pixels] = 0
+        self._mark_all_dirty()
+
+    def scroll_up(self, num_pixels: int) -> None:
+        if self._res_mode == ResolutionMode.lowres:
+            num_pixels = num_pixels * 2
+
+        if num_pixels == 0:
+            return
+
+        for plane_buffer in self._get_plane_buffers():
+            plane_buffer[:-num_pixels] = plane_buffer[num_pixels:]
+            plane_buffer[-num_pixels:] = 0
+        self._mark_all_dirty()
+
+    def scroll_left(self) -> None:
+        num_pixels = 4
+        if self._res_mode == ResolutionMode.lowres:
+            num_pixels = 8
+
+        for plane_buffer in self._get_plane_buffers():
+            plane_buffer[:, :-num_pixels] = plane_buffer[:, num_pixels:]
+            plane_buffer[:, -num_pixels:] = 0
+        self._mark_all_dirty()
+
+    def scroll_right(self) -> None:
+        num_pixels = 4
+        if self._res_mode == ResolutionMode.lowres:
+            num_pixels = 8
+
+        for plane_buffer in self._get_plane_buffers():
+            plane_buffer[:, num_pixels:] = plane_buffer[:, :-num_pixels]
+            plane_buffer[:, :num_pixels] = 0
+        self._mark_all_dirty()
+
+    def draw(self, x: int, y: int, n: int, wrap: bool, registers: Registers, memory: Memory) -> None:
+        registers.set_V(0xF, 0)
+        I = registers.get_I()
+
+        # 16x16 sprites always wrap.
+        if n == 0:
+            width = 16
+            height = 16
+            size = 32
+            wrap = True
+        else:
+            width = 8
+            height = n
+            size = n
+
+        scale = 2 if self._res_mode == ResolutionMode.lowres else 1
+        x = (x * scale) % SCREEN_WIDTH
+        y = (y * scale) % SCREEN_HEIGHT
+
+        # Screen positions covered by the sprite. Positions past the edge either
+        # wrap around or are dropped along with the matching part of the sprite.
+        cols = x + _COLS[:width * scale]
+        rows = y + _ROWS[:height * scale]
+        if wrap:
+            cols = cols % SCREEN_WIDTH
+            rows = rows % SCREEN_HEIGHT
+            col_sel = slice(None)
+            row_sel = slice(None)
+        else:
+            col_sel = cols < SCREEN_WIDTH
+            row_sel = rows < SCREEN_HEIGHT
+            cols = cols[col_sel]
+            rows = rows[row_sel]
+        idx = np.ix_(rows, cols)
+
+        # Columns as a row bit mask for dirty tracking. Column 0 is the most significant bit.
+        col_mask = 0
+        for c in cols.tolist():
+            col_mask |= 1 << (SCREEN_WIDTH - 1 - c)
+
+        collision = False
+        for plane_buffer in self._get_plane_buffers():
+            # Same error the packed display gets reading past the end of memory.
+            if I + size > MEMORY_SIZE:
+                raise IndexError('Sprite data past the end of memory')
+            sprite = np.frombuffer(memory.get_range(I, size), dtype=np.uint8)
+            sprite = np.unpackbits(sprite).reshape((height, width))
+            if scale == 2:
+                sprite = sprite.repeat(2, axis=0).repeat(2, axis=1)
+            sprite = sprite[row_sel][:, col_sel]
+            I = I + size
+
+            # XOR with 0 won't change the value
+            if not sprite.any():
+                continue
+
+            current = plane_buffer[idx]
+            # XOR can only flip if the current bit is 1
+            if (current & sprite).any():
+                collision = True
+            plane_buffer[idx] = current ^ sprite
+            self._update_screen = True
+            for r in rows.tolist():
+                self._framebuffer_dirty |= 1 << r
+                self._dirty_cols[r] |= col_mask
+
+        if collision:
+            registers.set_V(0xF, 1)
@@ -20,24 +20,37 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import random
 import time
+import zlib
 
 from copy import deepcopy
+from hashlib import sha1
 from threading import Event as ThreadingEvent
 
 from .registers import Registers
 from .timers import Timers
 from .stack import Stack
-from .memory import Memory
-from .keys import KeyInput
-from .display import Displaly
+from .memory import Memory, ROM_START
+from .keys import KeyInput, KeyState
+from .display_types import DisplayTypes, get_display
 from .platform import PlatformTypes, Platform
+from .analysis import analyze_rom
+from .idle import idle_ops
+from .movie import Movie, DEFAULT_HASH_EVERY, state_hash, keys_mask
 from .interpreter import InterpreterTypes, get_interperter
 from .audio import Audio
+from .quirks import Quirks
+from .exceptions import InvalidSaveStateException, InvalidMovieException
+
+SAVE_STATE_MAGIC = b'C8SS'
+SAVE_STATE_VERSION = 1
+# Magic, version, quirks and uncompressed state size
+SAVE_STATE_HEADER_SIZE = 4 + 1 + Quirks.STATE_SIZE + 4
 
 class Emulator():
 
-    def __init__(self, platform=PlatformTypes.originalChip8, interpreter_type=InterpreterTypes.pure, tickrate=-1, quirks=None):
+    def __init__(self, platform=PlatformTypes.originalChip8, interpreter_type=InterpreterTypes.pure, tickrate=-1, quirks=None, display_type=DisplayTypes.packed, shared_blocks=False, skip_idle=False, seed=None):
         platform = Platform(platform)
         if not quirks:
             self._quirks = platform.quirks()
@@ -45,6 +58,17 @@ class Emulator():
             self._quirks = quirks
 
         self._interpreter_type = interpreter_type
+        self._display_type = display_type
+        # Blocks built from the ROM are shared with other emulators in the
+        # process running it.
+        self._shared_blocks = shared_blocks
+        # The rest of a frame is skipped when the ROM is waiting on the delay
+        # timer or keys.
+        self._skip_idle = skip_idle
+        self._skipped_ops = 0
+        # Frames run_frames has run since the screen was last rendered.
+        self._unrendered = 0
+        self._rom = None
 
         if tickrate <= 0:
             self._tickrate = platform.tickrate()
@@ -52,24 +76,22 @@ class Emulator():
             self._tickrate = tickrate
 
         self._registers = Registers()
+        # Seeds the random numbers CXNN uses. The same seed gives the same
+        # numbers on every interpreter.
+        if seed is None:
+            seed = random.getrandbits(32)
+        self._seed = seed & 0xFFFFFFFF
+        self._registers.seed_random(self._seed)
+        # Movie being recorded.
+        self._movie = None
         self._stack = Stack()
         self._memory = Memory()
         self._timers = Timers()
         self._keys = KeyInput()
-        self._display = Displaly()
+        self._display = get_display(self._display_type)()
         self._audio = Audio()
 
-        CPU = get_interperter(self._interpreter_type)
-        self._cpu = CPU(
-            self._registers,
-            self._stack,
-            self._memory,
-            self._timers,
-            self._keys,
-            self._display,
-            self._quirks,
-            self._audio
-        )
+        self._cpu = self._create_cpu()
 
         self._blit_screen_cb = lambda *args: None
         self._sound_cb = lambda *args: None
@@ -81,6 +103,14 @@ class Emulator():
         d = object.__new__(self.__class__)
         d._quirks = self._quirks
         d._interpreter_type = self._interpreter_type
+        d._display_type = self._display_type
+        d._shared_blocks = self._shared_blocks
+        d._skip_idle = self._skip_idle
+        d._skipped_ops = self._skipped_ops
+        d._unrendered = self._unrendered
+        d._seed = self._seed
+        d._movie = None
+        d._rom = self._rom
         d._tickrate = self._tickrate
         d._registers = deepcopy(self._registers, memo)
         d._stack = deepcopy(self._stack, memo)
@@ -90,18 +120,7 @@ class Emulator():
         d._display = deepcopy(self._display, memo)
         d._audio = deepcopy(self._audio, memo)
 
-
-        CPU = get_interperter(self._interpreter_type)
-        d._cpu = CPU(
-            d._registers,
-            d._stack,
-            d._memory,
-            d._timers,
-            d._keys,
-            d._display,
-            d._quirks,
-            d._audio
-        )
+        d._cpu = d._create_cpu()
         d._cpu.copy_state(self._cpu)
 
         d._blit_screen_cb = self._blit_screen_cb
@@ -110,6 +129,140 @@ class Emulator():
         memo[id(self)] = d
         return d
 
+    def fork(self):
+        '''
+        Independent copy of the emulator that's cheap to make. Used to branch
+        execution from a shared state such as when searching.
+
+        Memory is shared until either emulator writes to it. Display planes
+        are lists of immutable rows so only the row lists are copied. Decoded
+        instructions that don't depend on where they are in memory are shared
+        with the fork. Cached blocks are copied since memory can diverge.
+
+        Unlike a deepcopy the fork has its own keys. Callbacks are shared.
+        '''
+        d = object.__new__(self.__class__)
+        d._quirks = self._quirks
+        d._interpreter_type = self._interpreter_type
+        d._display_type = self._display_type
+        d._shared_blocks = self._shared_blocks
+        d._skip_idle = self._skip_idle
+        d._skipped_ops = self._skipped_ops
+        d._unrendered = self._unrendered
+        d._seed = self._seed
+        d._movie = None
+        d._rom = self._rom
+        d._tickrate = self._tickrate
+        # Calling the copy methods directly skips the bookkeeping deepcopy
+        # does which costs more than copying these.
+        memo = {}
+        d._registers = self._registers.__deepcopy__(memo)
+        d._stack = self._stack.__deepcopy__(memo)
+        d._memory = self._memory.fork()
+        d._timers = self._timers.__deepcopy__(memo)
+        d._keys = self._keys.__deepcopy__(memo)
+        d._display = self._display.__deepcopy__(memo)
+        d._audio = self._audio.__deepcopy__(memo)
+
+        d._cpu = d._create_cpu()
+        d._cpu.copy_state(self._cpu)
+
+        d._blit_screen_cb = self._blit_screen_cb
+        d._sound_cb = self._sound_cb
+        return d
+
+    def _create_cpu(self):
+        CPU = get_interperter(self._interpreter_type)
+        return CPU(
+            self._registers,
+            self._stack,
+            self._memory,
+            self._timers,
+            self._keys,
+            self._display,
+            self._quirks,
+            self._audio
+        )
+
+    def _state_components(self):
+        # Order of the components in the state. Memory is last because it's
+        # the largest and most of it rarely changes.
+        return [ self._registers, self._stack, self._timers, self._audio, self._display, self._memory ]
+
+    def state_size(self):
+        return sum(c.STATE_SIZE for c in self._state_components())
+
+    def get_state(self):
+        '''
+        The machine state as fixed size bytes. The size is always state_size().
+        Keys, quirks and the interpreter are not part of the state.
+        '''
+        self._cpu.sync()
+        return b''.join(c.get_state() for c in self._state_components())
+
+    def set_state(self, data):
+        if len(data) != self.state_size():
+            raise ValueError(f'State wrong length: need {self.state_size()} have {len(data)}')
+
+        offset = 0
+        for c in self._state_components():
+            c.set_state(data[offset : offset+c.STATE_SIZE])
+            offset += c.STATE_SIZE
+
+        # Memory was replaced so nothing cached can be trusted.
+        self._cpu.clear_cache()
+
+    def save_state(self) -> bytes:
+        '''
+        The machine state and quirks as a versioned binary blob that can be
+        stored and later restored with load_state.
+
+        The blob is a fixed header followed by the zlib compressed state from
+        get_state. The header is the magic, version, quirks bit field and the
+        size of the uncompressed state. Memory is mostly empty so it
+        compresses to very little.
+        '''
+        state = self.get_state()
+        header = SAVE_STATE_MAGIC + bytes((SAVE_STATE_VERSION,)) + self._quirks.get_state() + len(state).to_bytes(4, 'big')
+        # Fastest level. Restoring speed matters more than a few bytes.
+        return header + zlib.compress(state, 1)
+
+    def load_state(self, data: bytes) -> None:
+        if len(data) < SAVE_STATE_HEADER_SIZE or data[0:4] != SAVE_STATE_MAGIC:
+            raise InvalidSaveStateException('Not a save state')
+        if data[4] != SAVE_STATE_VERSION:
+            raise InvalidSaveStateException(f'Unsupported save state version {data[4]}')
+
+        quirks = data[5 : 5+Quirks.STATE_SIZE]
+        size = int.from_bytes(data[5+Quirks.STATE_SIZE : SAVE_STATE_HEADER_SIZE], 'big')
+        if size != self.state_size():
+            raise InvalidSaveStateException(f'Save state wrong size: need {self.state_size()} have {size}')
+
+        try:
+            state = zlib.decompress(data[SAVE_STATE_HEADER_SIZE:], bufsize=size)
+        except zlib.error as e:
+            raise InvalidSaveStateException(f'Save state corrupt: {e}')
+        if len(state) != size:
+            raise InvalidSaveStateException('Save state corrupt: wrong size')
+
+        if quirks != self._quirks.get_state():
+            # Quirks are built into cached instructions so the CPU is replaced.
+            # A new Quirks is used because the current one can be shared with
+            # other emulators.
+            self._quirks = Quirks()
+            self._quirks.set_state(quirks)
+            self._cpu = self._create_cpu()
+            if self._shared_blocks and self._rom is not None:
+                self._cpu.share_blocks(self._rom)
+
+        self.set_state(state)
+
+    def memory_dirty_pages(self):
+        return self._memory.dirty_pages()
+
+    def clear_memory_dirty_pages(self):
+        self._memory.clear_dirty_pages()
+
     def _blit_screen(self):
         if not self._display.screen_changed():
             return
@@ -127,28 +280,163 @@ class Emulator():
 
     def load_rom(self, data):
         self._memory.load_rom(data)
+        self._rom = bytes(data)
+        if self._shared_blocks:
+            self._cpu.share_blocks(self._rom)
+
+    def block_cache_key(self):
+        '''
+        Identifies the blocks the emulator builds. Made from the ROM's SHA-1,
+        the quirks and the interpreter.
+        '''
+        return f'{sha1(self._rom or b"").hexdigest()}-{self._quirks.get_state().hex()}-{self._interpreter_type}'
 
-    def screen_buffer(self):
-        return self._display.get_pixels()
+    def block_layout(self):
+        '''
+        Blocks built from the ROM that haven't been written over. Code in RAM
+        and code the ROM changed isn't included. (pc, data, [(pc, kind name)])
+        where data is the memory the block was built from.
+        '''
+        rom = self._rom or b''
+        layout = []
+        for (pc, end, instrs) in self._cpu.block_layout():
+            if pc < ROM_START or pc >= ROM_START + len(rom):
+                continue
+            if not self._memory.matches(pc, rom[pc - ROM_START : end - ROM_START]):
+                continue
+            layout.append((pc, bytes(self._memory.get_range(pc, end - pc)), instrs))
+        return layout
+
+    def preload_blocks(self, layout):
+        '''
+        Build blocks from a block_layout before they're run. Blocks are skipped
+        unless memory holds the data they were built from. Returns the number
+        of blocks built.
+        '''
+        layout = [ (pc, pc + len(data), instrs) for (pc, data, instrs) in layout if self._memory.matches(pc, data) ]
+        return self._cpu.preload_blocks(layout)
+
+    def prebuild_blocks(self):
+        '''
+        Build every block analyze_rom can reach in the ROM before running it.
+        Returns the number of blocks built.
+        '''
+        return self.preload_blocks(analyze_rom(self._rom or b'', self._quirks).block_layout())
+
+    def screen_buffer(self, out=None):
+        return self._display.get_pixels(out)
+
+    def dirty_regions(self):
+        return self._display.get_dirty_regions()
+
+    def cache_stats(self):
+        return self._cpu.cache_stats()
+
+    def skipped_ops(self):
+        '''
+        Number of ops skip_idle didn't need to run.
+        '''
+        return self._skipped_ops
 
     def process_frame(self):
-        for i in range(self._tickrate):
-            self._cpu.execute_next_op()
+        return self._run_frame(True)
+
+    def run_frames(self, n, render_every=1):
+        '''
+        Run n frames as fast as possible. The CPU and timers advance every
+        frame but the screen is only rendered and passed to the blit callback,
+        and sound only played, every render_every frames. Frames are counted
+        across calls so calling with n=1 still renders every render_every
+        frames. Returns the number of ops run.
+        '''
+        ops = 0
+        for _ in range(n):
+            ops += self._run_frame(self._unrendered + 1 >= render_every)
+        return ops
+
+    def seed(self):
+        return self._seed
+
+    def _rom_hash(self):
+        return sha1(self._rom or b'').digest()
 
-            # This isn't quite right. We should be running cycles after the
-            # draw and only stop when the next op is a draw. But this works
-            # well enough, it's easier to check, and you don't notice a difference.
-            if self._quirks.vblank and self._cpu.draw_occurred():
-                break
+    def record_movie(self, hash_every=DEFAULT_HASH_EVERY):
+        '''
+        Record the keys for every frame run from now on into a movie. Movies
+        replay from power on so this needs to be called right after the ROM
+        is loaded.
+        '''
+        self._movie = Movie(self._rom_hash(), self._quirks.get_state(), self._tickrate, self._seed, hash_every)
+        return self._movie
+
+    def stop_recording(self):
+        movie = self._movie
+        self._movie = None
+        return movie
+
+    def replay_movie(self, movie):
+        '''
+        Run every frame of a movie as fast as possible, with nothing rendered,
+        and check the state against the movie's hashes. The emulator needs to
+        have just loaded the movie's ROM and been made with its quirks,
+        tickrate and seed. Returns the first frame whose state didn't match or
+        None if they all did.
+        '''
+        if movie.rom_hash != self._rom_hash() or movie.quirks != self._quirks.get_state() or movie.tickrate != self._tickrate or movie.seed != self._seed:
+            raise InvalidMovieException('Movie is for a different ROM or settings')
+
+        hashes = movie.hashes()
+        hash_every = movie.hash_every
+        keys = self._keys
+        last = -1
+        for (frame, mask) in enumerate(movie.key_masks(), 1):
+            if mask != last:
+                for i in range(16):
+                    keys.set_key_state(i, KeyState.down if mask & (1 << i) else KeyState.up)
+                last = mask
+            self._run_frame(False)
+            # The last frame doesn't have a hash if it exited.
+            i = frame // hash_every - 1
+            if frame % hash_every == 0 and i < len(hashes) and state_hash(self) != hashes[i]:
+                return frame
+        return None
+
+    def _run_frame(self, render):
+        movie = self._movie
+        if movie is not None:
+            movie.add_frame(keys_mask(self._keys.get_keys()))
+
+        ops = self._tickrate
+        skipped = 0
+        if self._skip_idle:
+            self._cpu.sync()
+            ops = idle_ops(self._tickrate, self._registers, self._memory, self._timers, self._keys)
+            skipped = self._tickrate - ops
+            self._skipped_ops += skipped
+
+        # This isn't quite right. We should be running cycles after the
+        # draw and only stop when the next op is a draw. But this works
+        # well enough, it's easier to check, and you don't notice a difference.
+        (ops, _) = self._cpu.run(ops, self._quirks.vblank)
+        ops += skipped
 
         if self._timers.delay > 0:
             self._timers.delay -= 1
 
         if self._timers.sound != 0:
-            self._sound_cb(self._audio.pattern, self._audio.pitch)
+            if render:
+                self._sound_cb(self._audio.pattern, self._audio.pitch)
             self._timers.sound -= 1
 
-        self._blit_screen()
+        if render:
+            self._blit_screen()
+            self._unrendered = 0
+        else:
+            self._unrendered += 1
+
+        if movie is not None and len(movie) % movie.hash_every == 0:
+            movie.add_hash(state_hash(self))
+        return ops
 
     def clear_keys(self):
         self._keys.clear_key_states()
@@ -26,3 +26,9 @@ class UnknownOpCodeException(Exception):
 
 class NoInstructionsException(Exception):
     pass
+
+class InvalidSaveStateException(Exception):
+    pass
+
+class InvalidMovieException(Exception):
+    pass
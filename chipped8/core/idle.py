@@ -0,0 +1,115 @@
+# Copyright 2025 John Schember <john@nachtimwald.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from .keys import KeyState
+from .memory import ROM_START, MEMORY_SIZE
+
+# How far ahead to look for the CPU repeating itself.
+MAX_IDLE_STEPS = 64
+
+def _opcode(memory, pc):
+    return (memory.get_byte(pc) << 8) | memory.get_byte(pc + 1)
+
+def _jump(pc):
+    # Same as Registers.set_PC.
+    return max(pc & 0xFFFF, ROM_START)
+
+def _skip(memory, pc, cond):
+    if not cond:
+        return pc + 2
+    # Skipping F000 NNNN skips all four bytes.
+    return pc + (6 if _opcode(memory, pc + 2) == 0xF000 else 4)
+
+def _step(memory, pc, V, delay, keys):
+    '''
+    Run the instruction at pc when it only reads and sets registers from
+    the delay timer, keys and constants. Returns the next PC or None for
+    anything else.
+    '''
+    if pc + 6 > MEMORY_SIZE:
+        return None
+
+    opcode = _opcode(memory, pc)
+    code = opcode & 0xF000
+    x = (opcode & 0x0F00) >> 8
+    y = (opcode & 0x00F0) >> 4
+    nn = opcode & 0x00FF
+
+    if code == 0x1000:
+        return _jump(opcode & 0x0FFF)
+    if code == 0x3000:
+        return _skip(memory, pc, V[x] == nn)
+    if code == 0x4000:
+        return _skip(memory, pc, V[x] != nn)
+    if code == 0x5000 and opcode & 0x000F == 0:
+        return _skip(memory, pc, V[x] == V[y])
+    if code == 0x9000 and opcode & 0x000F == 0:
+        return _skip(memory, pc, V[x] != V[y])
+    if code == 0x6000:
+        V[x] = nn
+        return pc + 2
+    if code == 0x8000 and opcode & 0x000F == 0:
+        V[x] = V[y]
+        return pc + 2
+    if code == 0xE000 and nn in (0x9E, 0xA1):
+        # Checking a key that doesn't exist raises so it's left to the CPU.
+        if V[x] > 0xF:
+            return None
+        down = keys[V[x]] == KeyState.down
+        return _skip(memory, pc, down if nn == 0x9E else not down)
+    if code == 0xF000 and nn == 0x07:
+        V[x] = delay
+        return pc + 2
+    if code == 0xF000 and nn == 0x0A:
+        for (i, ks) in enumerate(keys):
+            if ks == KeyState.down:
+                V[x] = i
+                return pc + 2
+        return pc
+    return None
+
+def idle_ops(ops, registers, memory, timers, keys):
+    '''
+    How many of ops need to run to end up where running all of them would.
+
+    The delay timer and keys don't change during a frame. A loop that only
+    reads them, compares and sets registers, and jumps will keep going around
+    the same way for the rest of the frame. Once the CPU is seen in a state
+    it's been in before it's in such a loop, and only enough of the remaining
+    ops to reach the same point in the loop need to run. Returns ops when the
+    CPU isn't idle.
+    '''
+    pc = registers.get_PC()
+    V = list(registers.dump_V())
+    delay = timers.delay
+    keys = keys.get_keys()
+
+    seen = {}
+    for step in range(min(ops, MAX_IDLE_STEPS)):
+        state = (pc, bytes(V))
+        start = seen.get(state)
+        if start is not None:
+            return start + (ops - start) % (step - start)
+        seen[state] = step
+
+        pc = _step(memory, pc, V, delay, keys)
+        if pc is None:
+            break
+    return ops
@@ -23,15 +23,19 @@
 from enum import Enum
 
 from .cpu.pure.cpu import PureCPU
+from .cpu.pure.cpu_table import PureTableCPU
 from .cpu.cached.obj.cpu import CachedOSplitPreBlockCPU
 from .cpu.cached.lamb.cpu_preblock import CachedLPreBlockCPU
 from .cpu.cached.lamb.cpu_hotblock import CachedLHotBlockCPU
+from .cpu.cached.compiled.cpu import CachedCompiledCPU
 
 class InterpreterTypes(Enum):
     pure = 'pure'
+    puret = 'puret'
     cachedo = 'cachedo'
     cachedlp = 'cachedlp'
     cachedlh = 'cachedlh'
+    cachedc = 'cachedc'
 
     def __str__(self):
         return self.value
@@ -44,7 +48,11 @@ def get_interperter(interpreter_type: InterpreterTypes):
             return CachedLPreBlockCPU
         case InterpreterTypes.cachedlh:
             return CachedLHotBlockCPU
+        case InterpreterTypes.cachedc:
+            return CachedCompiledCPU
         case InterpreterTypes.pure:
             return PureCPU
+        case InterpreterTypes.puret:
+            return PureTableCPU
         case _:
             return None
@@ -49,6 +49,16 @@ class KeyInput():
     def __init__(self):
         self._keys = [KeyState.up] * len(Keys)
 
+    def __deepcopy__(self, memo):
+        if id(self) in memo:
+            return memo[id(self)]
+
+        d = object.__new__(self.__class__)
+        d._keys = list(self._keys)
+
+        memo[id(self)] = d
+        return d
+
     def clear_key_states(self) -> None:
         self._keys[:] = [KeyState.up] * len(self._keys)
 
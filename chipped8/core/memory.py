@@ -23,8 +23,17 @@
 from copy import deepcopy
 
 MEMORY_SIZE = 64*1024
+PAGE_SHIFT = 8
+PAGE_SIZE = 1 << PAGE_SHIFT
+PAGE_COUNT = MEMORY_SIZE // PAGE_SIZE
+ALL_PAGES = (1 << PAGE_COUNT) - 1
+# Where ROMs are loaded
+ROM_START = 512
 
 class Memory:
+
+    # RAM start followed by all of memory
+    STATE_SIZE = 4 + MEMORY_SIZE
     
     def __init__(self):
         self._memory = bytearray(MEMORY_SIZE)
@@ -68,6 +77,20 @@ class Memory:
         self._load_fonts()
         self._ram_start = 513
 
+        # Bit mask of pages written since the dirty pages were last cleared.
+        # Everything is dirty until something has looked at memory.
+        self._dirty_pages = ALL_PAGES
+
+        # Memory buffer might also be used by a fork and needs to be copied
+        # before it's written.
+        self._shared = False
+
+        # Bit mask of pages the CPU has cached code from. Writes to these
+        # pages are kept until the CPU takes them so it can drop the code
+        # they overwrote. Writes to other pages only cost the mask check.
+        self._code_pages = 0
+        self._code_writes = []
+
     def __deepcopy__(self, memo):
         if id(self) in memo:
             return memo[id(self)]
@@ -75,22 +98,121 @@ class Memory:
         d = Memory()
         d._memory = deepcopy(self._memory, memo)
         d._ram_start = self._ram_start
+        d._dirty_pages = self._dirty_pages
+        d._code_pages = self._code_pages
+        d._code_writes = list(self._code_writes)
 
         memo[id(self)] = d
         return d
 
+    def fork(self):
+        '''
+        Copy of memory that shares the memory buffer until either side writes
+        to it. The first write copies the buffer. Copying all of memory once is
+        cheaper than tracking pages on every read.
+        '''
+        d = object.__new__(self.__class__)
+        d._memory = self._memory
+        d._font_small = self._font_small
+        d._font_large = self._font_large
+        d._ram_start = self._ram_start
+        d._dirty_pages = self._dirty_pages
+        d._code_pages = self._code_pages
+        d._code_writes = list(self._code_writes)
+        d._shared = True
+        self._shared = True
+        return d
+
+    def _unshare(self):
+        self._memory = bytearray(self._memory)
+        self._shared = False
+
+    def get_state(self) -> bytes:
+        return self._ram_start.to_bytes(4, 'big') + self._memory
+
+    def set_state(self, data: bytes) -> None:
+        self._ram_start = int.from_bytes(data[0:4], 'big')
+        if self._shared:
+            self._memory = bytearray(data[4:])
+            self._shared = False
+        else:
+            self._memory[:] = data[4:]
+        self._dirty_pages = ALL_PAGES
+
+    def _page_mask(self, start, length):
+        if length <= 0:
+            return 0
+        first = start // PAGE_SIZE
+        last = (start + length - 1) // PAGE_SIZE
+        return ((1 << (last - first + 1)) - 1) << first
+
+    def _mark_range(self, start, length):
+        mask = self._page_mask(start, length)
+        self._dirty_pages |= mask
+        if self._code_pages & mask:
+            self._code_writes.append((start, length))
+
+    def dirty_pages(self) -> list[int]:
+        '''
+        Page numbers written since the dirty pages were last cleared. A page is
+        PAGE_SIZE bytes and page n starts at n * PAGE_SIZE.
+
+        There is only one set of dirty pages. Whatever clears them is
+        responsible for them.
+        '''
+        pages = []
+        dirty = self._dirty_pages
+        while dirty:
+            low = dirty & -dirty
+            dirty ^= low
+            pages.append(low.bit_length() - 1)
+        return pages
+
+    def clear_dirty_pages(self) -> None:
+        self._dirty_pages = 0
+
+    def watch_code(self, start: int, length: int) -> None:
+        '''
+        Report writes to the pages covering the range through take_code_writes.
+        '''
+        self._code_pages |= self._page_mask(start, length)
+
+    def unwatch_code_page(self, page: int) -> None:
+        self._code_pages &= ~(1 << page)
+
+    def clear_code_watch(self) -> None:
+        self._code_pages = 0
+        self._code_writes = []
+
+    def holds_code(self, start: int, length: int) -> bool:
+        '''
+        If writing the range would write to a page with cached code.
+        '''
+        return (self._code_pages & self._page_mask(start, length)) != 0
+
+    def take_code_writes(self) -> list[tuple[int, int]]:
+        '''
+        (start, length) of the writes to watched pages since they were last taken.
+        '''
+        writes = self._code_writes
+        self._code_writes = []
+        return writes
+
     def _load_fonts(self):
         for i, v in enumerate(self._font_small + self._font_large):
             self._memory[i] = v
 
     def load_rom(self, data) -> None:
-        if len(data) > 64*1024 - 512:
+        if len(data) > MEMORY_SIZE - ROM_START:
             raise Exception('Rom data exceeds available memory')
 
+        if self._shared:
+            self._unshare()
         for i, b in enumerate(data):
-            self._memory[i+512] = b
+            self._memory[i+ROM_START] = b
+        self._mark_range(ROM_START, len(data))
 
-        self._ram_start = len(data)+512+1
+        self._ram_start = len(data)+ROM_START+1
 
     def get_byte(self, idx) -> int:
         return self._memory[idx]
@@ -98,12 +220,27 @@ class Memory:
     def get_range(self, start, length) -> bytearray:
         return deepcopy(self._memory[start : start+length])
 
+    def matches(self, start: int, data: bytes) -> bool:
+        '''
+        If memory starting at start holds data.
+        '''
+        return self._memory[start : start+len(data)] == data
+
     def set_byte(self, idx: int, val: int) -> None:
+        if self._shared:
+            self._unshare()
         self._memory[idx] = val
+        page = 1 << (idx >> PAGE_SHIFT)
+        self._dirty_pages |= page
+        if self._code_pages & page:
+            self._code_writes.append((idx, 1))
 
     def set_range(self, start_idx: int, vals: bytes) -> None:
         if start_idx + len(vals) > MEMORY_SIZE:
             raise IndexError('Values over flows memory size')
+        self._mark_range(start_idx, len(vals))
+        if self._shared:
+            self._unshare()
 
         for b in vals:
             self._memory[start_idx] = b
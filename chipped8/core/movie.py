@@ -0,0 +1,127 @@
+# Copyright 2025 John Schember <john@nachtimwald.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import zlib
+
+from .keys import KeyState
+from .quirks import Quirks
+from .exceptions import InvalidMovieException
+
+MOVIE_MAGIC = b'C8MV'
+MOVIE_VERSION = 1
+# Magic, version, ROM SHA-1, quirks, tickrate, seed, hash interval, frames and hashes
+MOVIE_HEADER_SIZE = 4 + 1 + 20 + Quirks.STATE_SIZE + 4 + 4 + 4 + 4 + 4
+# Frames between state hashes.
+DEFAULT_HASH_EVERY = 60
+
+def state_hash(emulator):
+    '''
+    Hash of everything the emulator's state holds.
+    '''
+    return zlib.crc32(emulator.get_state())
+
+def keys_mask(keys):
+    '''
+    Key states as a 16 bit mask with bit n set when key n is down.
+    '''
+    mask = 0
+    for (i, ks) in enumerate(keys):
+        if ks == KeyState.down:
+            mask |= 1 << i
+    return mask
+
+class Movie():
+    '''
+    Keys held for every frame of a run and hashes of the emulator's state
+    to check a replay against. A run is only reproducible from power on so
+    a movie always starts right after the ROM is loaded. Everything else
+    needed to start the same way, the ROM, quirks, tickrate and the seed
+    for CXNN, is in the header.
+
+    Keys are 2 bytes a frame and hashes 4 bytes every hash_every frames.
+    Both are compressed when written which is small since keys rarely
+    change between frames.
+    '''
+
+    def __init__(self, rom_hash, quirks, tickrate, seed, hash_every=DEFAULT_HASH_EVERY):
+        self.rom_hash = rom_hash
+        self.quirks = quirks
+        self.tickrate = tickrate
+        self.seed = seed
+        self.hash_every = hash_every
+        self._keys = bytearray()
+        self._hashes = bytearray()
+
+    def __len__(self):
+        return len(self._keys) // 2
+
+    def get_quirks(self):
+        quirks = Quirks()
+        quirks.set_state(self.quirks)
+        return quirks
+
+    def add_frame(self, mask):
+        self._keys += mask.to_bytes(2, 'little')
+
+    def add_hash(self, value):
+        self._hashes += value.to_bytes(4, 'little')
+
+    def key_masks(self):
+        keys = self._keys
+        return [ keys[i] | (keys[i + 1] << 8) for i in range(0, len(keys), 2) ]
+
+    def hashes(self):
+        hashes = self._hashes
+        return [ int.from_bytes(hashes[i : i+4], 'little') for i in range(0, len(hashes), 4) ]
+
+    def to_bytes(self) -> bytes:
+        header = MOVIE_MAGIC + bytes((MOVIE_VERSION,)) + self.rom_hash + self.quirks
+        for val in (self.tickrate, self.seed, self.hash_every, len(self), len(self._hashes) // 4):
+            header += val.to_bytes(4, 'big')
+        return header + zlib.compress(bytes(self._keys + self._hashes))
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        if len(data) < MOVIE_HEADER_SIZE or data[0:4] != MOVIE_MAGIC:
+            raise InvalidMovieException('Not a movie')
+        if data[4] != MOVIE_VERSION:
+            raise InvalidMovieException(f'Unsupported movie version {data[4]}')
+
+        o = 5
+        rom_hash = data[o : o+20]
+        o += 20
+        quirks = data[o : o+Quirks.STATE_SIZE]
+        o += Quirks.STATE_SIZE
+        (tickrate, seed, hash_every, frames, hashes) = [ int.from_bytes(data[o+i*4 : o+i*4+4], 'big') for i in range(5) ]
+        if hash_every == 0:
+            raise InvalidMovieException('Movie corrupt: no hash interval')
+
+        d = zlib.decompressobj()
+        try:
+            body = d.decompress(data[MOVIE_HEADER_SIZE:])
+        except zlib.error as e:
+            raise InvalidMovieException(f'Movie corrupt: {e}')
+        if not d.eof or d.unused_data or len(body) != frames * 2 + hashes * 4 or hashes > frames // hash_every:
+            raise InvalidMovieException('Movie corrupt: wrong size')
+
+        movie = cls(bytes(rom_hash), bytes(quirks), tickrate, seed, hash_every)
+        movie._keys = bytearray(body[:frames * 2])
+        movie._hashes = bytearray(body[frames * 2:])
+        return movie
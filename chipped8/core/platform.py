@@ -50,7 +50,7 @@ class Platform():
             q.vblank = True
             q.logic = True
         elif self._platform == PlatformTypes.chip48:
-            q.shift(True)
+            q.shift = True
             q.memoryIncrementByX = True
             q.jump = True
         elif self._platform == PlatformTypes.superchip1 or self._platform == PlatformTypes.superchip or self._platform == PlatformTypes.megachip8:
@@ -30,3 +30,18 @@ class Quirks():
         self.jump = False
         self.vblank = False
         self.logic = False
+
+    # Order of the quirks in the state bit field. Quirk n is bit n.
+    _STATE_FIELDS = ( 'shift', 'memoryIncrementByX', 'memoryLeaveIUnchanged', 'wrap', 'jump', 'vblank', 'logic' )
+    STATE_SIZE = 1
+
+    def get_state(self) -> bytes:
+        bits = 0
+        for i, name in enumerate(self._STATE_FIELDS):
+            if getattr(self, name):
+                bits |= 1 << i
+        return bytes((bits,))
+
+    def set_state(self, data: bytes) -> None:
+        for i, name in enumerate(self._STATE_FIELDS):
+            setattr(self, name, bool(data[0] & (1 << i)))
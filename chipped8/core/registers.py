@@ -20,11 +20,12 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from copy import deepcopy
-
 from . import maths
 
 class Registers:
+
+    # V, I, PC, RPL and the random number generator
+    STATE_SIZE = 16 + 2 + 2 + 16 + 4
     
     def __init__(self):
         self._V = bytearray(16)
@@ -33,20 +34,54 @@ class Registers:
         # Flags register. They're supposed to be saved to persist
         # between loading different ROMs.
         self._RPL = bytearray(16)
+        # State of the random number generator CXNN uses.
+        self.seed_random(0)
 
     def __deepcopy__(self, memo):
         if id(self) in memo:
             return memo[id(self)]
 
         d = object.__new__(self.__class__)
-        d._V = deepcopy(self._V, memo)
+        d._V = bytearray(self._V)
         d._I = self._I
         d._PC = self._PC
-        d._RPL = deepcopy(self._RPL, memo)
+        d._RPL = bytearray(self._RPL)
+        d._random = self._random
 
         memo[id(self)] = d
         return d
         
+    def get_state(self) -> bytes:
+        return bytes(self._V) + self._I.to_bytes(2, 'big') + self._PC.to_bytes(2, 'big') + bytes(self._RPL) + self._random.to_bytes(4, 'big')
+
+    def set_state(self, data: bytes) -> None:
+        self._V[:] = data[0:16]
+        self._I = int.from_bytes(data[16:18], 'big')
+        self._PC = int.from_bytes(data[18:20], 'big')
+        self._RPL[:] = data[20:36]
+        self._random = int.from_bytes(data[36:40], 'big') or 1
+
+    def seed_random(self, seed: int) -> None:
+        # The seed is mixed so nearby seeds don't start out producing nearly
+        # the same numbers. xorshift can't start from 0.
+        x = ((seed ^ 0x9E3779B9) * 0x85EBCA6B) & 0xFFFFFFFF
+        x ^= x >> 13
+        x = (x * 0xC2B2AE35) & 0xFFFFFFFF
+        x ^= x >> 16
+        self._random = x or 1
+
+    def random_byte(self) -> int:
+        '''
+        Next number from a 32 bit xorshift generator. The same seed always
+        gives the same numbers on every interpreter and Python version.
+        '''
+        x = self._random
+        x ^= (x << 13) & 0xFFFFFFFF
+        x ^= x >> 17
+        x ^= (x << 5) & 0xFFFFFFFF
+        self._random = x
+        return x >> 24
+
     def set_V(self, idx: int, val: int) -> None:
         if idx < 0 or idx > 15:
             raise IndexError(f'Invalid register V{idx}')
@@ -20,9 +20,10 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from copy import deepcopy
-
 class Stack:
+
+    # Depth followed by 16 addresses
+    STATE_SIZE = 1 + (16 * 2)
     
     def __init__(self):
         self._stack = []
@@ -32,11 +33,22 @@ class Stack:
             return memo[id(self)]
 
         d = object.__new__(self.__class__)
-        d._stack = deepcopy(self._stack, memo)
+        # Addresses are ints so a shallow copy is a full copy.
+        d._stack = list(self._stack)
 
         memo[id(self)] = d
         return d
 
+    def get_state(self) -> bytes:
+        data = bytearray(self.STATE_SIZE)
+        data[0] = len(self._stack)
+        for i, addr in enumerate(self._stack):
+            data[1 + (i*2) : 3 + (i*2)] = addr.to_bytes(2, 'big')
+        return bytes(data)
+
+    def set_state(self, data: bytes) -> None:
+        self._stack = [ int.from_bytes(data[1 + (i*2) : 3 + (i*2)], 'big') for i in range(data[0]) ]
+
     def push(self, addr: int) -> None:
         if len(self._stack) >= 16:
             raise OverflowError('Stack limit exceeded')
@@ -24,6 +24,9 @@ from . import maths
 
 class Timers:
 
+    # Sound and delay
+    STATE_SIZE = 2 + 2
+
     def __init__(self):
         self._sound = 0
         self._delay = 0
@@ -39,6 +42,13 @@ class Timers:
         memo[id(self)] = d
         return d
 
+    def get_state(self) -> bytes:
+        return self._sound.to_bytes(2, 'big') + self._delay.to_bytes(2, 'big')
+
+    def set_state(self, data: bytes) -> None:
+        self._sound = int.from_bytes(data[0:2], 'big')
+        self._delay = int.from_bytes(data[2:4], 'big')
+
     @property
     def sound(self) -> int:
         return self._sound
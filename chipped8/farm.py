@@ -0,0 +1,312 @@
+#!/usr/bin/env python
+
+# Copyright 2025 John Schember <john@nachtimwald.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import chipped8
+
+def _layout(sessions, slots):
+    '''
+    Layout of the shared memory block. The parent sets stop to tell the
+    workers to finish. Each session has the key states written by the parent
+    and a ring of frames written by the worker that runs it.
+    '''
+    frame = np.dtype([
+        ('frame', '<i8'),
+        ('time', '<f8'),
+        ('pixels', 'u1', (chipped8.SCREEN_HEIGHT, chipped8.SCREEN_WIDTH)),
+    ])
+    session = np.dtype([
+        ('keys', 'u1', 16),
+        ('published', '<i8'),
+        ('done', 'u1'),
+        ('ring', frame, (slots,)),
+    ])
+    return np.dtype([
+        ('stop', 'u1'),
+        ('sessions', session, (sessions,)),
+    ])
+
+def _worker(worker_id, shm_name, layout, sessions, frames, results):
+    # Workers share the parent's resource tracker so the block is only
+    # removed when the parent unlinks it.
+    shm = shared_memory.SharedMemory(name=shm_name)
+    state = np.ndarray((), dtype=layout, buffer=shm.buf)
+    shared = state['sessions']
+    ring = shared['ring']
+    slots = ring.shape[1]
+
+    emulators = {}
+    for session, rom, platform, interpreter_type, tickrate, display_type in sessions:
+        # Sessions running the same ROM in a worker share the blocks built
+        # from it. Sessions waiting on input or the delay timer skip the rest
+        # of the frame.
+        emulator = chipped8.Emulator(platform=platform, interpreter_type=interpreter_type, tickrate=tickrate, display_type=display_type, shared_blocks=True, skip_idle=True)
+        emulator.load_rom(rom)
+        emulators[session] = emulator
+    started = list(emulators.values())
+
+    count = 0
+    errors = {}
+    start = time.perf_counter()
+    while emulators and not state['stop']:
+        for session, emulator in list(emulators.items()):
+            for key, down in enumerate(shared['keys'][session].tolist()):
+                emulator.set_key_state(key, chipped8.KeyState.down if down else chipped8.KeyState.up)
+
+            try:
+                emulator.process_frame()
+            except Exception as e:
+                if not isinstance(e, chipped8.ExitInterpreterException):
+                    errors[session] = str(e)
+                shared['done'][session] = 1
+                del emulators[session]
+                continue
+
+            # The frame number is cleared while the pixels are written so a
+            # reader can tell the slot changed under it.
+            n = int(shared['published'][session])
+            slot = n % slots
+            ring['frame'][session, slot] = -1
+            emulator.screen_buffer(ring['pixels'][session, slot])
+            ring['time'][session, slot] = time.monotonic()
+            ring['frame'][session, slot] = n
+            shared['published'][session] = n + 1
+            count += 1
+
+            if frames > 0 and n + 1 >= frames:
+                shared['done'][session] = 1
+                del emulators[session]
+    seconds = time.perf_counter() - start
+
+    for session in emulators:
+        shared['done'][session] = 1
+
+    results.put({
+        'worker': worker_id,
+        'pid': os.getpid(),
+        'sessions': [ s[0] for s in sessions ],
+        'frames': count,
+        'seconds': seconds,
+        'fps': count / seconds if seconds > 0 else 0.0,
+        'skipped_ops': sum(e.skipped_ops() for e in started),
+        'errors': errors,
+    })
+    del state, shared, ring
+    shm.close()
+
+class Farm():
+    '''
+    Runs ROM sessions sharded across a pool of worker processes.
+
+    Every session is its own emulator. Sessions are assigned to workers round
+    robin and each worker runs its sessions one frame at a time in turn.
+
+    Frames and key states are exchanged through a shared memory block instead
+    of pipes so nothing is pickled while running. Each session has a small
+    ring of frames. The worker writes the next slot and the parent reads the
+    newest one. Frames the parent doesn't read in time are overwritten which
+    keeps a slow reader from ever stalling the workers.
+
+    Queue latency is the time between a worker publishing a frame and the
+    parent reading it. It's tracked per session and reported per worker.
+    '''
+
+    def __init__(self, roms, workers=None, platform=chipped8.PlatformTypes.originalChip8, interpreter_type=chipped8.InterpreterTypes.pure, tickrate=-1, display_type=chipped8.DisplayTypes.packed, slots=4):
+        self._roms = list(roms)
+        self._workers = max(min(workers or os.cpu_count() or 1, len(self._roms)), 1)
+        self._platform = platform
+        self._interpreter_type = interpreter_type
+        self._tickrate = tickrate
+        self._display_type = display_type
+
+        self._layout = _layout(len(self._roms), slots)
+        self._slots = slots
+        self._shm = None
+        self._state = None
+        self._processes = []
+        self._results = None
+        self._stats = []
+
+        self._last_read = [ -1 ] * len(self._roms)
+        self._latency_total = [ 0.0 ] * len(self._roms)
+        self._latency_count = [ 0 ] * len(self._roms)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self._roms)
+
+    def worker_sessions(self, worker):
+        return list(range(worker, len(self._roms), self._workers))
+
+    def start(self, frames=0):
+        '''
+        Start the workers. Each session runs for frames frames or until stopped
+        when frames is 0.
+        '''
+        self._shm = shared_memory.SharedMemory(create=True, size=self._layout.itemsize)
+        self._state = np.ndarray((), dtype=self._layout, buffer=self._shm.buf)
+        self._state.fill(0)
+
+        ctx = multiprocessing.get_context()
+        self._results = ctx.Queue()
+        for worker in range(self._workers):
+            sessions = [ (s, self._roms[s], self._platform, self._interpreter_type, self._tickrate, self._display_type) for s in self.worker_sessions(worker) ]
+            p = ctx.Process(target=_worker, args=(worker, self._shm.name, self._layout, sessions, frames, self._results), daemon=True)
+            p.start()
+            self._processes.append(p)
+
+    def set_key_state(self, session, key, state):
+        self._state['sessions']['keys'][session, key] = 1 if state == chipped8.KeyState.down else 0
+
+    def published(self, session):
+        return int(self._state['sessions']['published'][session])
+
+    def done(self, session=None):
+        if session is None:
+            return bool(self._state['sessions']['done'].all())
+        return bool(self._state['sessions']['done'][session])
+
+    def latest_frame(self, session, out=None):
+        '''
+        Copy the newest frame of a session into out, or a new array, and
+        return (frame number, pixels). Frame number is -1 when nothing has
+        been published yet.
+        '''
+        if out is None:
+            out = np.zeros((chipped8.SCREEN_HEIGHT, chipped8.SCREEN_WIDTH), dtype=np.uint8)
+
+        shared = self._state['sessions']
+        ring = shared['ring']
+        while True:
+            n = int(shared['published'][session]) - 1
+            if n < 0:
+                return (-1, out)
+
+            slot = n % self._slots
+            np.copyto(out, ring['pixels'][session, slot])
+            published = float(ring['time'][session, slot])
+            # The worker may have reused the slot while it was being copied.
+            if int(ring['frame'][session, slot]) == n:
+                break
+
+        if n != self._last_read[session]:
+            self._last_read[session] = n
+            self._latency_total[session] += time.monotonic() - published
+            self._latency_count[session] += 1
+        return (n, out)
+
+    def join(self, timeout=None):
+        '''
+        Wait for the workers to finish and return their stats.
+        '''
+        for p in self._processes:
+            p.join(timeout)
+
+        while len(self._stats) < len(self._processes):
+            try:
+                self._stats.append(self._results.get(timeout=1))
+            except queue.Empty:
+                break
+
+        stats = sorted(self._stats, key=lambda s: s['worker'])
+        for s in stats:
+            count = sum(self._latency_count[i] for i in s['sessions'])
+            total = sum(self._latency_total[i] for i in s['sessions'])
+            s['frames_read'] = count
+            s['latency'] = total / count if count else 0.0
+        return stats
+
+    def stop(self):
+        if self._state is not None:
+            self._state['stop'] = 1
+        return self.join()
+
+    def close(self):
+        if self._shm is None:
+            return
+
+        self.stop()
+        for p in self._processes:
+            if p.is_alive():
+                p.terminate()
+        self._processes = []
+
+        self._state = None
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+            prog = 'python -m chipped8.farm',
+            description = 'Run many ROMs across worker processes')
+    parser.add_argument('in_files', help='Input ROM file(s). A file can be repeated to run it multiple times', nargs='+')
+    parser.add_argument('-w', '--workers', type=int, default=0, help='Number of worker processes. Default is the number of CPUs')
+    parser.add_argument('-c', '--copies', type=int, default=1, help='Sessions to run for each ROM')
+    parser.add_argument('-p', '--platform', type=chipped8.PlatformTypes, choices=chipped8.PlatformTypes, default=chipped8.PlatformTypes.originalChip8, help='Set the Chip-8 instruction set to use')
+    parser.add_argument('-i', '--interpreter', type=chipped8.InterpreterTypes, choices=chipped8.InterpreterTypes, default=chipped8.InterpreterTypes.pure, help='Set the type of interpreter to use')
+    parser.add_argument('-t', '--tickrate', type=int, default=-1, help='Instructions per frame. Uses the platform default if not set')
+    parser.add_argument('-n', '--frames', type=int, default=600, help='Number of frames to run per session')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+
+    roms = []
+    for fname in args.in_files:
+        with open(fname, 'rb') as f:
+            roms.extend([ f.read() ] * max(args.copies, 1))
+
+    with Farm(roms, args.workers, args.platform, args.interpreter, args.tickrate) as farm:
+        farm.start(args.frames)
+
+        # Read frames like a consumer would so latency is measured.
+        out = np.zeros((chipped8.SCREEN_HEIGHT, chipped8.SCREEN_WIDTH), dtype=np.uint8)
+        while not farm.done():
+            for session in range(len(farm)):
+                farm.latest_frame(session, out)
+            time.sleep(0.001)
+
+        stats = farm.join()
+
+    for s in stats:
+        print(json.dumps(s))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -20,19 +20,20 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import os
 import time
 
-from copy import deepcopy
-
-from PySide6.QtCore import Qt, QObject, Slot, Signal, QTimer, QUrl
+from PySide6.QtCore import Qt, QObject, Slot, Signal, QTimer, QUrl, QStandardPaths
 
 import chipped8
 import numpy as np
 
 max_rewind_frames = 60*30 # 60 frame per sec, 30 seconds
+fast_forward_frames = 8 # Frames run for each frame shown while fast forwarding
+blit_buffers = 3 # Buffers the pixels are copied into for the GUI thread to start with
 
 class c8Handler(QObject):
-    blitReady = Signal(np.ndarray)
+    blitReady = Signal(np.ndarray, object)
     audioReady = Signal(bytearray, int)
     clearScreenReady = Signal()
     errorOccurred = Signal(str)
@@ -53,12 +54,39 @@ class c8Handler(QObject):
         self._process_timer.timeout.connect(lambda: self.updateScreen.emit())
 
         self._frame_times = []
-        self._rewind_stack = []
+        self._rewind = chipped8.Rewind(max_rewind_frames)
 
         self._rom_fname = None
+        self._fast_forward = False
+        # Buffers the GUI thread isn't using. They're handed back once drawn.
+        self._blit_buffers = [ self._new_blit_buffer() for _ in range(blit_buffers) ]
+        self._block_cache = chipped8.BlockCache(os.path.join(QStandardPaths.writableLocation(QStandardPaths.AppDataLocation), 'block_cache'))
+
+    def _save_blocks(self):
+        if not self._emulator:
+            return
+
+        try:
+            self._block_cache.save(self._emulator)
+        except OSError:
+            pass
+
+    def _new_blit_buffer(self):
+        return np.zeros((chipped8.SCREEN_HEIGHT, chipped8.SCREEN_WIDTH), dtype=np.uint8)
+
+    def _next_blit_buffer(self):
+        # The framebuffer changes while the GUI thread is still drawing it so
+        # the pixels are copied. Only buffers the GUI thread has handed back
+        # are reused. A new one is made when it's behind and has them all.
+        buf = self._blit_buffers.pop() if self._blit_buffers else self._new_blit_buffer()
+        return self._emulator.screen_buffer(out=buf)
+
+    @Slot(np.ndarray)
+    def release_blit_buffer(self, buf):
+        self._blit_buffers.append(buf)
 
     def _fill_screen_buffer(self, pixels):
-        self.blitReady.emit(pixels)
+        self.blitReady.emit(self._next_blit_buffer(), self._emulator.dirty_regions())
 
     def _audio(self, pattern, pitch):
         self.audioReady.emit(bytes(pattern), pitch)
@@ -74,6 +102,12 @@ class c8Handler(QObject):
             self._process_timer.stop()
             self._frame_times = []
 
+    @Slot()
+    def shutdown(self):
+        self._process_timer.stop()
+        self._frame_times = []
+        self._save_blocks()
+
     @Slot(int, bool, int)
     def key_event(self, key, pressed, modifiers):
         if not self._emulator:
@@ -119,29 +153,20 @@ class c8Handler(QObject):
                 self._frame_times = []
             else:
                 self._process_timer.start(0)
+        elif key == Qt.Key_Right:
+            self._fast_forward = pressed
         elif key == Qt.Key_Left and pressed:
             self._process_timer.stop()
             self.fps.emit(0, 0)
             self._frame_times = []
 
-            if len(self._rewind_stack) == 0:
-                return
-
             frames = 1
             if modifiers & Qt.ShiftModifier.value:
                 frames = 60
-            if frames > len(self._rewind_stack):
-                frames = len(self._rewind_stack)
-
-            if frames > 1:
-                self._rewind_stack[:] = self._rewind_stack[:-(frames-1)]
-            self._emulator = self._rewind_stack.pop()
-
-            if len(self._rewind_stack) == 0:
-                self._record_frame()
+            self._rewind.rewind(self._emulator, frames)
             self._emulator.clear_keys()
 
-            self.blitReady.emit(self._emulator.screen_buffer())
+            self.blitReady.emit(self._next_blit_buffer(), None)
 
     @Slot(QUrl)
     @Slot(str)
@@ -155,8 +180,9 @@ class c8Handler(QObject):
         if self._tickrate != tickrate:
             self._tickrate = tickrate
 
+        self._save_blocks()
         self._emulator = chipped8.Emulator(platform=self._platform, interpreter_type=self._interpreter, tickrate=self._tickrate)
-        self._rewind_stack = []
+        self._rewind.clear()
 
         if isinstance(fname, QUrl):
             fname = fname.path()
@@ -169,6 +195,7 @@ class c8Handler(QObject):
             self._emulator = None
             self._rom_fname = None
             return
+        self._block_cache.load(self._emulator)
 
         self.clearScreenReady.emit()
         self._rom_fname = fname
@@ -202,9 +229,7 @@ class c8Handler(QObject):
         if self._emulator == None:
             return
 
-        if len(self._rewind_stack) > max_rewind_frames:
-            self._rewind_stack = self._rewind_stack[1:]
-        self._rewind_stack.append(deepcopy(self._emulator))
+        self._rewind.record(self._emulator)
 
     def _update_frame_time(self, ns):
         self._frame_times.append(ns)
@@ -268,10 +293,14 @@ class c8Handler(QObject):
             return
 
         try:
-            self._emulator.process_frame()
+            if self._fast_forward:
+                self._emulator.run_frames(fast_forward_frames, fast_forward_frames)
+            else:
+                self._emulator.process_frame()
         except chipped8.ExitInterpreterException:
+            self._save_blocks()
             self._emulator = None
-            self._rewind_stack = []
+            self._rewind.clear()
             self._process_timer.stop()
             self.fps.emit(0, 0)
             self._frame_times = []
@@ -279,8 +308,9 @@ class c8Handler(QObject):
             return
         except Exception as e:
             self.errorOccurred.emit(str(e))
+            self._save_blocks()
             self._emulator = None
-            self._rewind_stack = []
+            self._rewind.clear()
             self._process_timer.stop()
             self.fps.emit(0, 0)
             self._frame_times = []
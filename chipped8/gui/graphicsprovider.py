@@ -39,6 +39,7 @@ import chipped8
 
 class GraphicsProvider(QRhiWidget):
     focusChanged = Signal(bool)
+    blitDone = Signal(np.ndarray)
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -56,6 +57,7 @@ class GraphicsProvider(QRhiWidget):
 
         self._texture_size = QSize(chipped8.SCREEN_WIDTH, chipped8.SCREEN_HEIGHT)
         self._rbg_buffer = np.zeros((chipped8.SCREEN_HEIGHT, chipped8.SCREEN_WIDTH, 4), dtype=np.uint8)
+        self._pixel_indices = None
 
         self.set_colors()
 
@@ -169,14 +171,27 @@ class GraphicsProvider(QRhiWidget):
             raise RuntimeError(f'Failed to open shader file: {qsb_path} - {e}')
         raise Exception('Failed to load shaders')
 
-    @Slot(np.ndarray)
-    def blitScreen(self, pixel_indices: np.ndarray):
-        self._rbg_buffer[:] = self._colors[pixel_indices]
+    @Slot(np.ndarray, object)
+    def blitScreen(self, pixel_indices: np.ndarray, regions=None):
+        # Only the changed regions need to be recolored. None means everything changed.
+        if regions is None:
+            self._rbg_buffer[:] = self._colors[pixel_indices]
+        else:
+            for x, y, w, h in regions:
+                self._rbg_buffer[y:y+h, x:x+w] = self._colors[pixel_indices[y:y+h, x:x+w]]
+        # The buffer goes back to the handler to reuse so the pixels are kept
+        # in our own.
+        if self._pixel_indices is None:
+            self._pixel_indices = pixel_indices.copy()
+        else:
+            np.copyto(self._pixel_indices, pixel_indices)
+        self.blitDone.emit(pixel_indices)
         self.update()
 
     @Slot()
     def clearScreen(self):
         self._rbg_buffer.fill(0)
+        self._pixel_indices = None
         self.update()
 
     @Slot()
@@ -200,6 +215,11 @@ class GraphicsProvider(QRhiWidget):
             self._hex_to_rgba(color_4)
         ], dtype=np.uint8)
 
+        # Partial blits only recolor what changed so the whole screen
+        # needs to be redrawn with the new colors.
+        if self._pixel_indices is not None:
+            self._rbg_buffer[:] = self._colors[self._pixel_indices]
+
     def get_colors(self):
         return [
             '#{:02x}{:02x}{:02x}'.format(r, g, b)
@@ -47,6 +47,7 @@ class QtApp(QObject):
         c8handler.moveToThread(c8_thread)
 
         c8handler.blitReady.connect(win.gpu_view.blitScreen)
+        win.gpu_view.blitDone.connect(c8handler.release_blit_buffer)
         c8handler.fps.connect(win.update_fps)
         c8handler.clearScreenReady.connect(win.gpu_view.clearScreen)
         c8handler.updateScreen.connect(win.gpu_view.update)
@@ -77,10 +78,10 @@ class QtApp(QObject):
         # Start execution of the GUI
         ret = app.exec()
 
-        # Stop the timer for processing frames
-        # This is so the process frame timer stops.
+        # Stop the timer for processing frames and save the blocks built for
+        # the ROM so the next launch starts warm.
         # We can't call it directly because we're on a different thread. Hence a blocking queued conenction.
-        QMetaObject.invokeMethod(c8handler, 'process_frames', Qt.BlockingQueuedConnection, Q_ARG(bool, False))
+        QMetaObject.invokeMethod(c8handler, 'shutdown', Qt.BlockingQueuedConnection)
 
         # Stop the audio. The audio buffer is filled using an internal timer that keeps it full.
         QMetaObject.invokeMethod(audio, "stop", Qt.BlockingQueuedConnection)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+
+# Copyright 2025 John Schember <john@nachtimwald.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+import chipped8
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+            prog = os.path.basename(sys.argv[0]),
+            description = 'Chip8 Emulator (headless)')
+    parser.add_argument('in_files', help='Input ROM file(s)', nargs='+')
+    parser.add_argument('-p', '--platform', type=chipped8.PlatformTypes, choices=chipped8.PlatformTypes, default=chipped8.PlatformTypes.originalChip8, help='Set the Chip-8 instruction set to use')
+    parser.add_argument('-i', '--interpreter', type=chipped8.InterpreterTypes, choices=chipped8.InterpreterTypes, default=chipped8.InterpreterTypes.pure, help='Set the type of interpreter to use')
+    parser.add_argument('--display', type=chipped8.DisplayTypes, choices=chipped8.DisplayTypes, default=chipped8.DisplayTypes.packed, help='Set the display engine to use')
+    parser.add_argument('-t', '--tickrate', type=int, default=-1, help='Instructions per frame. Uses the platform default if not set')
+    parser.add_argument('-n', '--frames', type=int, default=600, help='Number of frames to run. 0 runs until the ROM exits')
+    parser.add_argument('-d', '--dump', help='Write the final screen buffer to this file. A directory when multiple ROMs are given. Uses NumPy format if the name ends with .npy otherwise raw bytes')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON, one object per ROM')
+    parser.add_argument('-r', '--render-every', type=int, default=1, help='Only render the screen every N frames')
+    parser.add_argument('-s', '--seed', type=int, help='Seed for the random numbers the ROM uses')
+    parser.add_argument('--record', help='Record a movie of the run to this file. A directory when multiple ROMs are given')
+    parser.add_argument('--skip-idle', action='store_true', help='Skip the rest of a frame when the ROM is waiting on the delay timer or keys')
+    parser.add_argument('--prebuild', action='store_true', help='Build every block that can be found in the ROM before running it')
+    parser.add_argument('--block-cache', help='Directory to save the blocks built from each ROM in. Saved blocks are built before the ROM runs next time')
+    parser.add_argument('--version', action='version', version='%(prog)s {v}'.format(v=chipped8.__version__))
+    return parser.parse_args()
+
+def run_rom(fname, platform, interpreter, tickrate, frames, display_type=chipped8.DisplayTypes.packed, block_cache=None, prebuild=False, skip_idle=False, render_every=1, seed=None, record=False):
+    emulator = chipped8.Emulator(platform=platform, interpreter_type=interpreter, tickrate=tickrate, display_type=display_type, skip_idle=skip_idle, seed=seed)
+    with open(fname, 'rb') as f:
+        emulator.load_rom(f.read())
+    if record:
+        emulator.record_movie()
+
+    preloaded = 0
+    if block_cache:
+        preloaded = block_cache.load(emulator)
+    if prebuild:
+        preloaded += emulator.prebuild_blocks()
+
+    count = 0
+    exited = False
+    start = time.perf_counter()
+    try:
+        while frames <= 0 or count < frames:
+            emulator.run_frames(1, render_every)
+            count += 1
+    except chipped8.ExitInterpreterException:
+        exited = True
+    seconds = time.perf_counter() - start
+
+    if block_cache:
+        block_cache.save(emulator)
+
+    return emulator, {
+        'rom': fname,
+        'platform': str(platform),
+        'interpreter': str(interpreter),
+        'display': str(display_type),
+        'frames': count,
+        'exited': exited,
+        'seconds': seconds,
+        'fps': count / seconds if seconds > 0 else 0.0,
+        'preloaded_blocks': preloaded,
+        'skipped_ops': emulator.skipped_ops(),
+        'seed': emulator.seed(),
+    }
+
+def dump_pixels(fname, pixels):
+    if fname.endswith('.npy'):
+        np.save(fname, pixels)
+    else:
+        with open(fname, 'wb') as f:
+            f.write(pixels.tobytes())
+
+def dump_name(dump, rom_fname, multiple, ext='.pixels'):
+    if not multiple:
+        return dump
+    os.makedirs(dump, exist_ok=True)
+    return os.path.join(dump, os.path.basename(rom_fname) + ext)
+
+def main():
+    args = parse_args()
+    multiple = len(args.in_files) > 1
+    block_cache = chipped8.BlockCache(args.block_cache) if args.block_cache else None
+
+    for fname in args.in_files:
+        try:
+            emulator, result = run_rom(fname, args.platform, args.interpreter, args.tickrate, args.frames, args.display, block_cache, args.prebuild, args.skip_idle, args.render_every, args.seed, bool(args.record))
+        except Exception as e:
+            print('Error: {0}: {1}'.format(fname, e), file=sys.stderr)
+            return 1
+
+        if args.dump:
+            dump_pixels(dump_name(args.dump, fname, multiple), emulator.screen_buffer())
+
+        if args.record:
+            with open(dump_name(args.record, fname, multiple, '.c8m'), 'wb') as f:
+                f.write(emulator.stop_recording().to_bytes())
+
+        if args.json:
+            print(json.dumps(result))
+        else:
+            print('{rom}: frames={frames} seconds={seconds:.3f} fps={fps:.1f}{exit}'.format(exit=' (exited)' if result['exited'] else '', **result))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+
+# Copyright 2025 John Schember <john@nachtimwald.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from hashlib import sha1
+
+import chipped8
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+            prog = os.path.basename(sys.argv[0]),
+            description = 'Chip8 movie replay')
+    parser.add_argument('movies', help='Movie file(s)', nargs='+')
+    parser.add_argument('-r', '--roms', help='ROM files or directories of ROMs. Each movie is replayed with the ROM it was recorded from', nargs='+', required=True)
+    parser.add_argument('-i', '--interpreter', type=chipped8.InterpreterTypes, choices=chipped8.InterpreterTypes, default=chipped8.InterpreterTypes.pure, help='Set the type of interpreter to use')
+    parser.add_argument('--display', type=chipped8.DisplayTypes, choices=chipped8.DisplayTypes, default=chipped8.DisplayTypes.packed, help='Set the display engine to use')
+    parser.add_argument('--skip-idle', action='store_true', help='Skip the rest of a frame when the ROM is waiting on the delay timer or keys')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON, one object per movie')
+    parser.add_argument('--version', action='version', version='%(prog)s {v}'.format(v=chipped8.__version__))
+    return parser.parse_args()
+
+def load_roms(paths):
+    '''
+    ROMs by the SHA-1 of their contents.
+    '''
+    roms = {}
+    for path in paths:
+        if os.path.isdir(path):
+            files = [ os.path.join(path, f) for f in sorted(os.listdir(path)) ]
+        else:
+            files = [ path ]
+        for fname in files:
+            if not os.path.isfile(fname):
+                continue
+            with open(fname, 'rb') as f:
+                data = f.read()
+            roms.setdefault(sha1(data).digest(), (fname, data))
+    return roms
+
+def replay(fname, roms, interpreter, display_type=chipped8.DisplayTypes.packed, skip_idle=False):
+    with open(fname, 'rb') as f:
+        movie = chipped8.Movie.from_bytes(f.read())
+    if movie.rom_hash not in roms:
+        raise Exception('ROM {0} not found'.format(movie.rom_hash.hex()))
+    (rom_fname, rom) = roms[movie.rom_hash]
+
+    emulator = chipped8.Emulator(interpreter_type=interpreter, tickrate=movie.tickrate, quirks=movie.get_quirks(), display_type=display_type, skip_idle=skip_idle, seed=movie.seed)
+    emulator.load_rom(rom)
+
+    exited = False
+    start = time.perf_counter()
+    try:
+        mismatch = emulator.replay_movie(movie)
+    except chipped8.ExitInterpreterException:
+        mismatch = None
+        exited = True
+    seconds = time.perf_counter() - start
+
+    return {
+        'movie': fname,
+        'rom': rom_fname,
+        'interpreter': str(interpreter),
+        'frames': len(movie),
+        'exited': exited,
+        'mismatch': mismatch,
+        'seconds': seconds,
+        'fps': len(movie) / seconds if seconds > 0 else 0.0,
+    }
+
+def main():
+    args = parse_args()
+    roms = load_roms(args.roms)
+
+    ret = 0
+    for fname in args.movies:
+        try:
+            result = replay(fname, roms, args.interpreter, args.display, args.skip_idle)
+        except Exception as e:
+            print('Error: {0}: {1}'.format(fname, e), file=sys.stderr)
+            ret = 1
+            continue
+
+        if result['mismatch'] is not None:
+            ret = 1
+
+        if args.json:
+            print(json.dumps(result))
+        else:
+            status = 'ok' if result['mismatch'] is None else 'mismatch at frame {0}'.format(result['mismatch'])
+            print('{movie}: {status} frames={frames} seconds={seconds:.3f} fps={fps:.1f}'.format(status=status, **result))
+
+    return ret
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,7 +5,7 @@ from chipped8.core.platform import PlatformTypes
 from chipped8.core.interpreter import InterpreterTypes
 
 # Interpreter types
-interpreter_types = [InterpreterTypes.pure, InterpreterTypes.cachedo, InterpreterTypes.cachedlp, InterpreterTypes.cachedlh]
+interpreter_types = [InterpreterTypes.pure, InterpreterTypes.puret, InterpreterTypes.cachedo, InterpreterTypes.cachedlp, InterpreterTypes.cachedlh, InterpreterTypes.cachedc]
 
 # Platform types
 @pytest.fixture(params=interpreter_types)
@@ -0,0 +1,88 @@
+from chipped8.core.display import SCREEN_WIDTH, SCREEN_HEIGHT, ResolutionMode, Plane
+
+# -----------------------------
+# Reference display
+# -----------------------------
+#
+# The original one byte per pixel display. Kept as a straightforward model so
+# the optimized displays can be checked pixel for pixel against it.
+
+class ReferenceDisplay:
+
+    def __init__(self, res_mode=ResolutionMode.lowres, target_plane=Plane.p1):
+        self.planes = [ bytearray(SCREEN_WIDTH * SCREEN_HEIGHT), bytearray(SCREEN_WIDTH * SCREEN_HEIGHT) ]
+        self.res_mode = res_mode
+        self.target_plane = target_plane
+
+    def _set_pixel(self, plane_buffer, x, y):
+        unset = False
+        if self.res_mode == ResolutionMode.lowres:
+            points = [ ((x * 2 + i) % SCREEN_WIDTH, (y * 2 + j) % SCREEN_HEIGHT) for i in range(2) for j in range(2) ]
+        else:
+            points = [ (x % SCREEN_WIDTH, y % SCREEN_HEIGHT) ]
+
+        for col, row in points:
+            idx = col + row * SCREEN_WIDTH
+            if plane_buffer[idx] == 1:
+                unset = True
+            plane_buffer[idx] ^= 1
+        return unset
+
+    def _will_wrap(self, x1, y1, x2, y2):
+        s = 2 if self.res_mode == ResolutionMode.lowres else 1
+        return (x1 * s) % SCREEN_WIDTH > (x2 * s) % SCREEN_WIDTH or (y1 * s) % SCREEN_HEIGHT > (y2 * s) % SCREEN_HEIGHT
+
+    def draw(self, x, y, n, wrap, memory, I):
+        '''
+        Returns the VF value.
+        '''
+        vf = 0
+        for plane in self.target_plane:
+            buf = self.planes[0] if plane == Plane.p1 else self.planes[1]
+            if n == 0:
+                for i in range(16):
+                    sprite = (memory[I + i * 2] << 8) | memory[I + i * 2 + 1]
+                    for j in range(16):
+                        if sprite & (0x8000 >> j) and self._set_pixel(buf, x + j, y + i):
+                            vf = 1
+                I += 32
+            else:
+                for i in range(n):
+                    sprite = memory[I + i]
+                    for j in range(8):
+                        if sprite & (0x80 >> j) == 0:
+                            continue
+                        if not wrap and self._will_wrap(x, y, x + j, y + i):
+                            continue
+                        if self._set_pixel(buf, x + j, y + i):
+                            vf = 1
+                I += n
+        return vf
+
+    def _targets(self):
+        return [ self.planes[i] for i, p in enumerate((Plane.p1, Plane.p2)) if p & self.target_plane ]
+
+    def scroll_down(self, n):
+        n = n * 2 if self.res_mode == ResolutionMode.lowres else n
+        if n == 0:
+            return
+        for buf in self._targets():
+            buf[:] = bytearray(SCREEN_WIDTH * n) + buf[:-SCREEN_WIDTH * n]
+
+    def scroll_up(self, n):
+        n = n * 2 if self.res_mode == ResolutionMode.lowres else n
+        for buf in self._targets():
+            buf[:] = buf[SCREEN_WIDTH * n:] + bytearray(SCREEN_WIDTH * n)
+
+    def scroll_left(self):
+        n = 8 if self.res_mode == ResolutionMode.lowres else 4
+        for buf in self._targets():
+            buf[:] = b''.join(buf[r * SCREEN_WIDTH + n:(r + 1) * SCREEN_WIDTH] + bytearray(n) for r in range(SCREEN_HEIGHT))
+
+    def scroll_right(self):
+        n = 8 if self.res_mode == ResolutionMode.lowres else 4
+        for buf in self._targets():
+            buf[:] = b''.join(bytearray(n) + buf[r * SCREEN_WIDTH:(r + 1) * SCREEN_WIDTH - n] for r in range(SCREEN_HEIGHT))
+
+    def pixels(self):
+        return [ (p1 << 1) | p0 for p0, p1 in zip(self.planes[0], self.planes[1]) ]
@@ -0,0 +1,150 @@
+import json
+import random
+
+import pytest
+
+from chipped8 import analysis
+from chipped8.core.analysis import analyze_rom
+from chipped8.core.emulator import Emulator
+from chipped8.core.interpreter import InterpreterTypes
+from chipped8.core.platform import Platform, PlatformTypes
+from chipped8.benchmark import WORKLOADS
+from chipped8.benchmark.roms import assemble
+
+from .test_compiled import looping_rom
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+_ROM = assemble([
+    0x2208,         # 200: call 208
+    0x3000,         # 202: skip if V0 == 0
+    0xB300,         # 204: jump V0 + 300
+    0x5001,         # 206: invalid
+    0x4001,         # 208: skip if V0 != 1, skips the four bytes of F000
+    0xF000, 0x0216, # 20A: I = 0x216
+    0x2214,         # 20E: call 214
+    0x1400,         # 210: jump 400, past the ROM
+    0xFFFF,         # 212: data
+    0xA21A,         # 214: I = 0x21A
+    0xF055,         # 216: [I] = V0, writes code
+    0xA220,         # 218: I = 0x220
+    0xF033,         # 21A: [I] = BCD V0, writes data
+    0x00EE,         # 21C: return
+    0x0000,         # 21E: data
+    0x0000, 0x0000, # 220: data
+])
+
+def make_emulator(interpreter_type, rom, platform):
+    emu = Emulator(platform=platform, interpreter_type=interpreter_type, tickrate=100, seed=0)
+    emu.load_rom(rom)
+    return emu
+
+def quirks(platform=PlatformTypes.xochip):
+    return Platform(platform).quirks()
+
+# -----------------------------
+# Tests
+# -----------------------------
+
+def test_control_flow_graph():
+    cfg = analyze_rom(_ROM, quirks())
+
+    assert { start: (block.end, block.successors, block.calls) for start, block in cfg.blocks.items() } == {
+        0x200: (0x202, [ 0x202 ], [ 0x208 ]),
+        0x202: (0x204, [ 0x204, 0x206 ], []),
+        0x204: (0x206, [], []),
+        0x208: (0x20A, [ 0x20A, 0x20E ], []),
+        0x20A: (0x20E, [ 0x20E ], []),
+        0x20E: (0x210, [ 0x210 ], [ 0x214 ]),
+        0x210: (0x212, [ 0x400 ], []),
+        0x214: (0x21E, [], []),
+    }
+    assert cfg.blocks[0x204].indirect
+    assert cfg.indirect == [ 0x204 ]
+    assert cfg.invalid == [ 0x206 ]
+    assert cfg.external == [ 0x400 ]
+
+    assert cfg.functions == { 0x200: [ 0x200, 0x202, 0x204 ], 0x208: [ 0x208, 0x20A, 0x20E, 0x210 ], 0x214: [ 0x214 ] }
+    assert cfg.call_graph == { 0x200: [ 0x208 ], 0x208: [ 0x214 ], 0x214: [] }
+
+def test_code_and_data():
+    cfg = analyze_rom(_ROM, quirks())
+
+    assert cfg.code_ranges() == [ (0x200, 0x206), (0x208, 0x212), (0x214, 0x21E) ]
+    assert cfg.data_ranges() == [ (0x206, 0x208), (0x212, 0x214), (0x21E, 0x224) ]
+    assert cfg.data_refs == [ 0x216, 0x21A, 0x220 ]
+    # Only the write to code is reported. The BCD goes to data.
+    assert cfg.self_modifying == [ (0x216, 0x21A) ]
+
+def test_workloads():
+    for workload in WORKLOADS:
+        cfg = analyze_rom(workload.rom, quirks(workload.platform))
+        assert cfg.data_ranges() == []
+        assert cfg.invalid == []
+        if workload.name == 'self-modifying':
+            assert cfg.self_modifying == [ (0x206, 0x20B) ]
+        else:
+            assert cfg.self_modifying == []
+
+    cfg = analyze_rom(next(w for w in WORKLOADS if w.name == 'double-wide').rom, quirks())
+    assert cfg.blocks[0x206].successors == [ 0x208, 0x20C ]
+    assert cfg.blocks[0x208].end == 0x20C
+    assert cfg.data_refs == [ 0x1234, 0x5678, 0x9ABC ]
+
+def test_unknown_write_address():
+    # I isn't known after FX1E so the write might be to code.
+    rom = assemble([ 0xA300, 0xF01E, 0xF055, 0x1200 ])
+    cfg = analyze_rom(rom, quirks())
+    assert cfg.self_modifying == [ (0x204, None) ]
+
+@pytest.mark.parametrize('name', ['alu', 'draw', 'double-wide', 'scroll'])
+def test_prebuilt_blocks_are_used(interpreter_type, name):
+    if interpreter_type in (InterpreterTypes.pure, InterpreterTypes.puret):
+        pytest.skip('pure has no blocks')
+
+    workload = next(w for w in WORKLOADS if w.name == name)
+    emu = make_emulator(interpreter_type, workload.rom, workload.platform)
+    ref = make_emulator(interpreter_type, workload.rom, workload.platform)
+
+    assert emu.prebuild_blocks() == len(analyze_rom(workload.rom, quirks(workload.platform)).blocks)
+    built = emu.cache_stats()['blocks_built']
+    for _ in range(5):
+        emu.process_frame()
+        ref.process_frame()
+
+    assert emu.get_state() == ref.get_state()
+    assert emu.cache_stats()['blocks_built'] - built < ref.cache_stats()['blocks_built']
+    if interpreter_type in (InterpreterTypes.cachedlp, InterpreterTypes.cachedlh):
+        # These end blocks on the same instructions so nothing is left to build.
+        assert emu.cache_stats()['blocks_built'] == built
+
+def test_prebuilt_matches_lazy(interpreter_type):
+    rng = random.Random(f'prebuild-{interpreter_type}')
+    compared = 0
+
+    for _ in range(40):
+        rom = looping_rom(rng, rng.choice([8, 16, 32]), code_writes=rng.randrange(2) == 1)
+        try:
+            emu = make_emulator(interpreter_type, rom, PlatformTypes.xochip)
+            ref = make_emulator(interpreter_type, rom, PlatformTypes.xochip)
+            emu.prebuild_blocks()
+            emu._cpu.run(500, False)
+            ref._cpu.run(500, False)
+        except Exception:
+            continue
+        assert emu.get_state() == ref.get_state()
+        compared += 1
+
+    assert compared > 10
+
+def test_cli_json(tmp_path, capsys, monkeypatch):
+    path = tmp_path / 'rom.ch8'
+    path.write_bytes(_ROM)
+    monkeypatch.setattr('sys.argv', [ 'chipped8-analyze', '-p', 'xochip', '--json', str(path) ])
+
+    assert analysis.main() == 0
+    result = json.loads(capsys.readouterr().out)
+    assert result['call_graph'] == { '512': [ 0x208 ], '520': [ 0x214 ], '532': [] }
+    assert result['self_modifying'] == [ { 'pc': 0x216, 'address': 0x21A } ]
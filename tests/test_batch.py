@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+from chipped8.core.batch import BatchEmulator
+from chipped8.core.emulator import Emulator
+from chipped8.core.keys import Keys, KeyState
+from chipped8.core.platform import PlatformTypes
+from chipped8.benchmark import WORKLOADS
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+def random_opcode(rng):
+    x = rng.randrange(16)
+    y = rng.randrange(16)
+    n = rng.randrange(16)
+    nn = rng.randrange(256)
+    addr = 0x200 + (rng.randrange(256) * 2)
+    # Unknown opcodes halt so they're kept rare.
+    if rng.randrange(100) == 0:
+        return rng.choice([ 0xFFFF, 0x8009 | (x << 8), 0x00FD ])
+    return rng.choice([
+        0x00C0 | n, 0x00D0 | n, 0x00E0, 0x00EE, 0x00FB, 0x00FC, 0x00FE, 0x00FF,
+        0x1000 | addr, 0x2000 | addr, 0x3000 | (x << 8) | nn, 0x4000 | (x << 8) | nn,
+        0x5000 | (x << 8) | (y << 4), 0x5002 | (x << 8) | (y << 4), 0x5003 | (x << 8) | (y << 4),
+        0x6000 | (x << 8) | nn, 0x7000 | (x << 8) | nn, 0xC000 | (x << 8) | nn,
+        0x8000 | (x << 8) | (y << 4) | rng.choice([0x0, 0x1, 0x2, 0x3, 0x4, 0x5, 0x6, 0x7, 0xE]),
+        0x9000 | (x << 8) | (y << 4), 0xA000 | rng.randrange(0x200, 0x1000), 0xD000 | (x << 8) | (y << 4) | n,
+        0xE09E | (x << 8), 0xE0A1 | (x << 8), 0xF000, 0xF001 | (rng.randrange(4) << 8), 0xF002,
+        0xF007 | (x << 8), 0xF00A | (x << 8), 0xF015 | (x << 8), 0xF018 | (x << 8), 0xF029 | (x << 8),
+        0xF030 | (x << 8), 0xF033 | (x << 8), 0xF03A | (x << 8), 0xF055 | (x << 8), 0xF065 | (x << 8),
+        0xF075 | (x << 8), 0xF085 | (x << 8),
+    ])
+
+def random_emulator(rng, platform):
+    emu = Emulator(platform=platform, seed=0)
+    emu.load_rom(b''.join(random_opcode(rng).to_bytes(2, 'big') for _ in range(1024)))
+    for key in Keys:
+        if rng.randrange(4) == 0:
+            emu.set_key_state(key, KeyState.down)
+    return emu
+
+# -----------------------------
+# Tests
+# -----------------------------
+
+@pytest.mark.parametrize('platform', [PlatformTypes.xochip, PlatformTypes.superchip, PlatformTypes.originalChip8])
+def test_batch_matches_emulator(platform):
+    rng = random.Random(f'batch-{platform}')
+    emulators = [ random_emulator(rng, platform) for _ in range(64) ]
+    batch = BatchEmulator(len(emulators), platform=platform)
+    for i, emu in enumerate(emulators):
+        batch.set_state(emu.get_state(), i)
+        for key in Keys:
+            batch.set_key_state(i, key, emu._keys.get_key_state(key))
+
+    running = list(range(len(emulators)))
+    compared = 0
+    for _ in range(200):
+        batch.step()
+        halted = batch.halted()
+        for i in list(running):
+            try:
+                emulators[i]._cpu.execute_next_op()
+            except Exception:
+                # Anything the emulator raises halts the instance.
+                assert halted[i]
+                running.remove(i)
+                continue
+            assert not halted[i]
+            assert batch.get_state(i) == emulators[i].get_state()
+            compared += 1
+    assert compared > 1500
+
+@pytest.mark.parametrize('name', [ w.name for w in WORKLOADS ])
+def test_batch_frames_match_emulator(name):
+    workload = next(w for w in WORKLOADS if w.name == name)
+    batch = BatchEmulator(3, platform=workload.platform, tickrate=100, seed=0)
+    batch.load_rom(workload.rom)
+    emu = Emulator(platform=workload.platform, tickrate=100, seed=0)
+    emu.load_rom(workload.rom)
+
+    for _ in range(20):
+        assert batch.process_frame() == emu.process_frame() * 3
+    for i in range(3):
+        assert batch.get_state(i) == emu.get_state()
+        assert (batch.screen_buffer(i) == emu.screen_buffer()).all()
@@ -0,0 +1,186 @@
+import json
+import os
+import random
+
+import pytest
+
+from chipped8.core.block_cache import BlockCache, BLOCK_CACHE_SUFFIX
+from chipped8.core.emulator import Emulator
+from chipped8.core.interpreter import InterpreterTypes
+from chipped8.core.platform import PlatformTypes
+from chipped8.benchmark import WORKLOADS
+
+from .test_compiled import looping_rom
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+def make_emulator(interpreter_type, rom, platform=PlatformTypes.xochip):
+    emu = Emulator(platform=platform, interpreter_type=interpreter_type, tickrate=100, seed=0)
+    emu.load_rom(rom)
+    return emu
+
+def workload_emulator(interpreter_type, name):
+    workload = next(w for w in WORKLOADS if w.name == name)
+    return make_emulator(interpreter_type, workload.rom, workload.platform)
+
+def run_frames(emu, frames):
+    for _ in range(frames):
+        emu.process_frame()
+
+def skip_pure(interpreter_type):
+    if interpreter_type in (InterpreterTypes.pure, InterpreterTypes.puret):
+        pytest.skip('pure has no blocks')
+
+# -----------------------------
+# Tests
+# -----------------------------
+
+@pytest.mark.parametrize('name', ['alu', 'draw', 'double-wide'])
+def test_warm_start_builds_saved_blocks(interpreter_type, tmp_path, name):
+    skip_pure(interpreter_type)
+    cache = BlockCache(tmp_path)
+
+    cold = workload_emulator(interpreter_type, name)
+    assert cache.load(cold) == 0
+    run_frames(cold, 5)
+    saved = cache.save(cold)
+    assert saved > 0
+    built = cold.cache_stats()['blocks_built']
+
+    warm = workload_emulator(interpreter_type, name)
+    assert cache.load(warm) == saved
+    preloaded = warm.cache_stats()['blocks_built']
+    assert preloaded > 0
+    run_frames(warm, 5)
+
+    # Everything the cold run built from the ROM was ready before running.
+    assert warm.cache_stats()['blocks_built'] - preloaded < built
+    assert warm.get_state() == cold.get_state()
+
+def test_warm_start_matches_cold(interpreter_type, tmp_path):
+    skip_pure(interpreter_type)
+    rng = random.Random(f'block-cache-{interpreter_type}')
+    cache = BlockCache(tmp_path)
+    compared = 0
+
+    for _ in range(40):
+        rom = looping_rom(rng, rng.choice([8, 16, 32]), code_writes=rng.randrange(2) == 1)
+        try:
+            first = make_emulator(interpreter_type, rom)
+            first._cpu.run(300, False)
+            cache.save(first)
+
+            cold = make_emulator(interpreter_type, rom)
+            warm = make_emulator(interpreter_type, rom)
+            cache.load(warm)
+            cold._cpu.run(500, False)
+            warm._cpu.run(500, False)
+        except Exception:
+            continue
+        assert warm.get_state() == cold.get_state()
+        compared += 1
+
+    assert compared > 10
+
+def test_pure_saves_nothing(tmp_path):
+    cache = BlockCache(tmp_path)
+    emu = workload_emulator(InterpreterTypes.pure, 'alu')
+    run_frames(emu, 2)
+    assert cache.save(emu) == 0
+    assert list(tmp_path.iterdir()) == []
+
+def test_keyed_by_rom_quirks_and_interpreter():
+    rom = bytes.fromhex('60016102')
+    keys = {
+        make_emulator(InterpreterTypes.cachedlp, rom).block_cache_key(),
+        make_emulator(InterpreterTypes.cachedlp, rom + b'\x00\xE0').block_cache_key(),
+        make_emulator(InterpreterTypes.cachedlp, rom, PlatformTypes.superchip).block_cache_key(),
+        make_emulator(InterpreterTypes.cachedc, rom).block_cache_key(),
+    }
+    assert len(keys) == 4
+
+def test_written_code_is_not_saved(tmp_path):
+    # V0 = 0, I = 0x209, jump to 0x206, store V0 over the jump at 0x208
+    # which now goes to 0x200.
+    rom = bytes.fromhex('6000A2091206F0551206')
+    emu = make_emulator(InterpreterTypes.cachedlp, rom)
+    emu._cpu.run(20, False)
+
+    assert [ pc for (pc, _, _) in emu.block_layout() ] == [ 0x200 ]
+
+def test_damaged_files_are_ignored(tmp_path):
+    cache = BlockCache(tmp_path)
+    workload = next(w for w in WORKLOADS if w.name == 'alu')
+    emu = workload_emulator(InterpreterTypes.cachedlp, 'alu')
+    run_frames(emu, 2)
+    cache.save(emu)
+    (path,) = tmp_path.glob(f'*{BLOCK_CACHE_SUFFIX}')
+    data = json.loads(path.read_text())
+
+    # Not JSON.
+    path.write_text('{"version"')
+    assert cache.load(workload_emulator(InterpreterTypes.cachedlp, 'alu')) == 0
+
+    # Another version.
+    path.write_text(json.dumps(dict(data, version=0)))
+    assert cache.load(workload_emulator(InterpreterTypes.cachedlp, 'alu')) == 0
+
+    # Instructions that don't line up with the data or bytes that don't match
+    # memory are skipped, the rest are built.
+    blocks = data['blocks']
+    bad_instrs = dict(blocks[0], instrs=[ [ blocks[0]['pc'] + 1, 'NOP' ] ])
+    bad_data = dict(blocks[0], data='ff' * (len(blocks[0]['data']) // 2))
+    path.write_text(json.dumps(dict(data, blocks=[ bad_instrs, bad_data ] + blocks[1:])))
+    assert cache.load(workload_emulator(InterpreterTypes.cachedlp, 'alu')) == len(blocks) - 1
+
+    warm = workload_emulator(InterpreterTypes.cachedlp, 'alu')
+    cold = make_emulator(InterpreterTypes.cachedlp, workload.rom, workload.platform)
+    path.write_text(json.dumps(dict(data, blocks=[ bad_instrs, bad_data ])))
+    assert cache.load(warm) == 0
+    run_frames(warm, 2)
+    run_frames(cold, 2)
+    assert warm.get_state() == cold.get_state()
+
+def test_evicts_least_recently_used(tmp_path):
+    roms = [ bytes.fromhex(f'60{i:02X}70011202') for i in range(4) ]
+    paths = []
+    for (i, rom) in enumerate(roms):
+        emu = make_emulator(InterpreterTypes.cachedlp, rom)
+        emu._cpu.run(50, False)
+        BlockCache(tmp_path).save(emu)
+        path = tmp_path / f'{emu.block_cache_key()}{BLOCK_CACHE_SUFFIX}'
+        os.utime(path, (i, i))
+        paths.append(path)
+
+    sizes = [ path.stat().st_size for path in paths ]
+    cache = BlockCache(tmp_path, max_size=sizes[0] + sizes[3])
+    # Loading marks the oldest as used so it's kept.
+    cache.load(make_emulator(InterpreterTypes.cachedlp, roms[0]))
+    cache._evict()
+    assert [ path.exists() for path in paths ] == [ True, False, False, True ]
+
+    cache.clear()
+    assert list(tmp_path.glob(f'*{BLOCK_CACHE_SUFFIX}')) == []
+
+def test_layouts_that_dont_decode_are_ignored(interpreter_type):
+    skip_pure(interpreter_type)
+    # V0 = 1, jump 206, V0 = 3, V1 += 1, jump 206.
+    rom = bytes.fromhex('600112066003710112066000')
+    bad = [
+        # 6001 isn't double wide so 1206 would be skipped.
+        (0x200, rom[0:12], [ (0x200, 'DOUBLE_WIDE'), (0x204, 'OPERATION'), (0x206, 'OPERATION'), (0x208, 'JUMP') ]),
+        # Running on past the jump would set V0 = 3.
+        (0x200, rom[0:12], [ (0x200, 'OPERATION'), (0x202, 'JUMP'), (0x204, 'OPERATION'), (0x206, 'OPERATION'), (0x208, 'JUMP') ]),
+    ]
+
+    warm = make_emulator(interpreter_type, rom)
+    cold = make_emulator(interpreter_type, rom)
+    built = warm.preload_blocks(bad)
+    if interpreter_type == InterpreterTypes.cachedlh:
+        assert built == 0
+    warm._cpu.run(50, False)
+    cold._cpu.run(50, False)
+    assert warm._registers.get_V(0) == 1
+    assert warm.get_state() == cold.get_state()
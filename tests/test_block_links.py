@@ -0,0 +1,128 @@
+import random
+
+import pytest
+
+from chipped8.core.emulator import Emulator
+from chipped8.core.interpreter import InterpreterTypes
+from chipped8.core.platform import PlatformTypes
+from chipped8.core.cpu.cached.block import Block
+from chipped8.benchmark import WORKLOADS
+
+from .test_compiled import looping_rom
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+class CountingDict(dict):
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.lookups = 0
+
+    def get(self, *args):
+        self.lookups += 1
+        return super().get(*args)
+
+def block_cache_owner(cpu):
+    for name in ('_emitter', '_block_emitter'):
+        if hasattr(cpu, name):
+            return getattr(cpu, name)
+    return cpu
+
+def invalidate_writes(cpu):
+    owner = block_cache_owner(cpu)
+    if owner is cpu:
+        cpu._invalidate_writes()
+    else:
+        owner.invalidate_writes(cpu._memory)
+
+def make_emulator(interpreter_type, name):
+    workload = next(w for w in WORKLOADS if w.name == name)
+    emu = Emulator(platform=workload.platform, interpreter_type=interpreter_type, tickrate=200, seed=0)
+    emu.load_rom(workload.rom)
+    return emu
+
+# -----------------------------
+# Tests
+# -----------------------------
+
+def test_block_links():
+    a = Block([ (0x200, None) ])
+    b = Block([ (0x202, None) ])
+    c = Block([ (0x204, None) ])
+    d = Block([ (0x206, None) ])
+    assert a.successor(0x202) is None
+
+    a.link(0x202, b)
+    a.link(0x204, c)
+    assert a.successor(0x202) is b
+    assert a.successor(0x204) is c
+    assert a.successor(0x206) is None
+
+    # The second link is replaced, the first is kept.
+    a.link(0x206, d)
+    assert a.successor(0x202) is b
+    assert a.successor(0x204) is None
+    assert a.successor(0x206) is d
+
+    # Invalid blocks aren't followed and their link is reused.
+    b.valid = False
+    assert a.successor(0x202) is None
+    a.link(0x204, c)
+    assert a.successor(0x204) is c
+    assert a.successor(0x206) is d
+
+    copy = a.copy()
+    assert copy.instrs is a.instrs
+    assert copy.successor(0x204) is None
+
+@pytest.mark.parametrize('name', ['alu', 'draw', 'double-wide'])
+def test_hot_loops_follow_links(interpreter_type, name):
+    if interpreter_type in (InterpreterTypes.pure, InterpreterTypes.puret):
+        pytest.skip('pure has no blocks')
+
+    emu = make_emulator(interpreter_type, name)
+    for _ in range(3):
+        emu.process_frame()
+
+    owner = block_cache_owner(emu._cpu)
+    owner._block_cache = CountingDict(owner._block_cache)
+    for _ in range(3):
+        emu.process_frame()
+    assert owner._block_cache.lookups == 0
+
+def test_forks_keep_separate_links(interpreter_type):
+    rng = random.Random('links')
+    compared = 0
+
+    for _ in range(60):
+        rom = looping_rom(rng, rng.choice([16, 32]), code_writes=True)
+        emus = []
+        for it in (InterpreterTypes.pure, interpreter_type):
+            emu = Emulator(platform=PlatformTypes.xochip, interpreter_type=it, tickrate=100, seed=0)
+            emu.load_rom(rom)
+            emus.append(emu)
+
+        try:
+            for emu in emus:
+                emu._cpu.run(200, False)
+            forks = [ emu.fork() for emu in emus ]
+            # The originals change code the forks don't see. Only the blocks
+            # overwritten are dropped so the rest stay linked.
+            for emu in emus[1:]:
+                emu._cpu.sync()
+                emu._memory.set_range(0x200, bytes.fromhex('60016102'))
+                if interpreter_type not in (InterpreterTypes.pure, InterpreterTypes.puret):
+                    invalidate_writes(emu._cpu)
+            emus[0]._memory.set_range(0x200, bytes.fromhex('60016102'))
+            for emu in emus + forks:
+                emu._cpu.run(300, False)
+        except Exception:
+            continue
+
+        assert forks[1].get_state() == forks[0].get_state()
+        assert emus[1].get_state() == emus[0].get_state()
+        compared += 1
+
+    assert compared > 5
@@ -0,0 +1,112 @@
+import random
+
+import pytest
+
+from chipped8.core.emulator import Emulator
+from chipped8.core.interpreter import InterpreterTypes
+from chipped8.core.keys import Keys, KeyState
+from chipped8.core.platform import PlatformTypes
+from chipped8.core.cpu.cached.compiled.emitter import COMPILE_THRESHOLD
+from chipped8.benchmark import WORKLOADS
+
+from .test_batch import random_opcode
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+def looping_rom(rng, length, code_writes=False):
+    # Jumps stay within the program so blocks run often enough to be compiled.
+    # I can also be pointed into the program so it writes over its own code.
+    ops = []
+    for _ in range(length - 1):
+        opcode = random_opcode(rng)
+        if opcode & 0xF000 in (0x1000, 0x2000):
+            opcode = (opcode & 0xF000) | (0x200 + rng.randrange(length) * 2)
+        if code_writes and rng.randrange(3) == 0:
+            x = rng.randrange(16)
+            opcode = rng.choice([ 0xA000 | (0x200 + rng.randrange(length * 2)), 0xF055 | (x << 8), 0xF033 | (x << 8), 0x5002 | (x << 8) ])
+        ops.append(opcode)
+    ops.append(0x1200)
+    return b''.join(op.to_bytes(2, 'big') for op in ops)
+
+def make_pair(rom, platform, tickrate=100):
+    emus = []
+    for interpreter_type in (InterpreterTypes.pure, InterpreterTypes.cachedc):
+        emu = Emulator(platform=platform, interpreter_type=interpreter_type, tickrate=tickrate, seed=0)
+        emu.load_rom(rom)
+        emus.append(emu)
+    return emus
+
+def run(emu, max_ops, stop_on_draw):
+    try:
+        return emu._cpu.run(max_ops, stop_on_draw)
+    except Exception:
+        # Unknown opcodes raise different exceptions depending on the interpreter.
+        return None
+
+# -----------------------------
+# Tests
+# -----------------------------
+
+@pytest.mark.parametrize('platform', [PlatformTypes.xochip, PlatformTypes.superchip, PlatformTypes.originalChip8])
+def test_random_programs_match_pure(platform):
+    rng = random.Random(f'compiled-{platform}')
+    compared = 0
+    blocks_compiled = 0
+    for _ in range(100):
+        rom = looping_rom(rng, 32)
+        pure, compiled = make_pair(rom, platform)
+        for key in Keys:
+            if rng.randrange(4) == 0:
+                pure.set_key_state(key, KeyState.down)
+                compiled.set_key_state(key, KeyState.down)
+
+        for _ in range(30):
+            # Uneven budgets run blocks partly as well as whole.
+            max_ops = rng.randrange(1, 40)
+            stop_on_draw = rng.randrange(2) == 1
+            ret = run(pure, max_ops, stop_on_draw)
+            assert run(compiled, max_ops, stop_on_draw) == ret
+            if ret is None:
+                break
+            assert compiled.get_state() == pure.get_state()
+            compared += 1
+        blocks_compiled += compiled._cpu._emitter.blocks_compiled
+    assert compared > 300
+    assert blocks_compiled > 100
+
+@pytest.mark.parametrize('name', [ w.name for w in WORKLOADS ])
+def test_workload_frames_match_pure(name):
+    workload = next(w for w in WORKLOADS if w.name == name)
+    pure, compiled = make_pair(workload.rom, workload.platform)
+
+    for _ in range(30):
+        assert compiled.process_frame() == pure.process_frame()
+        assert compiled.get_state() == pure.get_state()
+    assert compiled._cpu._emitter.blocks_compiled > 0
+
+def test_single_step_and_run_mix():
+    workload = next(w for w in WORKLOADS if w.name == 'alu')
+    pure, compiled = make_pair(workload.rom, workload.platform)
+
+    for i in range(200):
+        if i % 3 == 0:
+            compiled._cpu.execute_next_op()
+            pure._cpu.execute_next_op()
+        else:
+            assert compiled._cpu.run(i % 17, False) == pure._cpu.run(i % 17, False)
+    assert compiled.get_state() == pure.get_state()
+
+def test_compiled_code_reused_after_clear():
+    workload = next(w for w in WORKLOADS if w.name == 'alu')
+    _, compiled = make_pair(workload.rom, workload.platform)
+    for _ in range(COMPILE_THRESHOLD + 2):
+        compiled.process_frame()
+
+    emitter = compiled._cpu._emitter
+    compiled_before = emitter.blocks_compiled
+    compiled._cpu.clear_cache()
+    for _ in range(COMPILE_THRESHOLD + 2):
+        compiled.process_frame()
+    assert emitter.blocks_compiled == compiled_before
@@ -0,0 +1,296 @@
+import random
+
+from copy import deepcopy
+
+import numpy as np
+import pytest
+
+from chipped8.core.display import ResolutionMode, Plane, SCREEN_WIDTH, SCREEN_HEIGHT
+from chipped8.core.memory import Memory
+from chipped8.core.registers import Registers
+from chipped8.core.display_types import DisplayTypes, get_display
+
+from .display_reference import ReferenceDisplay
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+@pytest.fixture(params=list(DisplayTypes))
+def display_type(request):
+    return request.param
+
+def make_display(display_type, res_mode, target_plane):
+    display = get_display(display_type)()
+    display.resmode = res_mode
+    display.plane = target_plane
+    return display
+
+def random_memory(rng):
+    memory = Memory()
+    data = bytes(rng.randrange(256) for _ in range(256))
+    memory._memory[0x300:0x300 + len(data)] = data
+    return memory
+
+def assert_same(display, ref):
+    pixels = display.get_pixels()
+    assert pixels.shape == (SCREEN_HEIGHT, SCREEN_WIDTH)
+    assert pixels.dtype == np.uint8
+    assert pixels.flatten().tolist() == ref.pixels()
+
+# -----------------------------
+# Tests
+# -----------------------------
+
+@pytest.mark.parametrize('res_mode', [ResolutionMode.lowres, ResolutionMode.hires])
+@pytest.mark.parametrize('target_plane', [Plane.p1, Plane.p2, Plane.p1 | Plane.p2])
+@pytest.mark.parametrize('wrap', [False, True])
+def test_draw_matches_reference(display_type, res_mode, target_plane, wrap):
+    rng = random.Random(f'{res_mode}-{target_plane}-{wrap}')
+    display = make_display(display_type, res_mode, target_plane)
+    ref = ReferenceDisplay(res_mode, target_plane)
+    memory = random_memory(rng)
+    registers = Registers()
+
+    for _ in range(60):
+        x = rng.randrange(256)
+        y = rng.randrange(256)
+        n = rng.randrange(16)
+        I = 0x300 + rng.randrange(64)
+        registers.set_I(I)
+
+        display.draw(x, y, n, wrap, registers, memory)
+        vf = ref.draw(x, y, n, wrap, memory._memory, I)
+
+        assert registers.get_V(0xF) == vf
+        assert_same(display, ref)
+
+@pytest.mark.parametrize('res_mode', [ResolutionMode.lowres, ResolutionMode.hires])
+@pytest.mark.parametrize('target_plane', [Plane.p1, Plane.p2, Plane.p1 | Plane.p2])
+def test_scroll_matches_reference(display_type, res_mode, target_plane):
+    rng = random.Random(f'scroll-{res_mode}-{target_plane}')
+    display = make_display(display_type, res_mode, Plane.p1 | Plane.p2)
+    ref = ReferenceDisplay(res_mode, Plane.p1 | Plane.p2)
+    memory = random_memory(rng)
+    registers = Registers()
+
+    # Fill both planes so scrolling has something to move.
+    for _ in range(30):
+        x = rng.randrange(128)
+        y = rng.randrange(64)
+        registers.set_I(0x300)
+        display.draw(x, y, 0, True, registers, memory)
+        ref.draw(x, y, 0, True, memory._memory, 0x300)
+    display.plane = target_plane
+    ref.target_plane = target_plane
+
+    for _ in range(20):
+        op = rng.randrange(4)
+        if op == 0:
+            n = rng.randrange(16)
+            display.scroll_down(n)
+            ref.scroll_down(n)
+        elif op == 1:
+            n = rng.randrange(16)
+            display.scroll_up(n)
+            ref.scroll_up(n)
+        elif op == 2:
+            display.scroll_left()
+            ref.scroll_left()
+        else:
+            display.scroll_right()
+            ref.scroll_right()
+        assert_same(display, ref)
+
+def test_draw_sets_screen_changed(display_type):
+    display = get_display(display_type)()
+    memory = Memory()
+    registers = Registers()
+
+    display.screen_updated()
+    registers.set_I(0x300)
+    # Blank sprite doesn't change anything.
+    display.draw(0, 0, 4, False, registers, memory)
+    assert not display.screen_changed()
+
+    memory._memory[0x300] = 0x80
+    display.draw(0, 0, 1, False, registers, memory)
+    assert display.screen_changed()
+
+def test_deepcopy_is_independent(display_type):
+    display = get_display(display_type)()
+    memory = Memory()
+    registers = Registers()
+    memory._memory[0x300] = 0xFF
+    registers.set_I(0x300)
+
+    copy = deepcopy(display)
+    display.draw(0, 0, 1, False, registers, memory)
+    assert display.get_pixels().any()
+    assert not copy.get_pixels().any()
+
+def test_get_pixels_is_persistent_view(display_type):
+    display = get_display(display_type)()
+    memory = Memory()
+    registers = Registers()
+    memory._memory[0x300:0x302] = b'\xF0\x0F'
+    registers.set_I(0x300)
+
+    pixels = display.get_pixels()
+    assert not pixels.flags.writeable
+    with pytest.raises(ValueError):
+        pixels[0, 0] = 1
+
+    display.draw(1, 1, 2, False, registers, memory)
+    display.scroll_right()
+    display.draw(3, 5, 2, False, registers, memory)
+    assert display.get_pixels() is pixels
+
+    ref = ReferenceDisplay()
+    ref.draw(1, 1, 2, False, memory._memory, 0x300)
+    ref.scroll_right()
+    ref.draw(3, 5, 2, False, memory._memory, 0x300)
+    assert pixels.flatten().tolist() == ref.pixels()
+
+    out = np.full((SCREEN_HEIGHT, SCREEN_WIDTH), 9, dtype=np.uint8)
+    assert display.get_pixels(out) is out
+    assert np.array_equal(out, pixels)
+
+def test_dirty_regions(display_type):
+    display = make_display(display_type, ResolutionMode.hires, Plane.p1)
+    memory = Memory()
+    registers = Registers()
+    memory._memory[0x300:0x303] = b'\xFF\xFF\xFF'
+    registers.set_I(0x300)
+
+    assert display.get_dirty_regions() == [ (0, 0, SCREEN_WIDTH, SCREEN_HEIGHT) ]
+    display.screen_updated()
+    assert display.get_dirty_regions() == []
+
+    display.draw(10, 5, 3, False, registers, memory)
+    display.draw(40, 30, 1, False, registers, memory)
+    assert display.get_dirty_regions() == [ (10, 5, 8, 3), (40, 30, 8, 1) ]
+    display.screen_updated()
+
+    # Wrapping across the right edge dirties both edges of the row.
+    display.draw(124, 63, 2, True, registers, memory)
+    assert display.get_dirty_regions() == [ (0, 0, SCREEN_WIDTH, 1), (0, 63, SCREEN_WIDTH, 1) ]
+    display.screen_updated()
+
+    display.scroll_left()
+    assert display.get_dirty_regions() == [ (0, 0, SCREEN_WIDTH, SCREEN_HEIGHT) ]
+
+def test_new_display_is_all_dirty(display_type):
+    display = get_display(display_type)()
+    assert display.screen_changed()
+    assert display.get_dirty_regions() == [ (0, 0, SCREEN_WIDTH, SCREEN_HEIGHT) ]
+
+    # A sprite drawn before the first blit doesn't shrink it.
+    memory = Memory()
+    registers = Registers()
+    memory._memory[0x300] = 0x80
+    registers.set_I(0x300)
+    display.draw(0, 0, 1, False, registers, memory)
+    assert display.get_dirty_regions() == [ (0, 0, SCREEN_WIDTH, SCREEN_HEIGHT) ]
+
+def test_dirty_regions_cover_changes(display_type):
+    rng = random.Random('regions')
+    display = make_display(display_type, ResolutionMode.lowres, Plane.p1 | Plane.p2)
+    memory = random_memory(rng)
+    registers = Registers()
+    display.screen_updated()
+
+    for _ in range(50):
+        before = display.get_pixels().copy()
+        registers.set_I(0x300 + rng.randrange(64))
+        display.draw(rng.randrange(256), rng.randrange(256), rng.randrange(16), rng.randrange(2) == 1, registers, memory)
+
+        covered = np.zeros((SCREEN_HEIGHT, SCREEN_WIDTH), dtype=bool)
+        for x, y, w, h in display.get_dirty_regions():
+            covered[y:y+h, x:x+w] = True
+        assert not (before != display.get_pixels())[~covered].any()
+        display.screen_updated()
+
+@pytest.mark.parametrize('res_mode', [ResolutionMode.lowres, ResolutionMode.hires])
+@pytest.mark.parametrize('fill_plane', [Plane.p1, Plane.p2, Plane.p1 | Plane.p2])
+@pytest.mark.parametrize('target_plane', [Plane.p1, Plane.p2, Plane.p1 | Plane.p2])
+def test_scroll_with_pending_draws(display_type, res_mode, fill_plane, target_plane):
+    rng = random.Random(f'pending-{res_mode}-{fill_plane}-{target_plane}')
+    display = make_display(display_type, res_mode, fill_plane)
+    ref = ReferenceDisplay(res_mode, fill_plane)
+    memory = random_memory(rng)
+    registers = Registers()
+
+    for _ in range(10):
+        x = rng.randrange(128)
+        y = rng.randrange(64)
+        registers.set_I(0x300)
+        display.draw(x, y, 0, True, registers, memory)
+        ref.draw(x, y, 0, True, memory._memory, 0x300)
+    display.get_pixels()
+    display.plane = target_plane
+    ref.target_plane = target_plane
+
+    # Draws between scrolls leave rows waiting to be rebuilt when the
+    # framebuffer is moved. Pixels are only checked every few operations.
+    for step in range(40):
+        op = rng.randrange(5)
+        if op == 0:
+            n = rng.randrange(16)
+            display.scroll_down(n)
+            ref.scroll_down(n)
+        elif op == 1:
+            n = rng.randrange(16)
+            display.scroll_up(n)
+            ref.scroll_up(n)
+        elif op == 2:
+            display.scroll_left()
+            ref.scroll_left()
+        elif op == 3:
+            display.scroll_right()
+            ref.scroll_right()
+        else:
+            x = rng.randrange(256)
+            y = rng.randrange(256)
+            n = rng.randrange(16)
+            I = 0x300 + rng.randrange(64)
+            registers.set_I(I)
+            display.draw(x, y, n, False, registers, memory)
+            ref.draw(x, y, n, False, memory._memory, I)
+
+        if step % 4 == 3:
+            assert_same(display, ref)
+    assert_same(display, ref)
+
+def test_state_matches_between_engines():
+    rng = random.Random('state')
+    memory = random_memory(rng)
+    registers = Registers()
+    displays = [ make_display(t, ResolutionMode.hires, Plane.p1 | Plane.p2) for t in DisplayTypes ]
+
+    for _ in range(20):
+        x = rng.randrange(256)
+        y = rng.randrange(256)
+        n = rng.randrange(16)
+        scroll = rng.randrange(4)
+        for display in displays:
+            registers.set_I(0x300)
+            display.draw(x, y, n, False, registers, memory)
+            display.scroll_down(scroll)
+        states = [ d.get_state() for d in displays ]
+        assert states[0] == states[1]
+
+    restored = get_display(DisplayTypes.packed)()
+    restored.set_state(displays[1].get_state())
+    assert np.array_equal(restored.get_pixels(), displays[1].get_pixels())
+
+@pytest.mark.parametrize('res_mode', [ResolutionMode.lowres, ResolutionMode.hires])
+@pytest.mark.parametrize('target_plane', [Plane.p1, Plane.p2, Plane.p1 | Plane.p2])
+def test_draw_past_end_of_memory(display_type, res_mode, target_plane):
+    memory = Memory()
+    registers = Registers()
+    display = make_display(display_type, res_mode, target_plane)
+
+    registers.set_I(len(memory._memory) - 4)
+    with pytest.raises(IndexError):
+        display.draw(0, 0, 8, False, registers, memory)
@@ -0,0 +1,52 @@
+import pytest
+
+from chipped8.core.emulator import Emulator
+from chipped8.core.interpreter import InterpreterTypes
+from chipped8.core.platform import Platform, PlatformTypes
+from chipped8.core.quirks import Quirks
+from chipped8.core.cpu.cached.lamb.factory import get_op_instr
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+def make_emulator(interpreter_type, quirks, rom):
+    emu = Emulator(interpreter_type=interpreter_type, quirks=quirks)
+    emu.load_rom(rom)
+    return emu
+
+# -----------------------------
+# Tests
+# -----------------------------
+
+def test_instructions_shared_by_quirks():
+    quirks = Quirks()
+    same = Quirks()
+    other = Quirks()
+    other.shift = True
+
+    assert get_op_instr(0x8126, quirks, True) is get_op_instr(0x8126, same, True)
+    assert get_op_instr(0x8126, quirks, True) is not get_op_instr(0x8126, other, True)
+    # Only emulators sharing blocks share instructions.
+    assert get_op_instr(0x8126, quirks) is not get_op_instr(0x8126, quirks, True)
+
+@pytest.mark.parametrize('shift', [False, True])
+def test_specialized_instructions(interpreter_type, shift):
+    # V1 = 0x81, V2 = 0x06, V1 = V2 >> 1, or V1 >> 1 with the shift quirk, then loop.
+    rom = bytes.fromhex('6181620681261206')
+    quirks = Quirks()
+    quirks.shift = shift
+    emu = make_emulator(interpreter_type, quirks, rom)
+    emu._cpu.run(3, False)
+    emu._cpu.sync()
+
+    if shift:
+        assert (emu._registers.get_V(1), emu._registers.get_V(0xF)) == (0x40, 1)
+    else:
+        assert (emu._registers.get_V(1), emu._registers.get_V(0xF)) == (0x03, 0)
+
+def test_chip48_quirks():
+    quirks = Platform(PlatformTypes.chip48).quirks()
+    assert quirks.shift
+    assert quirks.memoryIncrementByX
+    assert quirks.jump
@@ -0,0 +1,52 @@
+import numpy as np
+
+from chipped8.core.emulator import Emulator
+from chipped8.core.keys import Keys, KeyState
+from chipped8.core.platform import PlatformTypes
+from chipped8.benchmark.roms import WORKLOADS, assemble
+from chipped8.farm import Farm
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+# Waits for a key then draws its digit.
+_WAIT_KEY = assemble([
+    0xF00A,         # 200: V0 = key
+    0xF029,         # 202: I = font[V0]
+    0x6100,         # 204: V1 = 0
+    0xD115,         # 206: draw 8x5 at V1, V1
+    0x1208,         # 208: jump 208
+])
+
+def run_local(rom, frames, key=None):
+    emu = Emulator(platform=PlatformTypes.xochip, tickrate=100, seed=0)
+    emu.load_rom(rom)
+    if key is not None:
+        emu.set_key_state(key, KeyState.down)
+    for _ in range(frames):
+        emu.process_frame()
+    return emu.screen_buffer()
+
+# -----------------------------
+# Tests
+# -----------------------------
+
+def test_farm_frames_match_emulator():
+    roms = [ w.rom for w in WORKLOADS[:3] ] + [ _WAIT_KEY ]
+
+    with Farm(roms, workers=2, platform=PlatformTypes.xochip, tickrate=100) as farm:
+        farm.start(20)
+        farm.set_key_state(3, Keys.Key_5, KeyState.down)
+        stats = farm.join(timeout=60)
+
+        assert farm.done()
+        assert len(stats) == 2
+        assert sum(s['frames'] for s in stats) == 20 * len(roms)
+        assert sorted(sum((s['sessions'] for s in stats), [])) == list(range(len(roms)))
+
+        for session, rom in enumerate(roms):
+            n, pixels = farm.latest_frame(session)
+            assert n == 19
+            key = Keys.Key_5 if rom == _WAIT_KEY else None
+            assert np.array_equal(pixels, run_local(rom, 20, key))
@@ -0,0 +1,79 @@
+import pytest
+
+from chipped8.core.emulator import Emulator
+from chipped8.core.memory import Memory
+from chipped8.core.keys import Keys, KeyState
+from chipped8.benchmark import WORKLOADS
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+def make_emulator(interpreter_type, name):
+    workload = next(w for w in WORKLOADS if w.name == name)
+    emu = Emulator(platform=workload.platform, interpreter_type=interpreter_type, tickrate=200, seed=0)
+    emu.load_rom(workload.rom)
+    return emu
+
+# -----------------------------
+# Tests
+# -----------------------------
+
+def test_memory_fork_copies_on_write():
+    memory = Memory()
+    memory.set_byte(0x300, 1)
+    fork = memory.fork()
+    assert fork.get_byte(0x300) == 1
+
+    fork.set_byte(0x300, 2)
+    memory.set_range(0x301, b'\x03')
+    assert memory.get_byte(0x300) == 1
+    assert fork.get_byte(0x300) == 2
+    assert fork.get_byte(0x301) == 0
+
+    other = memory.fork()
+    memory.set_state(fork.get_state())
+    assert memory.get_byte(0x300) == 2
+    assert other.get_byte(0x300) == 1
+
+@pytest.mark.parametrize('name', ['draw', 'scroll', 'self-modifying'])
+def test_fork_runs_like_original(interpreter_type, name):
+    emu = make_emulator(interpreter_type, name)
+    for _ in range(5):
+        emu.process_frame()
+
+    fork = emu.fork()
+    states = []
+    for _ in range(10):
+        emu.process_frame()
+        states.append(emu.get_state())
+
+    for state in states:
+        fork.process_frame()
+        assert fork.get_state() == state
+
+@pytest.mark.parametrize('name', ['draw', 'self-modifying'])
+def test_forks_are_independent(interpreter_type, name):
+    emu = make_emulator(interpreter_type, name)
+    for _ in range(5):
+        emu.process_frame()
+    start = emu.get_state()
+
+    fork = emu.fork()
+    fork.set_key_state(Keys.Key_5, KeyState.down)
+    for _ in range(10):
+        fork.process_frame()
+    after = fork.get_state()
+
+    # The original still runs from where it was forked and the fork isn't
+    # affected by it running.
+    assert emu.get_state() == start
+    assert emu._keys.get_key_state(Keys.Key_5) == KeyState.up
+    ref = make_emulator(interpreter_type, name)
+    for _ in range(5):
+        ref.process_frame()
+    for _ in range(15):
+        emu.process_frame()
+        ref.process_frame()
+    assert emu.get_state() == ref.get_state()
+    assert fork.get_state() == after
@@ -0,0 +1,111 @@
+import random
+
+import pytest
+
+from chipped8.core.emulator import Emulator
+from chipped8.core.idle import idle_ops
+from chipped8.core.interpreter import InterpreterTypes
+from chipped8.core.keys import KeyState
+from chipped8.core.platform import PlatformTypes
+from chipped8.benchmark import WORKLOADS
+from chipped8.benchmark.roms import assemble
+
+from .test_compiled import looping_rom
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+_DELAY_WAIT = assemble([
+    0x6020,         # 200: V0 = 0x20
+    0xF015,         # 202: delay = V0
+    0xF107,         # 204: V1 = delay
+    0x3100,         # 206: skip if V1 == 0
+    0x1204,         # 208: jump 204
+    0x7201,         # 20A: V2 += 1
+    0x1200,         # 20C: jump 200
+])
+
+_KEY_WAIT = assemble([
+    0x6300,         # 200: V3 = 0
+    0xF00A,         # 202: wait for a key into V0
+    0x7301,         # 204: V3 += 1
+    0xE09E,         # 206: skip if key V0 is down
+    0x1202,         # 208: jump 202
+    0x1206,         # 20A: jump 206
+])
+
+def make_emulator(interpreter_type, rom, skip_idle, platform=PlatformTypes.xochip, tickrate=500):
+    emu = Emulator(platform=platform, interpreter_type=interpreter_type, tickrate=tickrate, skip_idle=skip_idle, seed=0)
+    emu.load_rom(rom)
+    return emu
+
+def run_both(interpreter_type, rom, frames, keys=None, **kwargs):
+    emus = [ make_emulator(interpreter_type, rom, skip_idle, **kwargs) for skip_idle in (False, True) ]
+    for frame in range(frames):
+        if keys:
+            for emu in emus:
+                keys(frame, emu)
+        ops = [ emu.process_frame() for emu in emus ]
+        assert ops[1] == ops[0]
+        assert emus[1].get_state() == emus[0].get_state()
+    assert emus[0].skipped_ops() == 0
+    return emus[1]
+
+# -----------------------------
+# Tests
+# -----------------------------
+
+def test_idle_ops_keeps_loop_position():
+    emu = make_emulator(InterpreterTypes.pure, _DELAY_WAIT, False)
+    emu.process_frame()
+    assert emu._registers.get_PC() in (0x204, 0x206, 0x208)
+
+    for ops in range(1, 40):
+        ran = idle_ops(ops, emu._registers, emu._memory, emu._timers, emu._keys)
+        # The first time around the loop V1 still holds the last frame's delay.
+        assert ran < 6
+        full = emu.fork()
+        full._cpu.run(ops, False)
+        part = emu.fork()
+        part._cpu.run(ran, False)
+        assert part.get_state() == full.get_state()
+
+def test_waiting_on_delay_is_skipped(interpreter_type):
+    emu = run_both(interpreter_type, _DELAY_WAIT, 80)
+    # Most of every frame the delay timer is running is skipped.
+    assert emu.skipped_ops() > 80 * 500 * 3 // 4
+
+def test_waiting_on_keys_is_skipped(interpreter_type):
+    def keys(frame, emu):
+        emu.set_key_state(5, KeyState.down if frame in (10, 11, 30) else KeyState.up)
+
+    emu = run_both(interpreter_type, _KEY_WAIT, 40, keys)
+    assert emu.skipped_ops() > 30 * 500 * 3 // 4
+
+@pytest.mark.parametrize('name', ['alu', 'draw', 'self-modifying'])
+def test_busy_roms_are_not_skipped(interpreter_type, name):
+    workload = next(w for w in WORKLOADS if w.name == name)
+    emu = run_both(interpreter_type, workload.rom, 10, platform=workload.platform)
+    assert emu.skipped_ops() == 0
+
+def test_random_roms_match(interpreter_type):
+    rng = random.Random(f'idle-{interpreter_type}')
+    compared = 0
+
+    for _ in range(30):
+        # Delay reads, skips and jumps make loops the ROM can get stuck in.
+        rom = looping_rom(rng, rng.choice([8, 16]), code_writes=rng.randrange(2) == 1)
+        rom = assemble([ 0x6000 | rng.randrange(256), 0xF015 ]) + rom[4:]
+        tickrate = rng.choice([7, 100])
+        emus = [ make_emulator(interpreter_type, rom, skip_idle, tickrate=tickrate) for skip_idle in (False, True) ]
+        try:
+            for _ in range(5):
+                for emu in emus:
+                    emu.process_frame()
+        except Exception:
+            continue
+        assert emus[1].get_state() == emus[0].get_state()
+        compared += 1
+
+    assert compared > 10
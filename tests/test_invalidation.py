@@ -0,0 +1,143 @@
+import random
+
+import pytest
+
+from chipped8.core.emulator import Emulator
+from chipped8.core.interpreter import InterpreterTypes
+from chipped8.core.memory import Memory, PAGE_SIZE
+from chipped8.core.platform import PlatformTypes
+from chipped8.core.cpu.cached.block_index import BlockIndex
+from chipped8.benchmark import WORKLOADS
+from chipped8.benchmark.roms import assemble
+
+from .test_compiled import looping_rom
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+def make_emulator(interpreter_type, rom, platform=PlatformTypes.superchip):
+    emu = Emulator(platform=platform, interpreter_type=interpreter_type, tickrate=100, seed=0)
+    emu.load_rom(rom)
+    return emu
+
+def run(emu, max_ops):
+    try:
+        return emu._cpu.run(max_ops, False)
+    except Exception:
+        return None
+
+# -----------------------------
+# Tests
+# -----------------------------
+
+def test_block_index_removes_overlapping():
+    memory = Memory()
+    index = BlockIndex()
+    index.add(0x200, 0x210, memory)
+    index.add(0x2F8, 0x308, memory)
+    index.add(0x400, 0x404, memory)
+    assert memory.holds_code(0x20F, 1)
+    assert not memory.holds_code(0x500, 16)
+
+    memory.set_byte(0x600, 1)
+    assert memory.take_code_writes() == []
+
+    memory.set_byte(0x220, 1)
+    memory.set_range(0x300, b'\x01\x02')
+    assert index.invalidate_writes(memory) == [ 0x2F8 ]
+    # Neither page is watched once the block covering both is gone.
+    assert memory.holds_code(0x200, 1)
+    assert not memory.holds_code(0x300, 1)
+
+    assert index.remove(0x3FF, 2, memory) == [ 0x400 ]
+    assert not memory.holds_code(0x400, PAGE_SIZE)
+
+    index.clear(memory)
+    assert not memory.holds_code(0, 0x10000)
+
+def test_random_code_writes_match_pure(interpreter_type):
+    if interpreter_type == InterpreterTypes.pure:
+        pytest.skip('Nothing is cached')
+
+    rng = random.Random(f'invalidation-{interpreter_type}')
+    compared = 0
+    for _ in range(60):
+        rom = looping_rom(rng, 32, code_writes=True)
+        pure = make_emulator(InterpreterTypes.pure, rom)
+        emu = make_emulator(interpreter_type, rom)
+
+        for _ in range(30):
+            max_ops = rng.randrange(1, 40)
+            ret = run(pure, max_ops)
+            assert run(emu, max_ops) == ret
+            if ret is None:
+                break
+            assert emu.get_state() == pure.get_state()
+            compared += 1
+    assert compared > 300
+
+def test_self_modifying_only_rebuilds_written_block(interpreter_type):
+    if interpreter_type in (InterpreterTypes.pure, InterpreterTypes.puret):
+        pytest.skip('Nothing is cached')
+
+    workload = next(w for w in WORKLOADS if w.name == 'self-modifying')
+    emu = make_emulator(interpreter_type, workload.rom)
+    ref = make_emulator(InterpreterTypes.pure, workload.rom)
+    for _ in range(10):
+        emu.process_frame()
+        ref.process_frame()
+    assert emu.get_state() == ref.get_state()
+
+    stats = emu.cache_stats()
+    assert stats['cache_clears'] == 0
+    # Each pass of the loop writes one byte of one block.
+    assert stats['blocks_invalidated'] > 0
+    assert stats['blocks_built'] <= stats['blocks_invalidated'] + 4
+
+def test_data_writes_keep_blocks(interpreter_type):
+    if interpreter_type in (InterpreterTypes.pure, InterpreterTypes.puret):
+        pytest.skip('Nothing is cached')
+
+    rom = assemble([
+        0x6000,         # 200: V0 = 0
+        0xA400,         # 202: I = 0x400
+        0x7001,         # 204: V0 += 1
+        0xF055,         # 206: [I] = V0
+        0x1204,         # 208: jump 204
+    ])
+    emu = make_emulator(interpreter_type, rom)
+    for _ in range(5):
+        emu.process_frame()
+
+    stats = emu.cache_stats()
+    assert stats['blocks_built'] <= 3
+    assert stats['blocks_invalidated'] == 0
+    assert stats['cache_clears'] == 0
+
+def test_rewrites_after_block_dropped(interpreter_type):
+    # The block at 0x3FA is dropped when 0x3FA is written, which stops
+    # watching its page. The later write to 0x3FC must still be seen.
+    rom = assemble([
+        0x6000,         # 200: V0 = 0
+        0x23FA,         # 202: call 3FA
+        0xA3FA,         # 204: I = 0x3FA
+        0x6061,         # 206: V0 = 0x61
+        0xF055,         # 208: [I] = V0
+        0xA3FC,         # 20A: I = 0x3FC
+        0x6060,         # 20C: V0 = 0x60
+        0x6177,         # 20E: V1 = 0x77
+        0xF155,         # 210: [I] = V0, V1
+        0x23FC,         # 212: call 3FC
+        0x1214,         # 214: jump 214
+    ]).ljust(0x3FA - 0x200, b'\x00') + assemble([
+        0x6105,         # 3FA: V1 = 5
+        0x3000,         # 3FC: skip if V0 == 0
+        0x00EE,         # 3FE: return
+        0x00EE,         # 400: return
+    ])
+    emu = Emulator(interpreter_type=interpreter_type, tickrate=40)
+    emu.load_rom(rom)
+    emu.process_frame()
+
+    assert emu._registers.get_V(0) == 0x77
@@ -0,0 +1,164 @@
+import json
+import random
+import subprocess
+import sys
+
+import pytest
+
+from chipped8.core.emulator import Emulator
+from chipped8.core.exceptions import InvalidMovieException
+from chipped8.core.interpreter import InterpreterTypes
+from chipped8.core.keys import KeyState
+from chipped8.core.movie import Movie
+from chipped8.core.platform import PlatformTypes
+from chipped8.core.registers import Registers
+
+from .test_compiled import looping_rom
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+# V2 = 5, loop: V0 and V1 random, draw at V0, V1, count in V3 while key 5 is
+# held.
+RANDOM_KEYS_ROM = bytes.fromhex('6205C03FC11FA214D011E29E12027301120200008000')
+
+def make_emulator(interpreter_type, rom=RANDOM_KEYS_ROM, seed=1, platform=PlatformTypes.xochip):
+    emu = Emulator(platform=platform, interpreter_type=interpreter_type, tickrate=100, seed=seed)
+    emu.load_rom(rom)
+    return emu
+
+def record(interpreter_type, frames, seed=1):
+    rng = random.Random('movie-keys')
+    emu = make_emulator(interpreter_type, seed=seed)
+    emu.record_movie(hash_every=10)
+    for frame in range(frames):
+        if frame % 7 == 0:
+            emu._keys.set_key_state(5, KeyState.down if rng.randrange(2) else KeyState.up)
+            emu._keys.set_key_state(rng.randrange(16), KeyState.down if rng.randrange(2) else KeyState.up)
+        emu.process_frame()
+    return (emu, emu.stop_recording())
+
+def replay_emulator(interpreter_type, movie, rom=RANDOM_KEYS_ROM):
+    emu = Emulator(interpreter_type=interpreter_type, tickrate=movie.tickrate, quirks=movie.get_quirks(), seed=movie.seed)
+    emu.load_rom(rom)
+    return emu
+
+# -----------------------------
+# Tests
+# -----------------------------
+
+def test_random_bytes_are_seeded():
+    a = Registers()
+    b = Registers()
+    a.seed_random(1234)
+    b.seed_random(1234)
+    values = [ a.random_byte() for _ in range(4000) ]
+    assert values == [ b.random_byte() for _ in range(4000) ]
+    # All of them show up.
+    assert len(set(values)) == 256
+
+    b.seed_random(1235)
+    assert values != [ b.random_byte() for _ in range(4000) ]
+    # A zero seed still gives numbers.
+    b.seed_random(0)
+    assert len(set(b.random_byte() for _ in range(100))) > 1
+
+def test_random_matches_across_interpreters(interpreter_type):
+    rng = random.Random(f'movie-random-{interpreter_type}')
+    compared = 0
+
+    for _ in range(60):
+        rom = bytearray(looping_rom(rng, rng.choice([8, 16, 32]), code_writes=rng.randrange(2) == 1))
+        # Make sure there's CXNN to use the seed.
+        for _ in range(4):
+            i = rng.randrange(len(rom) // 2) * 2
+            if rom[i] >> 4 not in (0x1, 0x2, 0xB):
+                rom[i : i+2] = bytes((0xC0 | rng.randrange(16), rng.randrange(256)))
+        rom = bytes(rom)
+        seed = rng.getrandbits(32)
+        ref = make_emulator(InterpreterTypes.pure, rom, seed)
+        emu = make_emulator(interpreter_type, rom, seed)
+        try:
+            ref._cpu.run(400, False)
+        except Exception:
+            continue
+        emu._cpu.run(400, False)
+        assert emu.get_state() == ref.get_state()
+        compared += 1
+
+    assert compared > 20
+
+def test_seed_changes_run():
+    a = make_emulator(InterpreterTypes.pure, seed=1)
+    b = make_emulator(InterpreterTypes.pure, seed=2)
+    a.process_frame()
+    b.process_frame()
+    assert a.seed() == 1
+    assert a.get_state() != b.get_state()
+
+    c = a.fork()
+    a.process_frame()
+    c.process_frame()
+    assert c.seed() == 1
+    assert a.get_state() == c.get_state()
+
+def test_replay_matches_recording(interpreter_type):
+    (recorded, movie) = record(InterpreterTypes.pure, 95)
+    assert len(movie) == 95
+    assert len(movie.hashes()) == 9
+
+    emu = replay_emulator(interpreter_type, movie)
+    assert emu.replay_movie(movie) is None
+    assert emu.get_state() == recorded.get_state()
+
+def test_replay_finds_changes():
+    (_, movie) = record(InterpreterTypes.cachedlh, 60)
+
+    keys = Movie.from_bytes(movie.to_bytes())
+    masks = keys.key_masks()
+    keys._keys[22 * 2] ^= 1 << 5
+    assert keys.key_masks() != masks
+    assert replay_emulator(InterpreterTypes.cachedlh, keys).replay_movie(keys) == 30
+
+    hashes = Movie.from_bytes(movie.to_bytes())
+    hashes._hashes[4 * 4] ^= 1
+    assert replay_emulator(InterpreterTypes.cachedlh, hashes).replay_movie(hashes) == 50
+
+    # Made with a different seed.
+    emu = make_emulator(InterpreterTypes.cachedlh, seed=2)
+    with pytest.raises(InvalidMovieException):
+        emu.replay_movie(movie)
+    # Another ROM.
+    emu = replay_emulator(InterpreterTypes.cachedlh, movie, RANDOM_KEYS_ROM + b'\x00')
+    with pytest.raises(InvalidMovieException):
+        emu.replay_movie(movie)
+
+def test_movie_round_trip():
+    (_, movie) = record(InterpreterTypes.pure, 45)
+    data = movie.to_bytes()
+    loaded = Movie.from_bytes(data)
+
+    assert loaded.to_bytes() == data
+    assert (loaded.rom_hash, loaded.quirks, loaded.tickrate, loaded.seed, loaded.hash_every) == (movie.rom_hash, movie.quirks, movie.tickrate, movie.seed, movie.hash_every)
+    assert loaded.key_masks() == movie.key_masks()
+    assert loaded.hashes() == movie.hashes()
+
+    for bad in (b'', b'C8MV', b'XXXX' + data[4:], data[:4] + b'\xFF' + data[5:], data[:-4], data + b'\x00'):
+        with pytest.raises(InvalidMovieException):
+            Movie.from_bytes(bad)
+
+def test_replay_cli(tmp_path):
+    (_, movie) = record(InterpreterTypes.pure, 30)
+    rom = tmp_path / 'roms' / 'random.ch8'
+    rom.parent.mkdir()
+    rom.write_bytes(RANDOM_KEYS_ROM)
+    fname = tmp_path / 'run.c8m'
+    fname.write_bytes(movie.to_bytes())
+
+    proc = subprocess.run([ sys.executable, '-m', 'chipped8.replay', '-i', 'cachedc', '--json', '--roms', str(rom.parent), '--', str(fname) ], capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+    result = json.loads(proc.stdout)
+    assert result['frames'] == 30
+    assert result['mismatch'] is None
+    assert result['rom'] == str(rom)
@@ -0,0 +1,140 @@
+import pytest
+
+from chipped8.core.emulator import Emulator
+from chipped8.core.rewind import Rewind
+from chipped8.core.memory import Memory, PAGE_SIZE
+from chipped8.core.display_types import DisplayTypes
+from chipped8.benchmark import WORKLOADS
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+def make_emulator(interpreter_type, name, display_type=DisplayTypes.packed):
+    workload = next(w for w in WORKLOADS if w.name == name)
+    emu = Emulator(platform=workload.platform, interpreter_type=interpreter_type, tickrate=200, display_type=display_type, seed=0)
+    emu.load_rom(workload.rom)
+    return emu
+
+# -----------------------------
+# Tests
+# -----------------------------
+
+def test_memory_dirty_pages():
+    memory = Memory()
+    memory.clear_dirty_pages()
+    assert memory.dirty_pages() == []
+
+    memory.set_byte(0x1FF, 1)
+    memory.set_byte(0x3000, 2)
+    memory.set_range(PAGE_SIZE * 4 - 1, b'\x01\x02')
+    assert memory.dirty_pages() == [ 1, 3, 4, 0x30 ]
+
+    memory.clear_dirty_pages()
+    memory.load_rom(bytes(PAGE_SIZE + 1))
+    assert memory.dirty_pages() == [ 2, 3 ]
+
+    memory.clear_dirty_pages()
+    memory.set_state(memory.get_state())
+    assert len(memory.dirty_pages()) == len(memory.get_state()[4:]) // PAGE_SIZE
+
+@pytest.mark.parametrize('name', ['draw', 'scroll', 'self-modifying'])
+def test_state_round_trip(interpreter_type, name):
+    emu = make_emulator(interpreter_type, name)
+    for _ in range(5):
+        emu.process_frame()
+
+    state = emu.get_state()
+    assert len(state) == emu.state_size()
+
+    pixels = emu.screen_buffer().copy()
+    for _ in range(5):
+        emu.process_frame()
+    emu.set_state(state)
+
+    assert emu.get_state() == state
+    assert (emu.screen_buffer() == pixels).all()
+
+@pytest.mark.parametrize('name', ['draw', 'scroll', 'self-modifying'])
+def test_state_does_not_change_execution(interpreter_type, name):
+    # Taking the state syncs the cached interpreters which must not change
+    # what the emulator does.
+    emu = make_emulator(interpreter_type, name)
+    ref = make_emulator(interpreter_type, name)
+    for _ in range(20):
+        emu.process_frame()
+        emu.get_state()
+        ref.process_frame()
+
+    assert emu.get_state() == ref.get_state()
+
+@pytest.mark.parametrize('display_type', list(DisplayTypes))
+def test_rewind_restores_recorded_frames(interpreter_type, display_type):
+    emu = make_emulator(interpreter_type, 'scroll', display_type)
+    rewind = Rewind(capacity=100, keyframe_interval=8)
+
+    states = []
+    for _ in range(30):
+        emu.process_frame()
+        rewind.record(emu)
+        states.append(emu.get_state())
+    assert len(rewind) == 30
+
+    assert rewind.rewind(emu, 1) == 1
+    assert emu.get_state() == states[-2]
+
+    # Far enough to be closer to the keyframe than the newest frame.
+    assert rewind.rewind(emu, 13) == 13
+    assert emu.get_state() == states[-15]
+    assert len(rewind) == 16
+
+    # Running again after a rewind continues from the restored frame.
+    emu.process_frame()
+    rewind.record(emu)
+    emu.process_frame()
+    rewind.record(emu)
+    expected = emu.get_state()
+    rewind.rewind(emu, 2)
+    assert emu.get_state() == states[-15]
+    assert rewind.rewind(emu, 0) == 0
+    assert emu.get_state() == states[-15]
+
+    emu.process_frame()
+    emu.process_frame()
+    assert emu.get_state() == expected
+
+def test_rewind_drops_oldest_frames(interpreter_type):
+    emu = make_emulator(interpreter_type, 'draw')
+    rewind = Rewind(capacity=10, keyframe_interval=4)
+
+    states = []
+    for _ in range(50):
+        emu.process_frame()
+        rewind.record(emu)
+        states.append(emu.get_state())
+
+    assert 10 <= len(rewind) <= 16
+    frames = rewind.rewind(emu, 100)
+    assert frames >= 9
+    assert len(rewind) == 1
+    assert emu.get_state() == states[-1 - frames]
+
+    rewind.clear()
+    assert len(rewind) == 0
+    assert rewind.rewind(emu, 1) == 0
+
+def test_memory_usage_counts_newest_frame(interpreter_type):
+    emu = make_emulator(interpreter_type, 'draw')
+    rewind = Rewind(capacity=10, keyframe_interval=4)
+    assert rewind.memory_usage() == 0
+
+    # The first frame is a keyframe and also the newest.
+    emu.process_frame()
+    rewind.record(emu)
+    assert rewind.memory_usage() == emu.state_size()
+
+    emu.process_frame()
+    rewind.record(emu)
+    deltas = sum(len(x) for (_, x) in rewind._deltas[1])
+    assert deltas > 0
+    assert rewind.memory_usage() == 2 * emu.state_size() + deltas
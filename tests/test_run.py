@@ -0,0 +1,122 @@
+import random
+
+import pytest
+
+from chipped8.core.emulator import Emulator
+from chipped8.core.interpreter import InterpreterTypes
+from chipped8.core.keys import KeyState
+from chipped8.core.platform import PlatformTypes
+from chipped8.core.cpu.icpu import StopReason
+from chipped8.benchmark import WORKLOADS
+
+from .test_compiled import looping_rom
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+def make_emulator(interpreter_type, rom, platform=PlatformTypes.xochip):
+    emu = Emulator(platform=platform, interpreter_type=interpreter_type, tickrate=100, seed=0)
+    emu.load_rom(rom)
+    return emu
+
+def step(cpu, max_ops, stop_on_draw):
+    # What run is expected to do, one instruction at a time.
+    for ops in range(1, max_ops + 1):
+        cpu.execute_next_op()
+        if stop_on_draw and cpu.draw_occurred():
+            return (ops, StopReason.draw)
+    return (max_ops, StopReason.max_ops)
+
+def try_call(func, *args):
+    try:
+        return func(*args)
+    except Exception:
+        return None
+
+# -----------------------------
+# Tests
+# -----------------------------
+
+@pytest.mark.parametrize('platform', [PlatformTypes.xochip, PlatformTypes.superchip])
+def test_run_matches_single_steps(interpreter_type, platform):
+    rng = random.Random(f'run-{interpreter_type}-{platform}')
+    compared = 0
+
+    for _ in range(40):
+        rom = looping_rom(rng, rng.choice([8, 16, 32]), code_writes=rng.randrange(2) == 1)
+        ran = make_emulator(interpreter_type, rom, platform)
+        stepped = make_emulator(interpreter_type, rom, platform)
+
+        for _ in range(30):
+            max_ops = rng.randrange(1, 80)
+            stop_on_draw = rng.randrange(2) == 1
+            # Mixing in single steps leaves blocks partly run for run to finish.
+            if rng.randrange(4) == 0:
+                if try_call(step, ran._cpu, 1, False) is None:
+                    break
+                try_call(step, stepped._cpu, 1, False)
+
+            result = try_call(ran._cpu.run, max_ops, stop_on_draw)
+            assert result == try_call(step, stepped._cpu, max_ops, stop_on_draw)
+            if result is None:
+                break
+            if result[1] == StopReason.draw:
+                assert ran._cpu.draw_occurred()
+            assert ran.get_state() == stepped.get_state()
+            compared += 1
+
+    assert compared > 200
+
+def test_run_stops_on_draw(interpreter_type):
+    workload = next(w for w in WORKLOADS if w.name == 'draw')
+    emu = make_emulator(interpreter_type, workload.rom, workload.platform)
+
+    (ops, reason) = emu._cpu.run(1000, True)
+    assert reason == StopReason.draw
+    assert ops < 1000
+    assert emu._cpu.draw_occurred()
+
+    assert emu._cpu.run(ops - 1, True) == (ops - 1, StopReason.max_ops)
+
+def test_key_wait_inside_block(interpreter_type):
+    # V0 = 0, wait for key into V0, V0 += 1, jump back to the wait.
+    rom = bytes.fromhex('6000F00A70011202')
+    emu = make_emulator(interpreter_type, rom)
+
+    emu._keys.set_key_state(5, KeyState.down)
+    emu._cpu.run(20, False)
+    emu._keys.set_key_state(5, KeyState.up)
+    assert emu._cpu.run(50, False) == (50, StopReason.max_ops)
+    emu._cpu.sync()
+
+    assert emu._registers.get_V(0) == 6
+    assert emu._registers.get_PC() == 0x202
+
+@pytest.mark.parametrize('render_every', [1, 3, 10])
+def test_run_frames_renders_every(interpreter_type, render_every):
+    workload = next(w for w in WORKLOADS if w.name == 'scroll')
+    emu = make_emulator(interpreter_type, workload.rom, workload.platform)
+    ref = make_emulator(interpreter_type, workload.rom, workload.platform)
+    # Sound plays for every frame run.
+    for e in (emu, ref):
+        e._timers.sound = 100
+
+    blits = []
+    emu.set_blit_screen_cb(lambda pixels: blits.append(pixels.copy()))
+    sounds = []
+    emu.set_sound_cb(lambda *args: sounds.append(args))
+
+    ops = emu.run_frames(7, render_every)
+    # Calls continue counting from the last one.
+    for _ in range(5):
+        ops += emu.run_frames(1, render_every)
+    for _ in range(12):
+        ops -= ref.process_frame()
+
+    assert ops == 0
+    assert emu.get_state() == ref.get_state()
+    assert len(blits) == 12 // render_every
+    assert len(sounds) == 12 // render_every
+    if 12 % render_every == 0:
+        assert (blits[-1] == ref.screen_buffer()).all()
@@ -0,0 +1,78 @@
+import pytest
+
+from chipped8.core.emulator import Emulator
+from chipped8.core.exceptions import InvalidSaveStateException
+from chipped8.core.platform import PlatformTypes, Platform
+from chipped8.benchmark import WORKLOADS
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+def make_emulator(interpreter_type, name, platform=None):
+    workload = next(w for w in WORKLOADS if w.name == name)
+    emu = Emulator(platform=platform or workload.platform, interpreter_type=interpreter_type, tickrate=200, seed=0)
+    emu.load_rom(workload.rom)
+    return emu
+
+# -----------------------------
+# Tests
+# -----------------------------
+
+@pytest.mark.parametrize('name', ['draw', 'scroll', 'self-modifying'])
+def test_save_state_restores_into_new_emulator(interpreter_type, name):
+    emu = make_emulator(interpreter_type, name)
+    for _ in range(10):
+        emu.process_frame()
+    saved = emu.save_state()
+    assert len(saved) < emu.state_size() // 8
+
+    restored = Emulator(interpreter_type=interpreter_type, tickrate=200)
+    restored.load_state(saved)
+    assert restored.get_state() == emu.get_state()
+    assert (restored.screen_buffer() == emu.screen_buffer()).all()
+
+    for _ in range(10):
+        emu.process_frame()
+        restored.process_frame()
+    assert restored.get_state() == emu.get_state()
+
+def test_save_state_restores_quirks(interpreter_type):
+    emu = make_emulator(interpreter_type, 'alu', PlatformTypes.superchip)
+    saved = emu.save_state()
+
+    other = Emulator(platform=PlatformTypes.originalChip8, interpreter_type=interpreter_type)
+    quirks = other._quirks
+    other.load_state(saved)
+    assert other._quirks.get_state() == Platform(PlatformTypes.superchip).quirks().get_state()
+    # The original quirks are left alone in case they're shared.
+    assert quirks.get_state() == Platform(PlatformTypes.originalChip8).quirks().get_state()
+
+def test_save_state_continues_random_numbers(interpreter_type):
+    # I = 0x400, V1 = 1, loop: V0 = random, store V0 at I, I += V1.
+    rom = bytes.fromhex('A4006101C0FFF055F11E1204')
+    emu = Emulator(interpreter_type=interpreter_type, tickrate=50, seed=1)
+    emu.load_rom(rom)
+    emu.process_frame()
+    saved = emu.save_state()
+
+    restored = Emulator(interpreter_type=interpreter_type, tickrate=50, seed=2)
+    restored.load_state(saved)
+    for _ in range(5):
+        emu.process_frame()
+        restored.process_frame()
+    assert restored.get_state() == emu.get_state()
+    assert restored._memory.get_range(0x400, 40) == emu._memory.get_range(0x400, 40)
+
+def test_load_state_rejects_bad_data():
+    emu = Emulator()
+    saved = emu.save_state()
+
+    with pytest.raises(InvalidSaveStateException):
+        emu.load_state(b'')
+    with pytest.raises(InvalidSaveStateException):
+        emu.load_state(b'XXXX' + saved[4:])
+    with pytest.raises(InvalidSaveStateException):
+        emu.load_state(saved[:4] + b'\xFF' + saved[5:])
+    with pytest.raises(InvalidSaveStateException):
+        emu.load_state(saved[:-8])
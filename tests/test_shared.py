@@ -0,0 +1,138 @@
+import random
+
+from threading import Thread
+
+import pytest
+
+from chipped8.core.emulator import Emulator
+from chipped8.core.interpreter import InterpreterTypes
+from chipped8.core.platform import PlatformTypes
+from chipped8.core.cpu.cached.shared import clear_shared_blocks, get_shared_blocks, MAX_SHARED_ROMS
+from chipped8.core.cpu.cached.lamb import factory
+from chipped8.benchmark import WORKLOADS
+
+from .test_compiled import looping_rom
+
+# Interpreters that share blocks.
+SHARING = (InterpreterTypes.cachedlp, InterpreterTypes.cachedlh, InterpreterTypes.cachedc)
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+@pytest.fixture(autouse=True)
+def clear_shared():
+    clear_shared_blocks()
+    yield
+    clear_shared_blocks()
+
+def make_emulator(interpreter_type, rom, platform, shared_blocks=True):
+    emu = Emulator(platform=platform, interpreter_type=interpreter_type, tickrate=200, shared_blocks=shared_blocks, seed=0)
+    emu.load_rom(rom)
+    return emu
+
+def run_frames(emu, frames):
+    try:
+        for _ in range(frames):
+            emu.process_frame()
+    except Exception:
+        return False
+    return True
+
+# -----------------------------
+# Tests
+# -----------------------------
+
+@pytest.mark.parametrize('name', ['alu', 'draw', 'double-wide'])
+def test_new_session_skips_building(interpreter_type, name):
+    workload = next(w for w in WORKLOADS if w.name == name)
+    first = make_emulator(interpreter_type, workload.rom, workload.platform)
+    run_frames(first, 10)
+
+    second = make_emulator(interpreter_type, workload.rom, workload.platform)
+    ref = make_emulator(interpreter_type, workload.rom, workload.platform, shared_blocks=False)
+    run_frames(second, 10)
+    run_frames(ref, 10)
+
+    assert second.get_state() == ref.get_state()
+    if interpreter_type in SHARING:
+        assert second.cache_stats()['blocks_built'] == 0
+    else:
+        assert second.cache_stats() == ref.cache_stats()
+
+def test_self_modifying_code_is_not_shared(interpreter_type):
+    rng = random.Random(f'shared-{interpreter_type}')
+    compared = 0
+
+    for _ in range(60):
+        rom = looping_rom(rng, 32, code_writes=True)
+        ref = make_emulator(InterpreterTypes.pure, rom, PlatformTypes.xochip, shared_blocks=False)
+        emus = [ make_emulator(interpreter_type, rom, PlatformTypes.xochip) for _ in range(3) ]
+
+        # Sessions start at different times so later ones find blocks
+        # built from memory the earlier ones have already changed.
+        ok = run_frames(ref, 3)
+        for emu in emus:
+            assert run_frames(emu, 3) == ok
+            if ok:
+                assert emu.get_state() == ref.get_state()
+                compared += 1
+
+    assert compared > 30
+
+def test_threads_share_blocks(interpreter_type):
+    workload = next(w for w in WORKLOADS if w.name == 'self-modifying')
+    ref = make_emulator(interpreter_type, workload.rom, workload.platform, shared_blocks=False)
+    run_frames(ref, 20)
+
+    emus = [ make_emulator(interpreter_type, workload.rom, workload.platform) for _ in range(4) ]
+    threads = [ Thread(target=run_frames, args=(emu, 20)) for emu in emus ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for emu in emus:
+        assert emu.get_state() == ref.get_state()
+
+def test_least_recently_used_roms_are_dropped():
+    quirks = make_emulator(InterpreterTypes.cachedlp, b'', PlatformTypes.xochip)._quirks
+    roms = [ bytes((i,)) for i in range(MAX_SHARED_ROMS + 1) ]
+    shared = [ get_shared_blocks(rom, quirks, 'lamb') for rom in roms[:-1] ]
+
+    # Using the first keeps it so the second is the oldest.
+    assert get_shared_blocks(roms[0], quirks, 'lamb') is shared[0]
+    get_shared_blocks(roms[-1], quirks, 'lamb')
+    assert get_shared_blocks(roms[0], quirks, 'lamb') is shared[0]
+    assert get_shared_blocks(roms[2], quirks, 'lamb') is shared[2]
+    assert get_shared_blocks(roms[1], quirks, 'lamb') is not shared[1]
+
+def test_instructions_only_shared_when_sharing_blocks(interpreter_type):
+    if interpreter_type not in SHARING:
+        pytest.skip('Instructions are not shared')
+
+    workload = next(w for w in WORKLOADS if w.name == 'alu')
+    factory._instr_cache.clear()
+    emu = make_emulator(interpreter_type, workload.rom, workload.platform, shared_blocks=False)
+    run_frames(emu, 2)
+    assert len(factory._instr_cache) == 0
+
+    emu = make_emulator(interpreter_type, workload.rom, workload.platform)
+    run_frames(emu, 2)
+    assert len(factory._instr_cache) > 0
+
+def test_load_state_keeps_sharing_off(interpreter_type):
+    if interpreter_type not in SHARING:
+        pytest.skip('Blocks are not shared')
+
+    workload = next(w for w in WORKLOADS if w.name == 'alu')
+    other = make_emulator(interpreter_type, workload.rom, PlatformTypes.superchip)
+    saved = other.save_state()
+    emu = make_emulator(interpreter_type, workload.rom, PlatformTypes.xochip, shared_blocks=False)
+    emu.load_state(saved)
+    run_frames(emu, 2)
+
+    assert emu.cache_stats()['blocks_built'] > 0
+    assert len(get_shared_blocks(workload.rom, emu._quirks, 'lamb')) == 0
+    assert len(get_shared_blocks(workload.rom, emu._quirks, 'hotblock')) == 0
+    assert len(get_shared_blocks(workload.rom, emu._quirks, 'compiled')) == 0
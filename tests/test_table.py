@@ -0,0 +1,103 @@
+import random
+
+import pytest
+
+from chipped8.core.emulator import Emulator
+from chipped8.core.interpreter import InterpreterTypes
+from chipped8.core.keys import KeyState
+from chipped8.core.quirks import Quirks
+from chipped8.core.cpu.pure.table import get_table, _unknown
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+def random_quirks(rng):
+    quirks = Quirks()
+    for name in ('shift', 'memoryIncrementByX', 'memoryLeaveIUnchanged', 'wrap', 'jump', 'logic'):
+        setattr(quirks, name, rng.randrange(2) == 1)
+    return quirks
+
+def make_emulator(interpreter_type, quirks, state=None):
+    emu = Emulator(interpreter_type=interpreter_type, quirks=quirks)
+    if state is not None:
+        emu.set_state(state)
+    return emu
+
+def step(emu, seed):
+    # CXNN uses the emulator's random number generator.
+    emu._registers.seed_random(seed)
+    # Unknown opcodes and exiting raise, compare the message instead.
+    try:
+        emu._cpu.execute_next_op()
+    except Exception as e:
+        return f'{type(e).__name__}: {e}'
+    return emu._cpu.draw_occurred()
+
+# -----------------------------
+# Tests
+# -----------------------------
+
+def test_tables_shared_by_quirks():
+    rng = random.Random('tables')
+    quirks = random_quirks(rng)
+    same = Quirks()
+    same.set_state(quirks.get_state())
+
+    table = get_table(quirks)
+    assert len(table) == 0x10000
+    assert get_table(same) is table
+
+    same.shift = not same.shift
+    assert get_table(same) is not table
+
+def test_unknown_opcodes_share_a_handler():
+    table = get_table(Quirks())
+    assert table[0xFFFF] is _unknown
+    assert table[0x5001] is _unknown
+    assert table[0x00E0] is not _unknown
+
+    emu = make_emulator(InterpreterTypes.puret, Quirks())
+    emu._memory.set_range(0x200, bytes.fromhex('E0FF'))
+    assert step(emu, 0) == 'Exception: Unknown opcode: EXFF'
+
+@pytest.mark.parametrize('pc', [0xFFF9, 0xFFFA, 0xFFFB, 0xFFFC])
+@pytest.mark.parametrize('opcode', [0x3000, 0x4001, 0xE09E])
+def test_skip_wraps_like_pure(pc, opcode):
+    # Skips near the end of memory, some over F000 and some from an odd PC,
+    # wrap past 0.
+    results = []
+    for interpreter_type in (InterpreterTypes.pure, InterpreterTypes.puret):
+        emu = make_emulator(interpreter_type, Quirks())
+        emu._memory.set_range(pc, opcode.to_bytes(2, 'big'))
+        emu._memory.set_range(0xFFFD, b'\xF0\x00')
+        emu._registers._PC = pc
+        results.append((step(emu, 0), emu.get_state()))
+    assert results[0] == results[1]
+
+@pytest.mark.parametrize('seed', range(4))
+def test_opcodes_match_pure(seed):
+    rng = random.Random(f'table-{seed}')
+    quirks = random_quirks(rng)
+    base = make_emulator(InterpreterTypes.pure, quirks)
+    base._memory.set_range(0x200, bytes(rng.randrange(256) for _ in range(0x400)))
+    for i in range(16):
+        base._registers.set_V(i, rng.randrange(256))
+    base._registers.set_I(0x300)
+    base._stack.push(0x400)
+    base._keys.set_key_state(rng.randrange(16), KeyState.down)
+
+    pure = make_emulator(InterpreterTypes.pure, quirks)
+    table = make_emulator(InterpreterTypes.puret, quirks)
+    pure._keys = base._keys
+    table._keys = base._keys
+    for opcode in rng.sample(range(0x10000), 3000):
+        pc = 0x200 + rng.randrange(0x200) * 2
+        base._registers._PC = pc
+        base._memory.set_range(pc, opcode.to_bytes(2, 'big'))
+        state = base.get_state()
+        pure.set_state(state)
+        table.set_state(state)
+
+        assert step(table, opcode) == step(pure, opcode), f'{opcode:04X}'
+        assert table.get_state() == pure.get_state(), f'{opcode:04X}'